@@ -1,23 +1,64 @@
 # -*- coding: utf-8 -*
 #!/usr/bin/env python3
 
+import sys
+import time
+
+# 启动计时起点（导入其它模块之前），--profile-startup 时另外统计每条导入语句的耗时
+_BOOT_STARTED = time.perf_counter()
+_BOOT_WALL = time.time()
+_IMPORT_TIMES = {}
+if '--profile-startup' in sys.argv:
+    import builtins
+    _builtin_import = builtins.__import__
+    _import_depth = 0
+
+    def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+        """只统计最外层的导入（耗时包含它间接导入的模块）"""
+        global _import_depth
+        if _import_depth:
+            return _builtin_import(name, globals, locals, fromlist, level)
+        _import_depth += 1
+        start = time.perf_counter()
+        try:
+            return _builtin_import(name, globals, locals, fromlist, level)
+        finally:
+            _import_depth -= 1
+            key = f"{name} ({', '.join(fromlist)})" if fromlist and '*' not in fromlist else name
+            _IMPORT_TIMES[key] = _IMPORT_TIMES.get(key, 0) + time.perf_counter() - start
+
+    builtins.__import__ = _timed_import
+
+# colorchooser、messagebox、ttk、re、xml.etree 只在用到时导入，缩短启动时间
 from tkinter import *
-from tkinter import ttk
 from tkinter import StringVar
-from tkinter import colorchooser
 from datetime import datetime
 import socket
+import asyncio
 import threading
-import time
 import json
 import os
-import re
-import sys
+import functools
+import atexit
+import random
+import heapq
+import hashlib
+import base64
+import mmap
+import struct
+from urllib.parse import quote
+import queue
+import logging
+import logging.handlers
+from collections import deque, namedtuple
+from concurrent.futures import Future
+
+_BOOT_IMPORTED = time.perf_counter()
 
 # ============ 初始化全局变量和文件 ============
-# 读取球队名单（使用FileManager将在导入后初始化）
-away_list = []
-home_list = []
+# 球队名单索引（Roster，使用FileManager将在导入后初始化）
+away_roster = None
+home_roster = None
 
 # 全局变量（球队名称和比分等，实际值在MY_GUI初始化时从VmixController获取）
 teamname_home = "主队"
@@ -30,16 +71,16 @@ team_away_color = "#E74C3C"  # 默认客队颜色
 
 def initialize_files():
     """初始化文件（需要在FileManager类定义之后调用）"""
-    global away_list, home_list
+    global away_roster, home_roster
     
-    # 读取球队名单
-    away_list = FileManager.read_lines('away.txt')
-    home_list = FileManager.read_lines('home.txt')
+    # 读取球队名单（只解析一次，之后按编号字典查找）
+    away_roster = Roster.load('away.txt')
+    home_roster = Roster.load('home.txt')
     
     # 初始化比分文件（使用默认值，实际值会在MY_GUI初始化时从VmixController获取并更新）
     # 这样可以避免重复读取配置文件，由VmixController统一管理配置
     scoreboard_content = f"主队,0,#3498DB\n客队,0,#E74C3C\n上半场"
-    FileManager.write_csv('scoreboard.csv', scoreboard_content, mode='w+')
+    FileManager.write_csv('scoreboard.csv', scoreboard_content)
     
     # 初始化所有数据文件（每次启动时刷新）
     csv_files_to_clear = [
@@ -114,8 +155,9 @@ SIZES = {
 # 超时时间配置（秒）
 TIMEOUTS = {
     'CONNECTION': 3,          # 连接超时
-    'HEARTBEAT': 0.5,         # 心跳检查超时
-    'CHECK_INTERVAL': 3000,   # 连接检查间隔（毫秒）
+    'HEARTBEAT': 2,           # 心跳应答超时
+    'HEARTBEAT_INTERVAL': 1,  # 心跳发送间隔
+    'CHECK_INTERVAL': 1000,   # 连接状态刷新间隔（毫秒，只读取心跳结果，不访问网络）
 }
 
 # 延迟时间配置（秒）
@@ -128,10 +170,537 @@ DELAYS = {
 
 # UI更新间隔（毫秒）
 UI_UPDATE_INTERVALS = {
-    'COUNTDOWN': 50,    # 倒计时更新间隔
+    'COUNTDOWN': 50,    # 倒计时最短更新间隔
+    'COUNTDOWN_MAX': 200,  # 倒计时最长更新间隔（显示内容不变时放慢刷新）
     'CONNECTION_CHECK': 3000,  # 连接检查间隔
+    'UI_QUEUE': 30,     # 后台线程回调的轮询间隔
+    'PANEL_PREWARM': 300,  # 启动后空闲时逐个预先创建其余面板的间隔（0为不预先创建，第一次打开时再创建）
+}
+
+# 直连标题模式下各数据对应的GT标题字段名（字段名为空则不推送该字段）
+# 以 _color 结尾的字段使用 SetColor，其余使用 SetText
+TITLE_FIELDS = {
+    'scoreboard': {
+        'home_name': 'HomeName.Text',
+        'home_score': 'HomeScore.Text',
+        'home_color': '',
+        'away_name': 'AwayName.Text',
+        'away_score': 'AwayScore.Text',
+        'away_color': '',
+        'session': 'Session.Text',
+    },
+    'goal': {'team': 'Team.Text', 'number': 'Number.Text', 'name': 'Name.Text'},
+    'red_card': {'team': 'Team.Text', 'number': 'Number.Text', 'name': 'Name.Text'},
+    'yellow_card': {'team': 'Team.Text', 'number': 'Number.Text', 'name': 'Name.Text'},
+    'sub': {
+        'team': 'Team.Text',
+        'out_number': 'OutNumber.Text',
+        'out_name': 'OutName.Text',
+        'in_number': 'InNumber.Text',
+        'in_name': 'InName.Text',
+    },
+}
+
+# vMix数据源文件写入配置
+FILE_WRITES = {
+    'COALESCE_DELAY': 0.02,  # 合并写入的等待时间（秒），这段时间内的多次写入只写最后一次
+    'REPLACE_RETRIES': 5,    # 目标文件被占用时替换的重试次数
+    'RETRY_DELAY': 0.01,     # 替换重试间隔（秒）
+}
+
+# 共享比赛状态文件配置（内存映射，供其它本地程序读取）
+SHARED_STATE = {
+    'FILENAME': 'match_state.bin',
+}
+
+# 比赛事件日志配置
+JOURNAL = {
+    'FILENAME': 'match_journal.jsonl',  # 日志文件（exe所在目录）
+    'FSYNC_INTERVAL': 0.5,  # fsync合并间隔（秒），崩溃时最多丢失这段时间内的事件
+}
+
+# 状态推送服务配置（HTTP + WebSocket，供vMix浏览器输入中的HTML叠加层订阅）
+PUSH_SERVER = {
+    'HOST': '127.0.0.1',          # 默认只监听本机；其它电脑访问需在配置中改为0.0.0.0
+    'PORT': 8765,                 # 端口（配置中设为0则不启动）
+    'HANDSHAKE_TIMEOUT': 5,       # 等待HTTP请求头的超时（秒）
+    'MAX_FRAME': 65536,           # 客户端发来的单帧最大长度（字节）
+    'MAX_CLIENT_BUFFER': 1 << 20, # 单个客户端积压的待发送数据上限（字节），超过则断开
+}
+
+# 性能统计配置
+METRICS = {
+    'FRAME_BUDGET': 0.04,     # 一帧视频的时长（秒，25fps）：操作路径的耗时应低于该值
+    'WINDOW': 60,             # 滚动统计窗口（秒），百分位数反映最近一到两个窗口的数据
+    'FILENAME': 'metrics.json',  # 导出文件（exe所在目录）
+    'OPERATOR_PREFIXES': ('MY_GUI.', 'SubtitleButton.'),  # 属于操作路径（按钮处理）的统计名称前缀
+}
+
+# 日志配置（JSON Lines，后台线程写入，按大小轮转）
+LOGGING = {
+    'FILENAME': 'vmix_football.log',  # 日志文件（exe所在目录），轮转后为 .1 .2 ...
+    'MAX_BYTES': 5 * 1024 * 1024,     # 单个日志文件最大字节数
+    'BACKUP_COUNT': 5,                # 保留的历史日志文件数
+    'QUEUE_SIZE': 10000,              # 待写入记录上限，写入线程跟不上时丢弃新记录（计入 log.dropped）
+}
+
+# 启动配置
+STARTUP = {
+    'BUDGET': 0.8,  # 从启动exe到窗口可以操作的目标耗时（秒，包含单文件exe的解压）
+    'PROFILE_FILENAME': 'startup_profile.json',  # --profile-startup 写出的启动报告
+}
+
+# vMix自动重连配置（指数退避 + 随机抖动，避免多台电脑同时重连）
+RECONNECT = {
+    'BASE_DELAY': 0.5,   # 第一次重连前的等待时间（秒），之后每次翻倍
+    'MAX_DELAY': 30,     # 最长等待时间（秒）
+    'JITTER': 0.5,       # 随机抖动比例：实际等待时间为计算值的 (1-JITTER)~1 倍
+}
+
+# 离线命令队列配置（连接中断、自动重连期间发出的命令先暂存，重连后按顺序补发）
+OFFLINE_QUEUE = {
+    'MAX_COMMANDS': 200,  # 最多暂存的命令数，超出时丢弃最早的命令
+    'TTL': 10,            # 命令暂存超过该时间（秒）视为过期，重连后不再补发
+}
+
+# vMix TCP API 配置
+VMIX_API = {
+    'LATENCY_SAMPLES': 100,   # 保留的应答延迟样本数
+    'STATE_POLL_INTERVAL': 3, # 读取完整XML状态校准状态镜像的间隔（秒），实时变化由ACTS推送
+    'HEARTBEAT_QUERY': 'vmix/version',  # 心跳使用的XMLTEXT查询（vMix必须实际处理才能应答）
+    'HEARTBEAT_MAX_MISSES': 2,  # 连续多少次心跳超时判定vMix无响应并断开
+    'RTT_SAMPLES': 60,        # 保留的心跳往返时间样本数
+    'DEGRADED_RTT': 0.25,     # 心跳往返时间超过该值（秒）视为响应慢
+    'KEEPALIVE_IDLE': 5,      # TCP keepalive：空闲多久开始探测（秒）
+    'KEEPALIVE_INTERVAL': 1,  # TCP keepalive：探测间隔（秒）
+    'KEEPALIVE_COUNT': 3,     # TCP keepalive：连续多少次探测失败由系统断开
 }
 
+# ============ 日志 ============
+log = logging.getLogger('vmfc')
+
+
+class MatchClock:
+    """比赛时钟：当前场次及该场次开始后经过的时间（单调时钟，不受系统改时间影响）
+    场次切换（上半场/下半场等）时重新计时，日志中的每条记录都带上该时钟
+    """
+
+    _shared = None
+
+    def __init__(self, session="上半场"):
+        self.session = session
+        self.started_at = time.monotonic()
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def start(self, session):
+        """切换场次（场次不变时继续计时）"""
+        if session != self.session:
+            self.session = session
+            self.started_at = time.monotonic()
+
+    def now(self):
+        """返回 (场次, 已进行秒数)"""
+        return self.session, time.monotonic() - self.started_at
+
+    @staticmethod
+    def format(elapsed):
+        minutes, seconds = divmod(int(elapsed), 60)
+        return f"{minutes:02d}:{seconds:02d}"
+
+
+class _EnqueueHandler(logging.handlers.QueueHandler):
+    """热路径只做入队：记下比赛时钟，格式化和写文件都在后台线程进行；队列满时丢弃并计数"""
+
+    def prepare(self, record):
+        record.session, record.match_time = MatchClock.shared().now()
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            Metrics.shared().count('log.dropped')
+
+
+class JsonLineFormatter(logging.Formatter):
+    """每条记录一行JSON（便于赛后用脚本分析）
+    字段：t（Unix秒）、time、session、clock（场次内 分:秒）、match_time、level、thread、msg，
+    以及通过 extra={'fields': {...}} 附加的结构化字段
+    """
+
+    def format(self, record):
+        entry = {
+            't': round(record.created, 3),
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'session': getattr(record, 'session', None),
+            'clock': MatchClock.format(getattr(record, 'match_time', 0)),
+            'match_time': round(getattr(record, 'match_time', 0), 3),
+            'level': record.levelname,
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+_log_listener = None
+
+
+def setup_logging(console=True):
+    """启动日志：记录进入队列，由后台线程写入轮转的JSON Lines文件，
+    有控制台时同时输出原来的文字（打包成无控制台exe时 sys.stdout 为 None）
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+    handlers = []
+    try:
+        file_handler = logging.handlers.RotatingFileHandler(
+            FileManager.get_file_path(LOGGING['FILENAME']), maxBytes=LOGGING['MAX_BYTES'],
+            backupCount=LOGGING['BACKUP_COUNT'], encoding='utf-8', delay=True)
+        file_handler.setFormatter(JsonLineFormatter())
+        handlers.append(file_handler)
+    except (IOError, OSError) as e:
+        file_error = e
+    else:
+        file_error = None
+    if console and sys.stdout is not None:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(logging.Formatter('%(message)s'))
+        handlers.append(console_handler)
+
+    log_queue = queue.Queue(LOGGING['QUEUE_SIZE'])
+    log.addHandler(_EnqueueHandler(log_queue))
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    _log_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(shutdown_logging)
+    if file_error:
+        log.error(f"✗ 无法创建日志文件 {LOGGING['FILENAME']}: {file_error}")
+
+
+def shutdown_logging():
+    """写完队列中剩余的记录并停止后台线程（退出时自动调用）"""
+    global _log_listener
+    if _log_listener is None:
+        return
+    _log_listener.stop()
+    for handler in _log_listener.handlers:
+        handler.close()
+    for handler in list(log.handlers):
+        log.removeHandler(handler)
+    _log_listener = None
+
+
+# ============ 性能统计 ============
+class Histogram:
+    """HDR风格的耗时直方图（以微秒分桶：2的幂分段、段内线性，相对误差约3%）
+    记录一次只是一次数组自增，开销固定，不保存原始样本；
+    分两段滚动：当前窗口满WINDOW秒后成为上一窗口，百分位数按这两个窗口合并计算
+    """
+
+    SUB_BITS = 6
+    HALF = 1 << (SUB_BITS - 1)
+    BUCKETS = 40 * HALF  # 可表示到约2^38微秒，超出的计入最后一个桶
+
+    def __init__(self, window=None):
+        self.window = window or METRICS['WINDOW']
+        self._lock = threading.Lock()
+        self._current = [0] * self.BUCKETS
+        self._previous = [0] * self.BUCKETS
+        self._window_start = time.monotonic()
+        self.count = 0  # 累计次数（不随窗口滚动）
+        self.total = 0.0  # 累计耗时（秒）
+        self.max = 0.0  # 累计最大耗时（秒）
+        self.over_budget = 0  # 累计超过一帧时长的次数
+
+    @classmethod
+    def _index(cls, micros):
+        if micros < 2 * cls.HALF:
+            return micros
+        shift = micros.bit_length() - cls.SUB_BITS
+        return min((shift << (cls.SUB_BITS - 1)) + (micros >> shift), cls.BUCKETS - 1)
+
+    @classmethod
+    def _value(cls, index):
+        """桶的代表值（微秒，取桶的中点）"""
+        if index < 2 * cls.HALF:
+            return index
+        shift = (index >> (cls.SUB_BITS - 1)) - 1
+        low = ((index & (cls.HALF - 1)) + cls.HALF) << shift
+        return low + (1 << shift) // 2
+
+    def record(self, seconds):
+        """记录一次耗时（秒）"""
+        index = self._index(int(seconds * 1e6)) if seconds > 0 else 0
+        now = time.monotonic()
+        with self._lock:
+            elapsed = now - self._window_start
+            if elapsed >= self.window:
+                self._previous = self._current if elapsed < 2 * self.window else [0] * self.BUCKETS
+                self._current = [0] * self.BUCKETS
+                self._window_start = now
+            self._current[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+            if seconds > METRICS['FRAME_BUDGET']:
+                self.over_budget += 1
+
+    def snapshot(self):
+        """统计结果（毫秒）：累计次数/平均/最大/超帧次数，以及最近窗口内的百分位数"""
+        with self._lock:
+            counts = [a + b for a, b in zip(self._current, self._previous)]
+            count, total, maximum, over_budget = self.count, self.total, self.max, self.over_budget
+        recent = sum(counts)
+        result = {
+            'count': count,
+            'recent': recent,
+            'mean_ms': round(total / count * 1000, 3) if count else 0.0,
+            'max_ms': round(maximum * 1000, 3),
+            'over_budget': over_budget,
+        }
+        percentiles = [('p50_ms', 0.5), ('p90_ms', 0.9), ('p99_ms', 0.99), ('p999_ms', 0.999)]
+        seen, position = 0, 0
+        for index, bucket in enumerate(counts):
+            if not bucket:
+                continue
+            seen += bucket
+            while position < len(percentiles) and seen >= percentiles[position][1] * recent:
+                result[percentiles[position][0]] = round(self._value(index) / 1000, 3)
+                position += 1
+            if position == len(percentiles):
+                break
+        for key, _ in percentiles[position:]:
+            result[key] = 0.0
+        return result
+
+
+class Metrics:
+    """性能统计：按名称保存耗时直方图和计数器（线程安全）
+    通过 timed 装饰器或 timer() 记录按钮处理、文件读写、vMix命令等热路径的耗时，
+    在诊断面板中查看或导出为JSON
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self.enabled = True
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    @classmethod
+    def shared(cls):
+        """全局共享的统计实例"""
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    def histogram(self, name):
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram())
+        return histogram
+
+    def record(self, name, seconds):
+        """记录一次耗时（秒）"""
+        if self.enabled:
+            self.histogram(name).record(seconds)
+
+    def count(self, name, amount=1):
+        """计数器加amount"""
+        if self.enabled:
+            with self._lock:
+                self._counters[name] = self._counters.get(name, 0) + amount
+
+    def timer(self, name):
+        """计时上下文：with metrics.timer('name'): ..."""
+        return _MetricTimer(self, name)
+
+    def reset(self):
+        """清空所有统计"""
+        with self._lock:
+            self._histograms = {}
+            self._counters = {}
+            self.started = time.time()
+
+    def snapshot(self):
+        """所有统计的快照（可直接序列化为JSON）"""
+        with self._lock:
+            histograms = dict(self._histograms)
+            counters = dict(self._counters)
+        return {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'uptime_s': round(time.time() - self.started, 1),
+            'frame_budget_ms': METRICS['FRAME_BUDGET'] * 1000,
+            'window_s': METRICS['WINDOW'],
+            'histograms': {name: histograms[name].snapshot() for name in sorted(histograms)},
+            'counters': counters,
+        }
+
+    def operator_path(self, snapshot=None):
+        """操作路径（界面按钮处理）中最慢的百分位数：{'p99_ms', 'max_ms', 'over_budget', 'name'}"""
+        snapshot = snapshot or self.snapshot()
+        worst = {'p99_ms': 0.0, 'max_ms': 0.0, 'over_budget': 0, 'name': ''}
+        for name, stats in snapshot['histograms'].items():
+            if not name.startswith(METRICS['OPERATOR_PREFIXES']):
+                continue
+            worst['over_budget'] += stats['over_budget']
+            worst['max_ms'] = max(worst['max_ms'], stats['max_ms'])
+            if stats['p99_ms'] >= worst['p99_ms']:
+                worst['p99_ms'], worst['name'] = stats['p99_ms'], name
+        return worst
+
+    def dump(self, filename=None):
+        """导出统计到JSON文件（exe所在目录），返回是否成功"""
+        filename = filename or METRICS['FILENAME']
+        snapshot = self.snapshot()
+        snapshot['operator_path'] = self.operator_path(snapshot)
+        if FileManager.write_json(filename, snapshot):
+            log.info(f"✓ 性能统计已导出到 {filename}")
+            return True
+        return False
+
+
+class _MetricTimer:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class StartupTimer:
+    """启动计时：记录从启动到窗口可以操作的各阶段耗时
+    report() 在窗口第一次空闲时调用，输出到日志并计入性能统计 startup.<阶段> 和 startup.total；
+    打包后的exe另外给出从进程启动到开始执行Python代码的耗时（单文件模式包含解压，仅Windows）
+    """
+
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self._last = self.started
+        self.phases = []
+        self.bootloader = self.bootloader_time()
+
+    def mark(self, phase, at=None):
+        """结束一个阶段（耗时从上一个阶段结束算起，at为结束时刻，默认为现在）"""
+        now = at if at is not None else time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    @staticmethod
+    def bootloader_time():
+        """打包后的exe从进程创建到开始导入本程序的秒数，取不到返回None"""
+        if not getattr(sys, 'frozen', False) or os.name != 'nt':
+            return None
+        import ctypes
+        from ctypes import wintypes
+        # 单文件模式由父进程（引导程序）解压后再启动本进程，从父进程的创建时间算起
+        onefile = os.path.basename(getattr(sys, '_MEIPASS', '')).startswith('_MEI')
+        pid = os.getppid() if onefile else os.getpid()
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return None
+        try:
+            times = [wintypes.FILETIME() for _ in range(4)]
+            if not kernel32.GetProcessTimes(handle, *(ctypes.byref(t) for t in times)):
+                return None
+        finally:
+            kernel32.CloseHandle(handle)
+        # FILETIME：1601年起的100纳秒数
+        created = ((times[0].dwHighDateTime << 32) | times[0].dwLowDateTime) / 1e7 - 11644473600
+        return max(0.0, _BOOT_WALL - created)
+
+    def report(self):
+        total = time.perf_counter() - self.started
+        metrics = Metrics.shared()
+        for phase, elapsed in self.phases:
+            metrics.record(f"startup.{phase}", elapsed)
+        metrics.record('startup.total', total)
+        detail = "，".join(f"{phase} {elapsed * 1000:.0f}ms" for phase, elapsed in self.phases)
+        if self.bootloader is not None:
+            metrics.record('startup.bootloader', self.bootloader)
+            detail = f"exe引导 {self.bootloader * 1000:.0f}ms，{detail}"
+        log.info(f"✓ 启动耗时 {total * 1000:.0f}ms（{detail}）",
+                 extra={'fields': {'startup_ms': {phase: round(elapsed * 1000, 1) for phase, elapsed in self.phases},
+                                   'startup_total_ms': round(total * 1000, 1)}})
+        return total
+
+    def profile(self):
+        """启动报告（--profile-startup 写出为JSON）：各阶段和各模块导入耗时，以及是否在启动预算内"""
+        total = time.perf_counter() - self.started
+        cold_start = total + (self.bootloader or 0.0)
+        imports = sorted(_IMPORT_TIMES.items(), key=lambda item: item[1], reverse=True)
+        return {
+            'frozen': 'onefile' if os.path.basename(getattr(sys, '_MEIPASS', '')).startswith('_MEI')
+                      else 'onedir' if getattr(sys, 'frozen', False) else 'script',
+            'bootloader_ms': round(self.bootloader * 1000, 1) if self.bootloader is not None else None,
+            'total_ms': round(total * 1000, 1),
+            'cold_start_ms': round(cold_start * 1000, 1),
+            'budget_ms': STARTUP['BUDGET'] * 1000,
+            'within_budget': cold_start <= STARTUP['BUDGET'],
+            'phases_ms': {phase: round(elapsed * 1000, 1) for phase, elapsed in self.phases},
+            'imports_ms': {name: round(elapsed * 1000, 1) for name, elapsed in imports if elapsed >= 0.0005},
+            'modules_loaded': len(sys.modules),
+        }
+
+    def save_profile(self):
+        profile = self.profile()
+        FileManager.write_json(STARTUP['PROFILE_FILENAME'], profile)
+        log.info(f"{'✓' if profile['within_budget'] else '✗'} 冷启动 {profile['cold_start_ms']:.0f}ms"
+                 f"（预算 {profile['budget_ms']:.0f}ms），报告已写入 {STARTUP['PROFILE_FILENAME']}")
+        return profile
+
+
+def timed(name=None):
+    """装饰器：把每次调用的耗时记录到性能统计（名称默认为函数的限定名，如 MY_GUI.goal_home_add）
+    用法：@timed 或 @timed('file.write_atomic')
+    """
+    def decorate(func):
+        metric = name or func.__qualname__
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                Metrics.shared().record(metric, time.perf_counter() - start)
+        return wrapper
+    
+    if callable(name):
+        func, name = name, None
+        return decorate(func)
+    return decorate
+
 # ============ 文件管理器类 ============
 class FileManager:
     """统一管理文件操作，解决路径硬编码问题
@@ -139,6 +708,10 @@ class FileManager:
     """
     
     _base_dir = None
+    _output_writer = None
+    _content_hashes = {}  # 文件名 -> 最近一次写入内容的哈希（内容相同的写入直接跳过）
+    _hash_lock = threading.Lock()
+    _write_stats = {'written': 0, 'skipped': 0, 'coalesced': 0, 'failed': 0}
     
     @classmethod
     def _get_base_dir(cls):
@@ -161,20 +734,74 @@ class FileManager:
         """获取文件的绝对路径（exe所在目录）"""
         return os.path.join(FileManager._get_base_dir(), filename)
     
+    @classmethod
+    def is_unchanged(cls, filename, content):
+        """内容与该文件最近一次写入的内容相同时返回True（计为跳过），否则记录新哈希"""
+        digest = hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest()
+        with cls._hash_lock:
+            if cls._content_hashes.get(filename) == digest:
+                cls._write_stats['skipped'] += 1
+                return True
+            cls._content_hashes[filename] = digest
+            return False
+    
+    @classmethod
+    def forget_content(cls, filename):
+        """写入失败时清除哈希，下次相同内容的写入不会被跳过"""
+        with cls._hash_lock:
+            cls._content_hashes.pop(filename, None)
+    
+    @classmethod
+    def count_write(cls, kind):
+        with cls._hash_lock:
+            cls._write_stats[kind] += 1
+    
+    @classmethod
+    def write_stats(cls):
+        """文件写入统计：written实际写入次数，skipped内容未变跳过次数，coalesced被合并的写入次数，
+        failed合并写入器后台写出失败的次数
+        """
+        with cls._hash_lock:
+            return dict(cls._write_stats)
+    
+    @classmethod
+    def output_writer(cls):
+        """获取vMix数据源文件的合并写入器（单例模式）"""
+        if cls._output_writer is None:
+            cls._output_writer = OutputFileWriter()
+        return cls._output_writer
+    
+    @staticmethod
+    def flush_outputs():
+        """立即写出所有等待合并写入的文件（退出前调用）"""
+        FileManager.output_writer().flush()
+    
     @staticmethod
+    @timed('file.write_csv')
     def write_csv(filename, content, mode='w'):
-        """通用CSV写入方法（始终写入到exe所在目录）"""
+        """通用CSV写入方法（始终写入到exe所在目录）
+        覆盖写入（mode='w'）交给合并写入器：短时间内的多次写入只写最后一次，
+        并且先写临时文件再替换，vMix轮询时不会读到空文件或只写了一半的文件。
+        此时返回True只表示已交给合并写入器，后台写出失败时记录日志并计入write_stats()的failed
+        """
+        if mode == 'w':
+            if FileManager.is_unchanged(filename, content):
+                return True
+            return FileManager.output_writer().write(filename, content)
+        FileManager.forget_content(filename)
         # CSV文件应该始终写入到exe所在目录，而不是资源目录
         filepath = os.path.join(FileManager._get_base_dir(), filename)
         try:
             with open(filepath, mode, encoding='utf-8') as f:
                 f.write(content)
+            FileManager.count_write('written')
             return True
         except (IOError, OSError, PermissionError) as e:
-            print(f"写入文件 {filename} 失败: {e}")
+            log.error(f"写入文件 {filename} 失败: {e}", extra={'fields': {'file': filename}})
             return False
     
     @staticmethod
+    @timed('file.read_csv')
     def read_csv(filename):
         """通用CSV读取方法（从exe所在目录读取）"""
         filepath = os.path.join(FileManager._get_base_dir(), filename)
@@ -182,10 +809,11 @@ class FileManager:
             with open(filepath, 'r', encoding='utf-8') as f:
                 return f.read()
         except (FileNotFoundError, IOError, OSError) as e:
-            print(f"读取文件 {filename} 失败: {e}")
+            log.error(f"读取文件 {filename} 失败: {e}", extra={'fields': {'file': filename}})
             return None
     
     @staticmethod
+    @timed('file.read_lines')
     def read_lines(filename):
         """读取文件所有行（从exe所在目录读取）"""
         filepath = os.path.join(FileManager._get_base_dir(), filename)
@@ -193,23 +821,34 @@ class FileManager:
             with open(filepath, 'r', encoding='utf-8') as f:
                 return [x.strip() for x in f.readlines()]
         except (FileNotFoundError, IOError, OSError) as e:
-            print(f"读取文件 {filename} 失败: {e}")
+            log.error(f"读取文件 {filename} 失败: {e}", extra={'fields': {'file': filename}})
             return []
     
     @staticmethod
+    @timed('file.write_json')
     def write_json(filename, data):
         """写入JSON文件（始终写入到exe所在目录）"""
         # JSON文件应该始终写入到exe所在目录，而不是资源目录
         filepath = os.path.join(FileManager._get_base_dir(), filename)
+        try:
+            content = json.dumps(data, indent=2, ensure_ascii=False)
+        except (ValueError, TypeError) as e:
+            log.error(f"写入JSON文件 {filename} 失败: {e}", extra={'fields': {'file': filename}})
+            return False
+        if FileManager.is_unchanged(filename, content):
+            return True
         try:
             with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+                f.write(content)
+            FileManager.count_write('written')
             return True
-        except (IOError, OSError, PermissionError, ValueError, TypeError) as e:
-            print(f"写入JSON文件 {filename} 失败: {e}")
+        except (IOError, OSError, PermissionError) as e:
+            FileManager.forget_content(filename)
+            log.error(f"写入JSON文件 {filename} 失败: {e}", extra={'fields': {'file': filename}})
             return False
     
     @staticmethod
+    @timed('file.read_json')
     def read_json(filename):
         """读取JSON文件（从exe所在目录读取）"""
         filepath = os.path.join(FileManager._get_base_dir(), filename)
@@ -217,22 +856,104 @@ class FileManager:
             with open(filepath, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except (FileNotFoundError, IOError, OSError, ValueError, json.JSONDecodeError) as e:
-            print(f"读取JSON文件 {filename} 失败: {e}")
+            log.error(f"读取JSON文件 {filename} 失败: {e}", extra={'fields': {'file': filename}})
             return None
     
     @staticmethod
     def clear_file(filename):
-        """清空文件内容（始终操作exe所在目录的文件）"""
-        # 文件应该始终在exe所在目录操作，而不是资源目录
+        """清空文件内容（始终操作exe所在目录的文件）
+        与write_csv共用合并写入器，避免等待中的旧内容在清空之后才写出
+        """
+        if FileManager.is_unchanged(filename, ''):
+            return True
+        return FileManager.output_writer().write(filename, '')
+    
+    @staticmethod
+    @timed('file.write_atomic')
+    def write_atomic(filename, content):
+        """原子写入：先写同目录下的临时文件并刷到磁盘，再替换目标文件"""
         filepath = os.path.join(FileManager._get_base_dir(), filename)
+        temp_path = filepath + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+        except (IOError, OSError, PermissionError) as e:
+            FileManager.forget_content(filename)
+            log.error(f"写入文件 {filename} 失败: {e}", extra={'fields': {'file': filename}})
+            return False
+        
+        # Windows上目标文件正被vMix读取时替换可能失败，稍等后重试
+        for attempt in range(FILE_WRITES['REPLACE_RETRIES']):
+            try:
+                os.replace(temp_path, filepath)
+                FileManager.count_write('written')
+                return True
+            except PermissionError:
+                time.sleep(FILE_WRITES['RETRY_DELAY'])
+            except OSError as e:
+                log.error(f"替换文件 {filename} 失败: {e}", extra={'fields': {'file': filename}})
+                break
+        
+        # 无法替换时退回直接覆盖写入，保证内容不丢失
+        log.warning(f"✗ {filename} 无法原子替换，改为直接写入")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
         try:
             with open(filepath, 'w', encoding='utf-8') as f:
-                f.write('')
+                f.write(content)
+            FileManager.count_write('written')
             return True
         except (IOError, OSError, PermissionError) as e:
-            print(f"清空文件 {filename} 失败: {e}")
+            FileManager.forget_content(filename)
+            log.error(f"写入文件 {filename} 失败: {e}", extra={'fields': {'file': filename}})
             return False
 
+
+class OutputFileWriter:
+    """vMix数据源文件的合并写入器
+    每个文件只保留最新内容并标记为待写（dirty），第一次标记时安排一次后台写出，
+    COALESCE_DELAY内对同一文件的多次写入（如连续修改比分）合并为一次原子写入
+    """
+    
+    def __init__(self, delay=None, scheduler=None):
+        self.delay = FILE_WRITES['COALESCE_DELAY'] if delay is None else delay
+        self._scheduler = scheduler
+        self._dirty = {}  # 文件名 -> 等待写出的最新内容
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # 保证各次写出按顺序进行
+        self._flush_task = None
+    
+    @property
+    def scheduler(self):
+        if self._scheduler is None:
+            self._scheduler = TaskScheduler.shared()
+        return self._scheduler
+    
+    def write(self, filename, content):
+        """记录文件的最新内容，稍后由后台写出（写出失败计入FileManager.write_stats()的failed）"""
+        with self._lock:
+            if filename in self._dirty:
+                FileManager.count_write('coalesced')
+            self._dirty[filename] = content
+            if self._flush_task is None:
+                self._flush_task = self.scheduler.call_later(self.delay, self.flush)
+        return True
+    
+    def flush(self):
+        """写出所有待写文件（调度线程定时调用，退出前也可直接调用）"""
+        with self._write_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, {}
+                self.scheduler.cancel(self._flush_task)
+                self._flush_task = None
+            for filename, content in dirty.items():
+                if not FileManager.write_atomic(filename, content):
+                    FileManager.count_write('failed')
+
 # ============ 工具函数 ============
 def get_contrast_text_color(bg_color):
     """
@@ -287,121 +1008,1752 @@ def get_contrast_text_color(bg_color):
             return COLORS['text_light']  # 浅色文字
     except (ValueError, IndexError, AttributeError, TypeError) as e:
         # 如果解析失败，默认返回浅色文字
-        print(f"颜色解析失败: {bg_color}, 错误: {e}")
+        log.warning(f"颜色解析失败: {bg_color}, 错误: {e}")
         return COLORS['text_light']
 
-# ============ vMix连接管理类 ============
-class VmixController:
-    def __init__(self):
-        self.config_file = "config.json"  # 统一配置文件
-        
-        # 默认配置
-        self.host = "127.0.0.1"
-        self.port = 8099
-        self.connected = False
-        self.socket = None
-        
-        # 球队配置（合并到统一配置文件）
-        self.team_name_home = "主队"  # 默认主队名称
-        self.team_name_away = "客队"  # 默认客队名称
-        self.team_home_color = "#3498DB"  # 默认主队颜色
-        self.team_away_color = "#E74C3C"  # 默认客队颜色
-        
-        # 配置项
-        self.red_card_input = "1"
-        self.red_card_layer = "0"
-        self.red_card_delay = 8  # 红牌自动下字幕延迟（秒）
-        
-        self.yellow_card_input = "1"
-        self.yellow_card_layer = "1"
-        self.yellow_card_delay = 8  # 黄牌自动下字幕延迟（秒）
-        
-        self.sub_input = "2"
-        self.sub_layer = "0"
-        self.sub_delay = 5  # 换人自动下字幕延迟（秒）
-        
-        self.goal_input = "3"
-        self.goal_layer = "0"
-        self.goal_delay = 8  # 进球自动下字幕延迟（秒）
-        
-        self.hide_timers = {}  # 存储自动下字幕的定时器
-        
-        # 加载配置
-        self.load_config()
+# ============ 球队名单 ============
+class PlayerRecord(namedtuple('PlayerRecord', ['number', 'name', 'position', 'squad', 'fields', 'info'])):
+    """球员记录（名单文件中的一行，解析一次后各处共用）
+    number/name/position: 编号、姓名、位置（名单行第3列，可选）
+    squad: 所属分组（名单中的[分组名]标题行，没有则为空）
+    fields: 行内全部字段；info: "编号,姓名"，用于显示和写入CSV
+    """
+    __slots__ = ()
     
-    def connect(self):
-        """连接到vMix"""
-        try:
-            if self.socket:
-                try:
-                    self.socket.close()
-                except (OSError, socket.error):
-                    pass
-            
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.settimeout(TIMEOUTS['CONNECTION'])
-            self.socket.connect((self.host, self.port))
-            self.connected = True
-            print(f"✓ 成功连接到 vMix {self.host}:{self.port}")
-            return True
-        except (socket.timeout, socket.error, OSError, ConnectionRefusedError) as e:
-            self.connected = False
-            self.socket = None
-            print(f"✗ vMix连接失败: {e}")
-            return False
+    def __str__(self):
+        return self.info
+
+
+class Roster:
+    """球队名单索引：编号 -> 球员记录（字典查找，不再逐行扫描）
+    名单文件每行"编号,姓名[,位置,...]"，可用"[分组名]"标题行把名单分成多个分组
+    （如一线队/预备队、青少年赛事的各年龄组），编号在各分组内查找
+    """
     
-    def disconnect(self):
-        """断开连接"""
-        # 取消所有正在运行的定时器（避免资源泄漏）
-        for subtitle_type, timer in list(self.hide_timers.items()):
-            try:
-                timer.cancel()
-            except (AttributeError, RuntimeError):
-                pass
-        self.hide_timers.clear()
-        
-        if self.socket:
-            try:
-                self.socket.close()
-            except (OSError, socket.error):
-                pass
-        self.socket = None
-        self.connected = False
-        print("✓ 已断开 vMix 连接")
+    def __init__(self, lines=()):
+        self.players = []  # 全部球员记录（按文件顺序）
+        self.squads = {}  # 分组名 -> {编号: 球员记录}
+        self.active_squad = None
+        self._parse(lines)
     
-    def send_command(self, command):
-        """发送命令到vMix"""
-        if not self.connected or not self.socket:
-            return False
-        
-        try:
-            full_command = f"FUNCTION {command}\r\n"
-            self.socket.send(full_command.encode('utf-8'))
+    @classmethod
+    def load(cls, filename):
+        """从名单文件加载"""
+        return cls(FileManager.read_lines(filename))
+    
+    @staticmethod
+    def normalize_number(number):
+        """统一编号格式（去除空格和前导0，"07"和"7"视为同一编号）"""
+        number = str(number).strip()
+        if number.isdigit():
+            return str(int(number))
+        return number
+    
+    def _parse(self, lines):
+        squad = ""
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('[') and line.endswith(']'):
+                squad = line[1:-1].strip()
+                continue
+            fields = tuple(x.strip() for x in line.split(','))
+            if len(fields) < 2 or not fields[0]:
+                continue
+            number = self.normalize_number(fields[0])
+            position = fields[2] if len(fields) > 2 else ""
+            record = PlayerRecord(number, fields[1], position, squad, fields, f"{fields[0]},{fields[1]}")
+            players = self.squads.setdefault(squad, {})
+            if number in players:
+                log.warning(f"✗ 名单编号重复: {squad + ' ' if squad else ''}{number}（保留第一条）")
+                continue
+            players[number] = record
+            self.players.append(record)
+        if self.squads:
+            self.active_squad = next(iter(self.squads))
+    
+    def set_squad(self, squad):
+        """切换当前分组（分组不存在时保持不变），返回是否切换成功"""
+        if squad in self.squads:
+            self.active_squad = squad
             return True
-        except (OSError, socket.error, BrokenPipeError, ConnectionResetError) as e:
-            print(f"✗ 发送命令失败: {e}")
-            self.connected = False
-            return False
+        return False
     
-    def overlay_on(self, input_num, layer_num="0"):
-        """打开字幕叠加"""
-        command = f"OverlayInput{layer_num} Input={input_num}"
-        return self.send_command(command)
+    def get(self, number, squad=None):
+        """按编号查找当前分组（或指定分组）的球员，找不到返回None"""
+        players = self.squads.get(self.active_squad if squad is None else squad)
+        if not players:
+            return None
+        return players.get(self.normalize_number(number))
     
-    def overlay_off(self, layer_num="0"):
-        """关闭字幕叠加"""
-        command = f"OverlayInput{layer_num}Off"
-        return self.send_command(command)
+    def record_for(self, number, name):
+        """按编号和姓名取球员记录（用于重放日志）：名单中编号和姓名一致则返回名单记录，否则按记录内容新建"""
+        record = self.get(number)
+        if record is not None and record.name == name:
+            return record
+        number = str(number).strip()
+        return PlayerRecord(self.normalize_number(number), name, "", self.active_squad or "",
+                            (number, name), f"{number},{name}")
     
-    def show_subtitle(self, subtitle_type):
-        """显示字幕并自动下字幕"""
-        # 取消之前的自动下字幕定时器
-        if subtitle_type in self.hide_timers:
+    def active_players(self):
+        """当前分组的球员记录（按文件顺序）"""
+        return list(self.squads.get(self.active_squad, {}).values())
+    
+    def __len__(self):
+        return len(self.players)
+
+
+# ============ 延时任务调度器 ============
+class ScheduledTask:
+    """调度器中的一个延时任务（由TaskScheduler创建）"""
+    __slots__ = ('deadline', 'callback', 'args', 'cancelled', 'generation')
+
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline  # time.monotonic() 时间点
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self.generation = 0  # 每次重新调度加1，使堆中的旧条目失效
+
+    def cancel(self):
+        """取消任务（已在执行中的回调不受影响）"""
+        self.cancelled = True
+
+
+class TaskScheduler:
+    """单线程延时任务调度器（最小堆）
+    自动下字幕、重连、心跳等延时任务共用一个线程，截止时间基于time.monotonic
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self._heap = []  # (deadline, seq, generation, task)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="task-scheduler", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def shared(cls):
+        """获取共享的调度器（单例模式）"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def call_later(self, delay, callback, *args):
+        """delay秒后在调度线程中执行callback(*args)，返回ScheduledTask"""
+        task = ScheduledTask(time.monotonic() + delay, callback, args)
+        self._push(task)
+        return task
+
+    def reschedule(self, task, delay):
+        """把任务的截止时间改为delay秒之后（已执行或已取消的一次性任务会被重新启用）"""
+        with self._cond:
+            task.cancelled = False
+            task.generation += 1
+            task.deadline = time.monotonic() + delay
+            self._push_locked(task)
+        return task
+
+    def cancel(self, task):
+        """取消任务"""
+        if task is not None:
+            task.cancel()
+
+    def _push(self, task):
+        with self._cond:
+            self._push_locked(task)
+
+    def _push_locked(self, task):
+        self._seq += 1
+        heapq.heappush(self._heap, (task.deadline, self._seq, task.generation, task))
+        self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    deadline, seq, generation, task = self._heap[0]
+                    if task.cancelled or generation != task.generation:
+                        heapq.heappop(self._heap)  # 已取消或已重新调度的旧条目
+                        continue
+                    wait_time = deadline - time.monotonic()
+                    if wait_time > 0:
+                        self._cond.wait(wait_time)
+                        continue
+                    heapq.heappop(self._heap)
+                    break
+
             try:
-                self.hide_timers[subtitle_type].cancel()
-            except (AttributeError, RuntimeError):
-                pass
+                task.callback(*task.args)
+            except Exception as e:
+                log.error(f"✗ 定时任务执行失败: {e}", exc_info=True)
+
+# ============ 比赛事件日志 ============
+class MatchState:
+    """重放比赛事件日志得到的比赛状态"""
+    
+    def __init__(self):
+        self.records = {}  # (kind, team) -> 记录列表（add事件）
+        self.selected = {}  # (kind, team) -> 当前选中的记录索引
+        self.outputs = {}  # CSV文件名 -> (team, add事件)，即该文件最后写入的内容
+        self.scoreboard = None  # 最后一次记分板事件
+        self.event_count = 0
+
+
+class MatchJournal:
+    """比赛事件日志（JSON Lines，只追加）
+    每次添加/选择/删除/清空记录以及比分、场次变化都追加一行事件，
+    fsync批量进行：FSYNC_INTERVAL内的事件合并为一次fsync。
+    正常退出时写入session_end标记；启动时若日志没有该标记（崩溃或被强制结束），
+    则一次性重放日志恢复记分板和换人/红黄牌/进球记录。
+    """
+    
+    # 各类记录对应的CSV文件
+    CSV_FILES = {
+        'sub': ('substitutions.csv',),
+        'card': ('red_card.csv', 'yellow_card.csv'),
+        'goal': ('goal.csv',),
+    }
+    
+    def __init__(self, filename=None, scheduler=None):
+        self.filename = filename or JOURNAL['FILENAME']
+        self.path = FileManager.get_file_path(self.filename)
+        self.scheduler = scheduler or TaskScheduler.shared()
+        self._file = None
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._sync_task = None  # 等待中的fsync任务
+        self._torn_tail = False  # 恢复的日志最后一行不完整（续写前需先换行）
+    
+    def open(self, resume=False):
+        """打开日志。resume为True时在恢复的日志后继续追加，否则把上一场日志改名保留后新建"""
+        try:
+            if not resume and os.path.exists(self.path):
+                os.replace(self.path, self.path + '.prev')
+            self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+            if resume and self._torn_tail:
+                self._file.write('\n')
+        except (IOError, OSError, PermissionError) as e:
+            log.error(f"✗ 无法打开比赛日志 {self.filename}: {e}")
+            self._file = None
+            return False
+        self.record('session_start', resume=resume)
+        return True
+    
+    def record(self, event_type, **data):
+        """追加一条事件（日志未打开时忽略）"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._seq += 1
+            event = {'seq': self._seq, 't': round(time.time(), 3), 'type': event_type}
+            event.update(data)
+            try:
+                self._file.write(json.dumps(event, ensure_ascii=False) + '\n')
+            except (IOError, OSError, ValueError) as e:
+                log.error(f"✗ 写入比赛日志失败: {e}")
+                return
+            if self._sync_task is None:
+                self._sync_task = self.scheduler.call_later(JOURNAL['FSYNC_INTERVAL'], self.sync)
+    
+    def sync(self):
+        """把已写入的事件刷到磁盘"""
+        with self._lock:
+            self._sync_task = None
+            if self._file is None:
+                return
+            try:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except (IOError, OSError, ValueError) as e:
+                log.error(f"✗ 比赛日志同步失败: {e}")
+    
+    def close(self):
+        """正常结束：写入session_end标记并关闭日志"""
+        self.record('session_end')
+        with self._lock:
+            self.scheduler.cancel(self._sync_task)
+            self._sync_task = None
+        self.sync()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+    
+    def load_unfinished(self):
+        """读取上次没有正常结束的日志，返回事件列表；日志不存在或已正常结束返回None"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return None
+        except (IOError, OSError) as e:
+            log.error(f"✗ 读取比赛日志失败: {e}")
+            return None
+        
+        self._torn_tail = bool(lines) and not lines[-1].endswith('\n')
+        events = []
+        for line in lines:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                # 崩溃时最后一行可能只写了一半
+                continue
+        if not events or events[-1].get('type') == 'session_end':
+            return None
+        self._seq = max(event.get('seq', 0) for event in events)
+        return events
+    
+    @classmethod
+    def csv_file(cls, event):
+        """add事件对应的CSV文件"""
+        if event['kind'] == 'card':
+            return 'red_card.csv' if event.get('card') == "红牌" else 'yellow_card.csv'
+        return cls.CSV_FILES[event['kind']][0]
+    
+    @classmethod
+    def replay(cls, events):
+        """单次遍历事件，得到最终比赛状态（只计算状态，不触碰界面）"""
+        state = MatchState()
+        for event in events:
+            event_type = event.get('type')
+            kind, team = event.get('kind'), event.get('team')
+            key = (kind, team)
+            records = state.records.setdefault(key, []) if kind in cls.CSV_FILES else None
+            index = event.get('index')
+            
+            if event_type == 'add' and records is not None:
+                records.append(event)
+                state.outputs[cls.csv_file(event)] = (team, event)
+            elif event_type == 'select' and records is not None:
+                if not (isinstance(index, int) and 0 <= index < len(records)):
+                    continue
+                # 两队中同时只有一个卡片被选中
+                for other_key in list(state.selected):
+                    if other_key[0] == kind:
+                        del state.selected[other_key]
+                state.selected[key] = index
+                state.outputs[cls.csv_file(records[index])] = (team, records[index])
+            elif event_type == 'delete' and records is not None:
+                if not (isinstance(index, int) and 0 <= index < len(records)):
+                    continue
+                del records[index]
+                selected = state.selected.get(key)
+                if selected == index:
+                    del state.selected[key]
+                elif selected is not None and selected > index:
+                    state.selected[key] = selected - 1
+            elif event_type == 'clear' and records is not None:
+                records.clear()
+                state.selected.pop(key, None)
+                for filename in cls.CSV_FILES[kind]:
+                    state.outputs[filename] = None
+            elif event_type == 'scoreboard':
+                state.scoreboard = event
+            else:
+                continue
+            state.event_count += 1
+        return state
+
+
+# ============ 共享比赛状态文件 ============
+class SharedMatchState:
+    """内存映射的比赛状态文件（固定布局，供其它本地程序零拷贝读取）
+    布局（小端）：
+      0    头部   4s magic "VMFC" | H 布局版本 | H 保留 | I 版本计数(seq) | I 保留 | d 更新时间(Unix秒)
+      24   记分板 i 主队比分 | i 客队比分 | 32s 场次 | 64s 主队名称 | 64s 客队名称 | 8s 主队颜色 | 8s 客队颜色
+      208  最后事件 goal / red_card / yellow_card / sub 各一段：
+           I 事件计数 | d 事件时间 | 64s 球队 | 8s 编号 | 64s 姓名 | 8s 编号2 | 64s 姓名2（换人时为换上球员）
+    字符串为UTF-8，不足补0。写入采用seqlock：写前seq加1为奇数，写完再加1为偶数；
+    读取方先读seq（奇数则重读），复制数据后再读seq，两次相同才说明没有读到写了一半的数据
+    """
+    
+    MAGIC = b"VMFC"
+    LAYOUT_VERSION = 1
+    FILE_SIZE = 4096
+    HEADER = struct.Struct('<4sHHIId')
+    SCOREBOARD = struct.Struct('<ii32s64s64s8s8s')
+    EVENT = struct.Struct('<Id64s8s64s8s64s')
+    SEQ_OFFSET = 8
+    SCOREBOARD_OFFSET = HEADER.size
+    EVENT_OFFSET = SCOREBOARD_OFFSET + SCOREBOARD.size
+    EVENT_TYPES = ('goal', 'red_card', 'yellow_card', 'sub')
+    
+    def __init__(self, filename=None):
+        self.filename = filename or SHARED_STATE['FILENAME']
+        self.path = FileManager.get_file_path(self.filename)
+        self._lock = threading.Lock()
+        self._file = None
+        self._map = None
+        self._seq = 0
+        self._event_counts = dict.fromkeys(self.EVENT_TYPES, 0)
+    
+    def open(self):
+        """创建（或重置）状态文件并映射到内存"""
+        try:
+            self._file = open(self.path, 'w+b')
+            self._file.truncate(self.FILE_SIZE)
+            self._map = mmap.mmap(self._file.fileno(), self.FILE_SIZE)
+        except (IOError, OSError, ValueError) as e:
+            log.error(f"✗ 无法创建共享状态文件 {self.filename}: {e}")
+            self.close()
+            return False
+        self.HEADER.pack_into(self._map, 0, self.MAGIC, self.LAYOUT_VERSION, 0, 0, 0, time.time())
+        return True
+    
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+    
+    @staticmethod
+    def _text(value, size):
+        """编码为定长UTF-8（超长时按字符截断，不截断半个汉字）"""
+        data = str(value).encode('utf-8')
+        if len(data) > size:
+            data = data[:size].decode('utf-8', 'ignore').encode('utf-8')
+        return data
+    
+    def _write(self, struct_def, offset, *values):
+        """seqlock写入：seq为奇数期间读取方会重读"""
+        with self._lock:
+            self._write_locked(struct_def, offset, *values)
+    
+    def _write_locked(self, struct_def, offset, *values):
+        """同_write（调用方持有_lock）"""
+        if self._map is None:
+            return
+        self._seq += 1
+        struct.pack_into('<I', self._map, self.SEQ_OFFSET, self._seq)
+        struct_def.pack_into(self._map, offset, *values)
+        struct.pack_into('<d', self._map, self.HEADER.size - 8, time.time())
+        self._seq += 1
+        struct.pack_into('<I', self._map, self.SEQ_OFFSET, self._seq)
+    
+    def update_scoreboard(self, home_score, away_score, session, home_name, away_name, home_color, away_color):
+        """更新记分板区域"""
+        self._write(self.SCOREBOARD, self.SCOREBOARD_OFFSET,
+                    int(home_score), int(away_score), self._text(session, 32),
+                    self._text(home_name, 64), self._text(away_name, 64),
+                    self._text(home_color, 8), self._text(away_color, 8))
+    
+    def update_event(self, event_type, team, number, name, number2="", name2=""):
+        """更新某类事件的最后一条（goal/red_card/yellow_card/sub）"""
+        if event_type not in self._event_counts:
+            return
+        offset = self.EVENT_OFFSET + self.EVENT_TYPES.index(event_type) * self.EVENT.size
+        # 计数和写入在同一把锁内，并发的同类事件不会丢失计数或以旧计数覆盖新记录
+        with self._lock:
+            self._event_counts[event_type] += 1
+            self._write_locked(self.EVENT, offset, self._event_counts[event_type], time.time(),
+                               self._text(team, 64), self._text(number, 8), self._text(name, 64),
+                               self._text(number2, 8), self._text(name2, 64))
+    
+    @classmethod
+    def read(cls, path=None, retries=100):
+        """读取状态文件（外部Python程序可直接使用），返回字典；文件无效返回None"""
+        path = path or FileManager.get_file_path(SHARED_STATE['FILENAME'])
+        try:
+            with open(path, 'rb') as f:
+                with mmap.mmap(f.fileno(), cls.FILE_SIZE, access=mmap.ACCESS_READ) as view:
+                    for _ in range(retries):
+                        seq = struct.unpack_from('<I', view, cls.SEQ_OFFSET)[0]
+                        if seq % 2:
+                            continue
+                        data = view[:cls.EVENT_OFFSET + len(cls.EVENT_TYPES) * cls.EVENT.size]
+                        if struct.unpack_from('<I', view, cls.SEQ_OFFSET)[0] == seq:
+                            break
+                    else:
+                        return None
+        except (IOError, OSError, ValueError):
+            return None
         
+        def text(raw):
+            return raw.rstrip(b'\0').decode('utf-8', 'ignore')
+        
+        magic, version, _, seq, _, updated = cls.HEADER.unpack_from(data, 0)
+        if magic != cls.MAGIC:
+            return None
+        home_score, away_score, session, home_name, away_name, home_color, away_color = \
+            cls.SCOREBOARD.unpack_from(data, cls.SCOREBOARD_OFFSET)
+        state = {
+            'version': version, 'seq': seq, 'updated': updated,
+            'home_score': home_score, 'away_score': away_score, 'session': text(session),
+            'home_name': text(home_name), 'away_name': text(away_name),
+            'home_color': text(home_color), 'away_color': text(away_color),
+        }
+        for i, event_type in enumerate(cls.EVENT_TYPES):
+            count, event_time, team, number, name, number2, name2 = \
+                cls.EVENT.unpack_from(data, cls.EVENT_OFFSET + i * cls.EVENT.size)
+            state[event_type] = {
+                'count': count, 'time': event_time, 'team': text(team),
+                'number': text(number), 'name': text(name),
+                'number2': text(number2), 'name2': text(name2),
+            }
+        return state
+
+
+# ============ vMix TCP传输层 ============
+# 单条命令的应答结果（latency 为发送到收到应答的耗时，单位秒）
+CommandResult = namedtuple('CommandResult', ['command', 'ok', 'response', 'latency'])
+
+class AsyncLoopThread:
+    """后台asyncio事件循环线程（全局共享）
+    所有网络IO都在这个线程里执行，Tk主线程只负责提交任务和接收结果，不会被网络阻塞
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="asyncio-loop", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def shared(cls):
+        """获取共享的事件循环线程（单例模式）"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro):
+        """在事件循环中执行协程，返回concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, callback, *args):
+        """线程安全地在事件循环中执行回调"""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+
+class VmixTransport:
+    """vMix TCP API 管线化传输通道（运行在后台asyncio事件循环中）
+    写协程按顺序发送命令，读协程按FIFO顺序把 FUNCTION OK/ER 应答匹配回对应命令，
+    每条命令返回一个Future，可以连续发送多条命令而无需等待上一条的应答。
+    心跳协程定期发送XMLTEXT查询并统计往返时间：vMix卡死或TCP半开时socket本身不会报错，
+    只有应用层的应答才能证明vMix还在处理命令。
+    指定mirror（VmixStateMirror）时订阅ACTS推送并定期读取XML状态，保持镜像与vMix一致
+    """
+
+    def __init__(self, host, port, loop_thread=None, on_lost=None, mirror=None, on_undelivered=None):
+        self.host = host
+        self.port = port
+        self.loop_thread = loop_thread or AsyncLoopThread.shared()
+        self.on_lost = on_lost  # 连接异常断开时的回调 on_lost(transport, error)（在事件循环线程中调用）
+        # 因连接断开未送达的FUNCTION命令交给 on_undelivered(transport, items, error, front)（在事件循环线程中调用），
+        # items为[(future, command), ...]，front表示这些命令是在断开前提交的（已发送未应答或还在发送队列中）；
+        # 未指定时以异常结束
+        self.on_undelivered = on_undelivered
+        self.mirror = mirror
+        self.socket = None
+        self.connected = False
+
+        # 以下成员只在事件循环线程中访问
+        self._reader = None
+        self._writer = None
+        self._send_queue = None
+        self._pending = deque()  # 已发送、等待应答的命令：(future, command, verb, sent_at)
+        self._tasks = []
+
+        # 应答延迟统计
+        self.latencies = deque(maxlen=VMIX_API['LATENCY_SAMPLES'])
+        self.last_latency = None
+
+        # 心跳状态
+        self.rtts = deque(maxlen=VMIX_API['RTT_SAMPLES'])
+        self.heartbeat_misses = 0  # 连续超时次数
+        self.degraded = False  # 最近一次心跳超时或往返时间过长
+
+    def connect(self):
+        """阻塞式连接（仅供非GUI线程使用，GUI请使用connect_async）"""
+        self.connect_async().result()
+
+    def connect_async(self):
+        """在后台发起连接，立即返回Future"""
+        return self.loop_thread.run(self._open())
+
+    def close(self):
+        """关闭连接（线程安全），未应答的命令按未送达处理（见on_undelivered）"""
+        self.connected = False
+        self.loop_thread.call_soon(self._close, ConnectionError("vMix连接已关闭"))
+
+    def submit_batch(self, items):
+        """提交一组命令（线程安全），items为[(future, command), ...]
+        同一批命令合并为一次socket写入，应答仍按顺序逐条完成对应的Future
+        """
+        self._submit([(future, command, "FUNCTION") for future, command in items])
+
+    def _submit(self, items):
+        """items为[(future, command, verb), ...]
+        连接状态只在事件循环线程中判断：提交时恰好断开的命令和断开前的命令一样按未送达处理
+        """
+        self.loop_thread.call_soon(self._enqueue, items)
+
+    @property
+    def average_latency(self):
+        """最近样本的平均应答延迟（秒）"""
+        if not self.latencies:
+            return None
+        return sum(self.latencies) / len(self.latencies)
+
+    @property
+    def rtt_stats(self):
+        """心跳往返时间统计（秒）：{'last', 'avg', 'p95', 'max'}，没有样本时返回None"""
+        if not self.rtts:
+            return None
+        samples = sorted(self.rtts)
+        return {
+            'last': self.rtts[-1],
+            'avg': sum(samples) / len(samples),
+            'p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            'max': samples[-1],
+        }
+
+    async def _open(self):
+        """建立连接并启动读写协程"""
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port),
+                                                TIMEOUTS['CONNECTION'])
+        self._reader = reader
+        self._writer = writer
+        self.socket = writer.get_extra_info('socket')
+        # 关闭Nagle算法，连续的小命令立即发出，不等待上一包的ACK
+        try:
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except (OSError, AttributeError):
+            pass
+        self._enable_keepalive(self.socket)
+        self._send_queue = asyncio.Queue()
+        self.rtts.clear()
+        self.heartbeat_misses = 0
+        self.degraded = False
+        self.connected = True
+        self._tasks = [asyncio.ensure_future(self._writer_loop()),
+                       asyncio.ensure_future(self._reader_loop()),
+                       asyncio.ensure_future(self._heartbeat_loop())]
+        if self.mirror is not None:
+            self.mirror.attach(self)
+            self._tasks.append(asyncio.ensure_future(self._mirror_loop()))
+
+    @staticmethod
+    def _enable_keepalive(sock):
+        """开启TCP keepalive并缩短探测时间（网线拔掉、对端断电时由系统尽快断开连接）
+        各平台的选项不同，不支持的选项忽略
+        """
+        idle = VMIX_API['KEEPALIVE_IDLE']
+        interval = VMIX_API['KEEPALIVE_INTERVAL']
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            if hasattr(socket, 'SIO_KEEPALIVE_VALS'):
+                # Windows：(开关, 空闲时间ms, 探测间隔ms)，探测次数固定为10
+                sock.ioctl(socket.SIO_KEEPALIVE_VALS, (1, idle * 1000, interval * 1000))
+                return
+            if hasattr(socket, 'TCP_KEEPIDLE'):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle)
+            elif hasattr(socket, 'TCP_KEEPALIVE'):
+                # macOS
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, idle)
+            if hasattr(socket, 'TCP_KEEPINTVL'):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval)
+            if hasattr(socket, 'TCP_KEEPCNT'):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, VMIX_API['KEEPALIVE_COUNT'])
+        except (OSError, AttributeError, ValueError) as e:
+            log.error(f"✗ 设置TCP keepalive失败: {e}")
+
+    def _enqueue(self, items):
+        if not self.connected or self._send_queue is None:
+            self._undelivered(items, ConnectionError("vMix未连接"), front=False)
+            return
+        self._send_queue.put_nowait(items)
+
+    async def _writer_loop(self):
+        """写协程：按提交顺序发送命令，已排队的多批命令合并为一次写入"""
+        while True:
+            batch = await self._send_queue.get()
+            while not self._send_queue.empty():
+                batch.extend(self._send_queue.get_nowait())
+            # 先登记再发送，保证应答按FIFO顺序匹配
+            sent_at = time.perf_counter()
+            for future, command, verb in batch:
+                self._pending.append((future, command, verb, sent_at))
+            payload = "".join(f"{verb} {command}\r\n" if command else f"{verb}\r\n"
+                              for future, command, verb in batch)
+            try:
+                self._writer.write(payload.encode('utf-8'))
+                await self._writer.drain()
+            except (OSError, ConnectionError) as e:
+                log.error(f"✗ 发送命令失败: {e}")
+                self._on_connection_lost(e)
+                return
+
+    async def _reader_loop(self):
+        """读协程：解析应答行并按FIFO顺序完成对应的Future"""
+        while True:
+            try:
+                line = await self._reader.readuntil(b"\r\n")
+            except asyncio.IncompleteReadError:
+                self._on_connection_lost(ConnectionError("vMix关闭了连接"))
+                return
+            except (OSError, ConnectionError, asyncio.LimitOverrunError) as e:
+                self._on_connection_lost(e)
+                return
+            line = line[:-2].decode('utf-8', errors='replace')
+            if line.startswith("XML ") and self._pending and self._pending[0][2] == "XML":
+                # XML应答：首行为 "XML 数据长度"，之后是指定长度的XML数据
+                try:
+                    data = await self._reader.readexactly(int(line[4:]))
+                except ValueError:
+                    # 长度无效时无法确定XML数据在哪里结束，后续应答都无法对齐，只能断开重连
+                    self._on_connection_lost(ConnectionError(f"无效的XML应答: {line}"))
+                    return
+                except (asyncio.IncompleteReadError, OSError, ConnectionError) as e:
+                    self._on_connection_lost(e)
+                    return
+                self._complete(True, data)
+                continue
+            self._handle_line(line)
+
+    async def _mirror_loop(self):
+        """状态镜像协程：订阅ACTS推送，并定期读取完整XML状态校准镜像"""
+        self._enqueue([(Future(), "ACTS", "SUBSCRIBE")])
+        while True:
+            xml = Future()
+            self._enqueue([(xml, "", "XML")])
+            try:
+                xml_result = await asyncio.wait_for(asyncio.wrap_future(xml), TIMEOUTS['HEARTBEAT'])
+            except asyncio.TimeoutError:
+                # vMix无响应由心跳协程处理，这里等下一轮再读取
+                pass
+            except (ConnectionError, OSError):
+                return
+            else:
+                self.mirror.load_xml(xml_result.response)
+            await asyncio.sleep(VMIX_API['STATE_POLL_INTERVAL'])
+
+    async def _heartbeat_loop(self):
+        """心跳协程：定期发送XMLTEXT查询，统计往返时间；连续超时则判定vMix无响应并断开连接"""
+        while True:
+            await asyncio.sleep(TIMEOUTS['HEARTBEAT_INTERVAL'])
+            future = Future()
+            self._enqueue([(future, VMIX_API['HEARTBEAT_QUERY'], "XMLTEXT")])
+            try:
+                result = await asyncio.wait_for(asyncio.wrap_future(future), TIMEOUTS['HEARTBEAT'])
+            except asyncio.TimeoutError:
+                self.heartbeat_misses += 1
+                self.degraded = True
+                if self.heartbeat_misses >= VMIX_API['HEARTBEAT_MAX_MISSES']:
+                    self._on_connection_lost(ConnectionError(
+                        f"vMix心跳连续{self.heartbeat_misses}次无应答"))
+                    return
+                continue
+            except (ConnectionError, OSError):
+                return
+            self.heartbeat_misses = 0
+            self.rtts.append(result.latency)
+            self.degraded = result.latency > VMIX_API['DEGRADED_RTT']
+
+    def _handle_line(self, line):
+        """处理一行应答（格式：FUNCTION OK Completed / FUNCTION ER 错误信息 / XMLTEXT OK 内容）
+        首个单词与最早未应答命令的类型不同的行不对应任何命令：订阅的ACTS推送交给状态镜像，
+        其它（连接时的VERSION欢迎行等）直接忽略
+        """
+        parts = line.split(' ', 2)
+        if len(parts) < 2:
+            return
+        if not self._pending or parts[0] != self._pending[0][2]:
+            # 订阅的ACTS推送
+            if self.mirror is not None and parts[0] == "ACTS" and parts[1] == "OK" and len(parts) > 2:
+                self.mirror.apply_activator(parts[2])
+            return
+        self._complete(parts[1] == "OK", parts[2] if len(parts) > 2 else "")
+
+    def _complete(self, ok, response):
+        """用应答完成最早一条未应答的命令"""
+        future, command, verb, sent_at = self._pending.popleft()
+        latency = time.perf_counter() - sent_at
+        if verb == "FUNCTION":
+            self.latencies.append(latency)
+            self.last_latency = latency
+        if not future.done():
+            future.set_result(CommandResult(command, ok, response, latency))
+
+    def _on_connection_lost(self, error):
+        """连接异常断开"""
+        if not self.connected:
+            return
+        log.error(f"✗ vMix连接中断: {error}")
+        self._close(ConnectionError(str(error)))
+        if self.on_lost:
+            self.on_lost(self, error)
+
+    def _close(self, error):
+        """在事件循环线程中关闭连接"""
+        self.connected = False
+        if self.mirror is not None:
+            self.mirror.detach(self)
+        current = asyncio.current_task()
+        for task in self._tasks:
+            if task is not current:
+                task.cancel()
+        self._tasks = []
+        if self._writer:
+            try:
+                self._writer.close()
+            except (OSError, RuntimeError):
+                pass
+            self._writer = None
+        self._fail_pending(error)
+
+    def _fail_pending(self, error):
+        """结束所有等待中的命令（已发送未应答的在前，发送队列中的在后，保持提交顺序）"""
+        pending = [item[:3] for item in self._pending]
+        self._pending.clear()
+        while self._send_queue is not None and not self._send_queue.empty():
+            pending.extend(self._send_queue.get_nowait())
+        self._undelivered(pending, error, front=True)
+
+    def _undelivered(self, items, error, front):
+        """处理因连接断开未送达的命令：FUNCTION命令交给on_undelivered（如放回离线队列待重连后补发），
+        查询命令（心跳、XML等只对当前连接有意义）以异常结束
+        """
+        commands = []
+        for future, command, verb in items:
+            if future.done():
+                continue
+            if verb == "FUNCTION" and self.on_undelivered:
+                commands.append((future, command))
+            else:
+                future.set_exception(error)
+        if commands:
+            self.on_undelivered(self, commands, error, front)
+
+class VmixStateMirror:
+    """vMix状态镜像：缓存vMix实际的叠加层占用、主/预监，供字幕逻辑O(1)查询而无需往返vMix
+    数据来源：ACTS订阅推送（实时）+ 定期读取的完整XML状态（校准，防止推送遗漏）。
+    只在事件循环线程中写入；读取方（Tk主线程等）直接读取列表元素，无需加锁。
+    叠加层编号为1~OVERLAY_CHANNELS，值为None表示未知（未同步），0表示空
+    """
+
+    OVERLAY_CHANNELS = 8
+
+    def __init__(self):
+        self.owner = None  # 当前向镜像写入状态的传输通道
+        self.reset()
+
+    def reset(self):
+        """清空镜像（断开连接后状态未知）"""
+        self.synced = False
+        self.overlays = [None] * (self.OVERLAY_CHANNELS + 1)
+        self.changed_at = [0.0] * (self.OVERLAY_CHANNELS + 1)  # 各叠加层最近一次变化的时间（monotonic）
+        self.active = None
+        self.preview = None
+        self.input_numbers = {}  # 输入的key/标题 -> 编号
+        self.updated = None
+
+    def attach(self, transport):
+        """新的连接开始写入镜像"""
+        self.reset()
+        self.owner = transport
+
+    def detach(self, transport):
+        """连接关闭：只有当前写入方关闭时才清空（旧连接晚于新连接关闭时不影响新状态）"""
+        if self.owner is transport:
+            self.owner = None
+            self.reset()
+
+    def _set_overlay(self, channel, number):
+        if self.overlays[channel] != number:
+            self.overlays[channel] = number
+            self.changed_at[channel] = time.monotonic()
+
+    def apply_activator(self, text):
+        """ACTS推送，如 "Overlay1 3 1"（叠加层1打开输入3）、"Input 2 1"（输入2切到主监）"""
+        parts = text.split()
+        if len(parts) < 3 or not parts[1].isdigit():
+            return
+        name, number, on = parts[0], int(parts[1]), parts[2] == "1"
+        if name.startswith("Overlay") and name[7:].isdigit():
+            channel = int(name[7:])
+            if not 1 <= channel <= self.OVERLAY_CHANNELS:
+                return
+            if on:
+                self._set_overlay(channel, number)
+            elif self.overlays[channel] in (number, None):
+                self._set_overlay(channel, 0)
+        elif name == "Input" and on:
+            self.active = number
+        elif name == "InputPreview" and on:
+            self.preview = number
+
+    def load_xml(self, data):
+        """解析完整XML状态（增量解析：逐段喂给XMLPullParser，处理完的元素立即清除，不构建整棵树）"""
+        import xml.etree.ElementTree as ET
+        parser = ET.XMLPullParser(events=('end',))
+        overlays = [0] * (self.OVERLAY_CHANNELS + 1)
+        input_numbers = {}
+        active = preview = None
+        try:
+            for start in range(0, len(data), 65536):
+                parser.feed(data[start:start + 65536])
+                for _, element in parser.read_events():
+                    tag = element.tag
+                    if tag == 'input':
+                        number = int(element.get('number', 0))
+                        for name in (element.get('key'), element.get('title')):
+                            if name:
+                                input_numbers.setdefault(name, number)
+                        element.clear()
+                    elif tag == 'overlay':
+                        channel = int(element.get('number', 0))
+                        if 1 <= channel <= self.OVERLAY_CHANNELS and (element.text or "").strip().isdigit():
+                            overlays[channel] = int(element.text)
+                        element.clear()
+                    elif tag == 'active' and (element.text or "").isdigit():
+                        active = int(element.text)
+                    elif tag == 'preview' and (element.text or "").isdigit():
+                        preview = int(element.text)
+            parser.close()
+        except (ET.ParseError, ValueError) as e:
+            log.error(f"✗ 解析vMix状态XML失败: {e}")
+            return False
+        for channel in range(1, self.OVERLAY_CHANNELS + 1):
+            self._set_overlay(channel, overlays[channel])
+        self.input_numbers = input_numbers
+        self.active, self.preview = active, preview
+        self.synced = True
+        self.updated = time.time()
+        return True
+
+    def resolve_input(self, value):
+        """把配置中的输入（编号、key或标题）转换为编号，无法确定时返回None"""
+        value = str(value).strip()
+        if value.isdigit():
+            return int(value)
+        return self.input_numbers.get(value)
+
+    def overlay_input(self, channel):
+        """叠加层上当前的输入编号（0为空，None为未知）"""
+        channel = int(channel) if str(channel).isdigit() else -1
+        if not self.synced or not 1 <= channel <= self.OVERLAY_CHANNELS:
+            return None
+        return self.overlays[channel]
+
+    def is_on_overlay(self, input_value, channel, since=None):
+        """输入是否正在该叠加层上：True/False，无法确定时返回None
+        since（monotonic时间）：叠加层在此之后没有变化过则返回None（刚发出的命令可能还没有反映到镜像中）
+        """
+        current = self.overlay_input(channel)
+        number = self.resolve_input(input_value)
+        if current is None or number is None:
+            return None
+        if since is not None and self.changed_at[int(channel)] < since:
+            return None
+        return current == number
+
+class VmixTransaction:
+    """vMix命令事务：收集多条FUNCTION命令（SetText、OverlayInput等），提交时合并为一次socket写入
+    通过 VmixController.transaction() 创建，作为with语句使用；嵌套的事务会并入最外层事务
+    """
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.items = []  # [(future, command), ...]
+        self.depth = 0
+
+    def add(self, command):
+        """加入一条命令，返回Future（事务提交并收到应答后完成）"""
+        future = Future()
+        self.items.append((future, command))
+        return future
+
+    def commit(self):
+        """提交事务中的所有命令，返回是否已交给传输层发送"""
+        items, self.items = self.items, []
+        if not items:
+            return True
+        return self.controller._dispatch(items)
+
+    def rollback(self):
+        """放弃事务中尚未提交的命令"""
+        items, self.items = self.items, []
+        for future, command in items:
+            future.cancel()
+
+    def __enter__(self):
+        self.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.depth -= 1
+        if self.depth > 0:
+            return False
+        self.controller._local.transaction = None
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+def vmix_transaction(method):
+    """装饰器：方法执行期间发出的所有vMix命令合并为一个事务（要求实例有vmix属性）"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.vmix.transaction():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+# ============ 状态推送服务 ============
+class StatePushServer:
+    """内嵌的HTTP + WebSocket推送服务（运行在后台asyncio事件循环中）
+    GET /state  返回当前完整状态（JSON快照，供后加入的页面初始化）
+    GET /ws     WebSocket连接：连接后先收到一条snapshot，之后每次状态变化只推送变化的键（diff）
+    vMix浏览器输入中的HTML叠加层订阅后即可毫秒级更新，不必轮询CSV文件；多个客户端订阅不产生额外磁盘IO
+    """
+
+    WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+    def __init__(self, host=None, port=None, loop_thread=None):
+        self.host = host or PUSH_SERVER['HOST']
+        self.port = PUSH_SERVER['PORT'] if port is None else port
+        self.loop_thread = loop_thread or AsyncLoopThread.shared()
+        self._server = None
+        self._clients = set()  # 已完成握手的WebSocket连接（StreamWriter）
+        self._state = {}  # 只在事件循环线程中读写
+        self._seq = 0
+
+    def start(self):
+        """启动服务，返回是否成功（端口被占用等情况打印错误后返回False）"""
+        try:
+            self.loop_thread.run(self._start()).result(timeout=TIMEOUTS['CONNECTION'])
+        except Exception as e:
+            log.error(f"✗ 状态推送服务启动失败 {self.host}:{self.port}: {e}")
+            return False
+        log.info(f"✓ 状态推送服务已启动: http://{self.host}:{self.port}/state  ws://{self.host}:{self.port}/ws")
+        return True
+
+    async def _start(self):
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+
+    def stop(self):
+        """关闭服务和所有客户端连接"""
+        if self._server is None:
+            return
+        try:
+            self.loop_thread.run(self._stop()).result(timeout=TIMEOUTS['CONNECTION'])
+        except Exception as e:
+            log.error(f"✗ 关闭状态推送服务失败: {e}")
+
+    async def _stop(self):
+        server, self._server = self._server, None
+        server.close()
+        for writer in list(self._clients):
+            self._drop(writer, self._frame(b"", 0x8))
+        await server.wait_closed()
+
+    def update(self, **changes):
+        """线程安全地更新状态（可在Tk主线程调用），有变化的键会推送给所有WebSocket客户端"""
+        self.loop_thread.call_soon(self._apply, changes)
+
+    def _apply(self, changes):
+        diff = {key: value for key, value in changes.items() if self._state.get(key) != value}
+        if not diff:
+            return
+        self._state.update(diff)
+        self._seq += 1
+        self._broadcast({'type': 'diff', 'seq': self._seq, 'changes': diff})
+
+    def _snapshot(self):
+        return {'type': 'snapshot', 'seq': self._seq, 'state': self._state}
+
+    def _broadcast(self, message):
+        if not self._clients:
+            return
+        frame = self._frame(json.dumps(message, ensure_ascii=False).encode('utf-8'))
+        for writer in list(self._clients):
+            # 不等待drain：卡住的客户端积压超过上限时直接断开，不拖慢其它客户端
+            if writer.transport.get_write_buffer_size() > PUSH_SERVER['MAX_CLIENT_BUFFER']:
+                log.warning("✗ 推送客户端积压过多，已断开")
+                self._drop(writer)
+            else:
+                writer.write(frame)
+
+    def _drop(self, writer, last_frame=None):
+        self._clients.discard(writer)
+        try:
+            if last_frame:
+                writer.write(last_frame)
+            writer.close()
+        except (OSError, RuntimeError):
+            pass
+
+    @staticmethod
+    def _frame(payload, opcode=0x1):
+        """服务端发出的WebSocket帧（单帧、不加掩码）"""
+        header = bytearray([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header.append(length)
+        elif length < 65536:
+            header.append(126)
+            header += struct.pack('>H', length)
+        else:
+            header.append(127)
+            header += struct.pack('>Q', length)
+        return bytes(header) + payload
+
+    @staticmethod
+    async def _read_frame(reader):
+        """读取客户端发来的一帧，返回(opcode, payload)"""
+        first, second = await reader.readexactly(2)
+        opcode, length = first & 0x0F, second & 0x7F
+        if length == 126:
+            length = struct.unpack('>H', await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack('>Q', await reader.readexactly(8))[0]
+        if length > PUSH_SERVER['MAX_FRAME']:
+            raise ValueError(f"帧过大: {length}")
+        mask = await reader.readexactly(4) if second & 0x80 else None
+        payload = await reader.readexactly(length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return opcode, payload
+
+    async def _handle_client(self, reader, writer):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), PUSH_SERVER['HANDSHAKE_TIMEOUT'])
+            lines = head.decode('latin-1').split("\r\n")
+            method, path = (lines[0].split(" ") + ["", ""])[:2]
+            headers = {}
+            for line in lines[1:]:
+                name, sep, value = line.partition(":")
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+            path = path.split("?", 1)[0]
+
+            if method != "GET":
+                self._respond(writer, "405 Method Not Allowed", b"")
+            elif path == "/ws" and headers.get('upgrade', '').lower() == "websocket":
+                await self._serve_websocket(reader, writer, headers)
+                return
+            elif path == "/state":
+                body = json.dumps(self._snapshot(), ensure_ascii=False).encode('utf-8')
+                self._respond(writer, "200 OK", body, "application/json; charset=utf-8")
+            else:
+                self._respond(writer, "404 Not Found", b"GET /state | GET /ws (WebSocket)\n")
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                ConnectionError, ValueError):
+            pass
+        finally:
+            self._drop(writer)
+
+    @staticmethod
+    def _respond(writer, status, body, content_type="text/plain; charset=utf-8"):
+        writer.write((f"HTTP/1.1 {status}\r\n"
+                      f"Content-Type: {content_type}\r\n"
+                      f"Content-Length: {len(body)}\r\n"
+                      "Access-Control-Allow-Origin: *\r\n"
+                      "Cache-Control: no-store\r\n"
+                      "Connection: close\r\n\r\n").encode('latin-1') + body)
+
+    async def _serve_websocket(self, reader, writer, headers):
+        key = headers.get('sec-websocket-key')
+        if not key:
+            self._respond(writer, "400 Bad Request", b"")
+            return
+        accept = base64.b64encode(hashlib.sha1((key + self.WS_GUID).encode('ascii')).digest()).decode('ascii')
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\n"
+                      "Upgrade: websocket\r\n"
+                      "Connection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode('latin-1'))
+        # 快照和加入广播列表在同一次回调中完成，中间不会漏掉diff
+        writer.write(self._frame(json.dumps(self._snapshot(), ensure_ascii=False).encode('utf-8')))
+        self._clients.add(writer)
+        # 客户端只需要接收推送，这里只处理ping和close
+        while True:
+            opcode, payload = await self._read_frame(reader)
+            if opcode == 0x8:
+                self._drop(writer, self._frame(payload[:2], 0x8))
+                return
+            if opcode == 0x9:
+                writer.write(self._frame(payload, 0xA))
+
+# ============ vMix连接管理类 ============
+class VmixTarget:
+    """一台vMix（连接池中的一个目标）：独立的传输通道、状态镜像、自动重连、离线命令队列和统计
+    各目标之间互不等待：某台vMix变慢或断开只影响它自己的队列
+    """
+
+    def __init__(self, name, host, port, scheduler=None):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.scheduler = scheduler or TaskScheduler.shared()
+        self.transport = None  # 当前的TCP传输通道（VmixTransport）
+        self.mirror = VmixStateMirror()  # vMix实际状态（叠加层占用等），由传输通道在后台保持同步
+        
+        # 自动重连与离线命令队列
+        self.auto_reconnect = True  # 连接断开或连接失败后是否在后台自动重连（手动断开时关闭）
+        self.reconnecting = False  # 是否正在等待自动重连
+        self.reconnect_attempts = 0  # 本轮自动重连已尝试的次数
+        self.next_reconnect_at = None  # 下一次自动重连的时间（time.time()）
+        self._reconnect_task = None
+        self._connect_seq = 0  # 连接尝试序号（只采用最后一次发起的连接）
+        self._offline = deque()  # 离线命令：(future, command, queued_at)
+        self._offline_lock = threading.Lock()
+        self.offline_stats = {'queued': 0, 'replayed': 0, 'expired': 0, 'overflow': 0}
+        
+        # 命令统计：发送、vMix执行成功、vMix拒绝执行、未送达（断开、过期等）
+        self.stats = {'sent': 0, 'ok': 0, 'rejected': 0, 'failed': 0}
+    
+    def __repr__(self):
+        return f"VmixTarget({self.name!r}, {self.host}:{self.port})"
+    
+    @property
+    def connected(self):
+        """当前是否已连接"""
+        return self.transport is not None and self.transport.connected
+    
+    @property
+    def accepting(self):
+        """是否接收命令（已连接或连接刚断开，或正在自动重连、命令可进入离线队列）"""
+        return self.transport is not None or self.reconnecting
+    
+    @property
+    def socket(self):
+        """当前连接使用的socket（未连接时为None）"""
+        return self.transport.socket if self.connected else None
+    
+    @property
+    def last_latency(self):
+        """最近一条命令的应答延迟（秒）"""
+        return self.transport.last_latency if self.transport else None
+    
+    @property
+    def average_latency(self):
+        """最近样本的平均应答延迟（秒）"""
+        return self.transport.average_latency if self.transport else None
+    
+    @property
+    def link_state(self):
+        """链路状态：'ok' 正常 / 'degraded' 心跳超时或响应慢 / None 未连接"""
+        if not self.connected:
+            return None
+        return 'degraded' if self.transport.degraded else 'ok'
+    
+    @property
+    def rtt_stats(self):
+        """心跳往返时间统计（秒），见 VmixTransport.rtt_stats"""
+        return self.transport.rtt_stats if self.connected else None
+    
+    @property
+    def offline_count(self):
+        """离线队列中等待补发的命令数"""
+        return len(self._offline)
+    
+    def connect_async(self, callback=None):
+        """在后台连接，立即返回Future（结果为是否连接成功）
+        callback(ok) 在后台线程中调用；连接失败时（未手动断开）会在后台按指数退避自动重试
+        """
+        self.auto_reconnect = True
+        self.scheduler.cancel(self._reconnect_task)
+        self._reconnect_task = None
+        with self._offline_lock:
+            self._connect_seq += 1
+            seq = self._connect_seq
+            if self.transport:
+                self.transport.close()
+                self.transport = None
+        
+        transport = VmixTransport(self.host, self.port, on_lost=self._on_connection_lost, mirror=self.mirror,
+                                  on_undelivered=self._on_undelivered)
+        result = Future()
+        
+        def on_done(future):
+            try:
+                future.result()
+            except (asyncio.TimeoutError, socket.error, OSError, ConnectionRefusedError) as e:
+                log.error(f"✗ vMix[{self.name}]连接失败: {e}")
+                ok = False
+                if seq == self._connect_seq:
+                    self._schedule_reconnect()
+            else:
+                ok = self._on_connected(transport, seq)
+            result.set_result(ok)
+            if callback:
+                callback(ok)
+        
+        transport.connect_async().add_done_callback(on_done)
+        return result
+    
+    def _on_connected(self, transport, seq):
+        """连接成功：启用新连接并补发离线队列中未过期的命令，返回是否采用了该连接"""
+        with self._offline_lock:
+            if seq != self._connect_seq or not self.auto_reconnect:
+                # 期间又发起了新的连接或已手动断开
+                transport.close()
+                return False
+            lost = not transport.connected
+            if not lost:
+                self.transport = transport
+                self.reconnecting = False
+                self.reconnect_attempts = 0
+                self.next_reconnect_at = None
+                # 在锁内提交，保证补发的命令排在重连后新发出的命令之前
+                items = self._take_offline()
+                if items:
+                    transport.submit_batch(items)
+        if lost:
+            # 刚连上就被vMix关闭（此时还不是当前连接，断开回调不会触发重连）
+            self._schedule_reconnect()
+            return False
+        log.info(f"✓ 成功连接到 vMix[{self.name}] {self.host}:{self.port}")
+        if items:
+            log.info(f"✓ vMix[{self.name}]已补发离线期间的 {len(items)} 条命令")
+        return True
+    
+    def _on_connection_lost(self, transport, error):
+        """传输层报告连接异常断开（事件循环线程）：进入自动重连"""
+        if transport is self.transport and self.auto_reconnect:
+            self.reconnect_attempts = 0
+            self._schedule_reconnect()
+    
+    def _on_undelivered(self, transport, items, error, front):
+        """传输层因连接断开未送达的命令（事件循环线程）：未手动断开时放回离线队列，重连后补发
+        （已发送未应答的命令vMix可能已经执行，补发时会再执行一次）；
+        期间新连接已经建立时直接在新连接上补发；已手动断开则以异常结束
+        """
+        with self._offline_lock:
+            if self.auto_reconnect:
+                if self.connected:
+                    self.transport.submit_batch(items)
+                else:
+                    self._queue_offline(items, front)
+                return
+        for future, command in items:
+            if not future.done():
+                future.set_exception(error)
+    
+    def _schedule_reconnect(self):
+        """按指数退避（带随机抖动）安排下一次自动重连"""
+        if not self.auto_reconnect:
+            return
+        delay = min(RECONNECT['MAX_DELAY'], RECONNECT['BASE_DELAY'] * 2 ** self.reconnect_attempts)
+        delay *= random.uniform(1 - RECONNECT['JITTER'], 1)
+        self.reconnecting = True
+        self.next_reconnect_at = time.time() + delay
+        self.scheduler.cancel(self._reconnect_task)
+        self._reconnect_task = self.scheduler.call_later(delay, self._reconnect)
+        log.info(f"✓ {delay:.1f} 秒后自动重连 vMix[{self.name}]（第 {self.reconnect_attempts + 1} 次）")
+    
+    def _reconnect(self):
+        """自动重连（调度线程）"""
+        self._reconnect_task = None
+        if not self.reconnecting or not self.auto_reconnect:
+            return
+        self.reconnect_attempts += 1
+        self.connect_async()
+    
+    def disconnect(self):
+        """断开连接（手动断开：停止自动重连并丢弃离线队列）"""
+        self.auto_reconnect = False
+        self.reconnecting = False
+        self.next_reconnect_at = None
+        self.scheduler.cancel(self._reconnect_task)
+        self._reconnect_task = None
+        with self._offline_lock:
+            if self.transport:
+                self.transport.close()
+            self.transport = None
+            items = list(self._offline)
+            self._offline.clear()
+        error = ConnectionError("vMix连接已断开")
+        for future, command, queued_at in items:
+            if not future.done():
+                future.set_exception(error)
+    
+    def _queue_offline(self, items, front=False):
+        """命令放入离线队列（调用方持有_offline_lock），队列满时丢弃最早的命令
+        front=True 时放在最前面（断开前提交的命令，排在离线期间的新命令之前）
+        """
+        now = time.time()
+        entries = [(future, command, now) for future, command in items]
+        if front:
+            self._offline.extendleft(reversed(entries))
+        else:
+            self._offline.extend(entries)
+        self.offline_stats['queued'] += len(entries)
+        while len(self._offline) > OFFLINE_QUEUE['MAX_COMMANDS']:
+            dropped = self._offline.popleft()[0]
+            self.offline_stats['overflow'] += 1
+            if not dropped.done():
+                dropped.set_exception(ConnectionError("离线命令队列已满"))
+    
+    def _take_offline(self):
+        """取出离线队列中未过期的命令（调用方持有_offline_lock），过期的命令以TimeoutError结束"""
+        deadline = time.time() - OFFLINE_QUEUE['TTL']
+        items, expired = [], []
+        while self._offline:
+            future, command, queued_at = self._offline.popleft()
+            if future.done():
+                continue
+            if queued_at < deadline:
+                expired.append(future)
+            else:
+                items.append((future, command))
+        self.offline_stats['replayed'] += len(items)
+        self.offline_stats['expired'] += len(expired)
+        if expired:
+            log.warning(f"✗ vMix[{self.name}]丢弃离线期间已过期的 {len(expired)} 条命令")
+        for future in expired:
+            future.set_exception(TimeoutError("命令在离线队列中已过期"))
+        return items
+    
+    def dispatch(self, items):
+        """把 [(future, command), ...] 交给传输层发送；连接中断、等待自动重连时放入离线队列
+        返回命令是否已被接收（发送或暂存）
+        """
+        for future, command in items:
+            future.add_done_callback(self._on_command_done)
+        self.stats['sent'] += len(items)
+        with self._offline_lock:
+            if self.transport is not None and not self.reconnecting:
+                # 已连接；连接刚断开、还没开始重连时传输层也会把命令交回离线队列（见_on_undelivered）
+                self.transport.submit_batch(items)
+                return True
+            if self.reconnecting:
+                self._queue_offline(items)
+                return True
+        error = ConnectionError("vMix未连接")
+        for future, command in items:
+            if not future.done():
+                future.set_exception(error)
+        return False
+    
+    def _on_command_done(self, future):
+        """命令应答回调：统计结果并记录vMix拒绝执行的命令"""
+        if future.cancelled() or future.exception() is not None:
+            self.stats['failed'] += 1
+            return
+        result = future.result()
+        Metrics.shared().record(f"vmix.ack.{self.name}", result.latency)
+        if result.ok:
+            self.stats['ok'] += 1
+        else:
+            self.stats['rejected'] += 1
+            log.error(f"✗ vMix[{self.name}]执行命令失败: {result.command} -> {result.response}",
+                      extra={'fields': {'target': self.name, 'command': result.command,
+                                        'response': result.response, 'latency': result.latency}})
+
+class VmixController:
+    def __init__(self):
+        self.config_file = "config.json"  # 统一配置文件
+        self.scheduler = TaskScheduler.shared()
+        
+        # vMix连接池：第一个为主机（状态栏、叠加层状态判断以它为准），其余为备份/推流等目标
+        # 每条命令并行发送到所有目标，各目标有独立的连接、自动重连和离线队列
+        self.targets = [VmixTarget("主机", "127.0.0.1", 8099, self.scheduler)]
+        
+        # 球队配置（合并到统一配置文件）
+        self.team_name_home = "主队"  # 默认主队名称
+        self.team_name_away = "客队"  # 默认客队名称
+        self.team_home_color = "#3498DB"  # 默认主队颜色
+        self.team_away_color = "#E74C3C"  # 默认客队颜色
+        
+        # 配置项
+        self.red_card_input = "1"
+        self.red_card_layer = "0"
+        self.red_card_delay = 8  # 红牌自动下字幕延迟（秒）
+        
+        self.yellow_card_input = "1"
+        self.yellow_card_layer = "1"
+        self.yellow_card_delay = 8  # 黄牌自动下字幕延迟（秒）
+        
+        self.sub_input = "2"
+        self.sub_layer = "0"
+        self.sub_delay = 5  # 换人自动下字幕延迟（秒）
+        
+        self.goal_input = "3"
+        self.goal_layer = "0"
+        self.goal_delay = 8  # 进球自动下字幕延迟（秒）
+        
+        # 直连标题模式：数据通过SetText直接写入GT标题（CSV仍然照常写入作为后备）
+        self.direct_title = False
+        self.scoreboard_input = ""  # 记分板GT标题的Input（为空则不推送记分板）
+        self.title_fields = {name: dict(fields) for name, fields in TITLE_FIELDS.items()}
+        
+        # 名单分组：home.txt/away.txt中用[分组名]分组时使用的分组（为空则使用第一个分组）
+        self.home_squad = ""
+        self.away_squad = ""
+        
+        # 状态推送服务（HTTP + WebSocket），端口为0则不启动
+        self.push_server_host = PUSH_SERVER['HOST']
+        self.push_server_port = PUSH_SERVER['PORT']
+        
+        self.hide_timers = {}  # 存储自动下字幕的定时任务（ScheduledTask）
+        self._timer_lock = threading.Lock()
+        self._local = threading.local()  # 每个线程当前进行中的事务
+        
+        # 加载配置
+        self.load_config()
+    
+    @property
+    def primary(self):
+        """主机（连接池中的第一个目标）"""
+        return self.targets[0]
+    
+    @property
+    def host(self):
+        """主机地址"""
+        return self.primary.host
+    
+    @host.setter
+    def host(self, value):
+        self.primary.host = value
+    
+    @property
+    def port(self):
+        """主机端口"""
+        return self.primary.port
+    
+    @port.setter
+    def port(self, value):
+        self.primary.port = value
+    
+    @property
+    def connected(self):
+        """是否有任一目标已连接"""
+        return any(target.connected for target in self.targets)
+    
+    @property
+    def accepting(self):
+        """是否有任一目标接收命令（已连接或正在自动重连）"""
+        return any(target.accepting for target in self.targets)
+    
+    # 以下属性均为主机的状态
+    @property
+    def transport(self):
+        return self.primary.transport
+    
+    @property
+    def mirror(self):
+        return self.primary.mirror
+    
+    @property
+    def socket(self):
+        return self.primary.socket
+    
+    @property
+    def last_latency(self):
+        return self.primary.last_latency
+    
+    @property
+    def link_state(self):
+        return self.primary.link_state
+    
+    @property
+    def rtt_stats(self):
+        return self.primary.rtt_stats
+    
+    @property
+    def reconnecting(self):
+        return self.primary.reconnecting
+    
+    @property
+    def next_reconnect_at(self):
+        return self.primary.next_reconnect_at
+    
+    @property
+    def offline_count(self):
+        return self.primary.offline_count
+    
+    @property
+    def offline_stats(self):
+        """所有目标的离线队列统计之和"""
+        totals = dict.fromkeys(self.primary.offline_stats, 0)
+        for target in self.targets:
+            for key, value in target.offline_stats.items():
+                totals[key] += value
+        return totals
+    
+    def connect(self):
+        """连接到vMix（阻塞等待结果，GUI线程中请使用connect_async）"""
+        return self.connect_async().result()
+    
+    def connect_async(self, callback=None):
+        """在后台连接所有目标，立即返回Future（结果为是否有目标连接成功）
+        任一目标连接成功或全部连接失败时即完成，不等待其它慢目标；
+        callback(ok) 在后台线程中调用，GUI需要自行投递回Tk主线程；
+        连接失败的目标会在后台按指数退避自动重试
+        """
+        result = Future()
+        results = []
+        lock = threading.Lock()
+        
+        def on_target_done(ok):
+            with lock:
+                results.append(ok)
+                if result.done() or not (ok or len(results) == len(self.targets)):
+                    return
+                result.set_result(ok)
+            if callback:
+                callback(ok)
+        
+        for target in self.targets:
+            target.connect_async(on_target_done)
+        return result
+    
+    def disconnect(self):
+        """断开所有目标（手动断开：停止自动重连并丢弃离线队列）"""
+        # 取消所有等待中的自动下字幕任务
+        with self._timer_lock:
+            for task in self.hide_timers.values():
+                task.cancel()
+            self.hide_timers.clear()
+        
+        for target in self.targets:
+            target.disconnect()
+        log.info("✓ 已断开 vMix 连接")
+    
+    def set_targets(self, targets):
+        """设置连接池目标：targets为 [{'name', 'host', 'port'}, ...]，第一个为主机
+        地址不变的目标保留原连接；新增的目标需要调用connect_async连接
+        """
+        existing = {(target.host, target.port): target for target in self.targets}
+        new_targets = []
+        for index, item in enumerate(targets):
+            host = str(item.get('host', '')).strip()
+            try:
+                port = int(item.get('port', 8099))
+            except (TypeError, ValueError):
+                port = 8099
+            if not host:
+                continue
+            name = str(item.get('name') or ("主机" if index == 0 else f"vMix{index + 1}"))
+            target = existing.pop((host, port), None) or VmixTarget(name, host, port, self.scheduler)
+            target.name = name
+            new_targets.append(target)
+        if not new_targets:
+            return
+        for target in existing.values():
+            target.disconnect()
+        self.targets = new_targets
+    
+    def target_summary(self):
+        """各目标的状态与统计（供状态栏/诊断显示）"""
+        summary = []
+        for target in self.targets:
+            summary.append({
+                'name': target.name,
+                'address': f"{target.host}:{target.port}",
+                'state': target.link_state or ('reconnecting' if target.reconnecting else 'offline'),
+                'latency': target.average_latency,
+                'rtt': target.rtt_stats,
+                'offline': target.offline_count,
+                **target.stats,
+            })
+        return summary
+    
+    def _dispatch(self, items):
+        """把 [(future, command), ...] 并行分发给所有接收命令的目标，返回命令是否已被接收
+        调用方的Future由第一个接收命令的目标（通常是主机）完成，其它目标使用各自的Future；
+        各目标的发送都是非阻塞的，某台vMix变慢或断开不会延迟其它目标
+        """
+        # 已连接的目标排在前面：调用方尽快得到应答，而不是等待某台vMix的离线队列
+        targets = sorted((target for target in self.targets if target.accepting),
+                         key=lambda target: not target.connected)
+        if not targets:
+            error = ConnectionError("vMix未连接")
+            for future, command in items:
+                if not future.done():
+                    future.set_exception(error)
+            return False
+        targets[0].dispatch(items)
+        for target in targets[1:]:
+            target.dispatch([(Future(), command) for future, command in items])
+        return True
+    
+    def transaction(self):
+        """开启（或加入当前线程已有的）命令事务
+        用法：
+            with vmix.transaction():
+                vmix.send_command(...)
+                vmix.overlay_on(...)
+        事务内发送的命令在with结束时合并为一次socket写入
+        """
+        tx = getattr(self._local, 'transaction', None)
+        if tx is None:
+            tx = VmixTransaction(self)
+            self._local.transaction = tx
+        return tx
+    
+    def submit_command(self, command):
+        """提交命令到连接池中的所有vMix，返回Future（没有目标接收命令时返回None）
+        命令进入发送队列后立即返回，应答结果通过Future获取；
+        处于事务中时命令先暂存，事务结束时统一发送；
+        连接中断、等待自动重连期间命令进入离线队列，重连后补发（过期的命令丢弃）
+        """
+        if not self.accepting:
+            return None
+        tx = getattr(self._local, 'transaction', None)
+        if tx is not None:
+            return tx.add(command)
+        future = Future()
+        self._dispatch([(future, command)])
+        return future
+    
+    @timed('vmix.send_command')
+    def send_command(self, command):
+        """发送命令到vMix（不等待应答）"""
+        return self.submit_command(command) is not None
+    
+    def overlay_state(self, input_num, layer_num, since=None):
+        """根据主机的状态镜像判断输入是否正在该叠加层上（不访问vMix）：True/False，无法确定时返回None
+        主机未连接、镜像尚未同步或叠加层不在vMix的1~8范围内时无法确定
+        （备份目标接收与主机相同的命令，叠加层状态以主机为准）
+        """
+        if not self.primary.connected:
+            return None
+        return self.mirror.is_on_overlay(input_num, layer_num, since)
+    
+    def subtitle_on_air(self, subtitle_type, since=None):
+        """字幕是否实际显示在vMix的叠加层上：True/False，无法确定时返回None（见overlay_state）"""
+        input_num, layer_num = self.get_overlay(subtitle_type)
+        if input_num is None:
+            return None
+        return self.overlay_state(input_num, layer_num, since)
+    
+    def overlay_on(self, input_num, layer_num="0"):
+        """打开字幕叠加"""
+        if self.overlay_state(input_num, layer_num):
+            # 已经在该叠加层上：OverlayInputN是切换命令，再发送一次会把字幕关掉
+            return True
+        command = f"OverlayInput{layer_num} Input={input_num}"
+        return self.send_command(command)
+    
+    def overlay_off(self, layer_num="0"):
+        """关闭字幕叠加"""
+        command = f"OverlayInput{layer_num}Off"
+        return self.send_command(command)
+    
+    def show_subtitle(self, subtitle_type):
+        """显示字幕并自动下字幕"""
         # 根据类型选择配置
         if subtitle_type == "red_card":
             input_num = self.red_card_input
@@ -424,16 +2776,31 @@ class VmixController:
         
         # 上字幕
         if self.overlay_on(input_num, layer_num):
-            print(f"✓ 已显示 {subtitle_type} 字幕，将在 {delay} 秒后自动下字幕")
+            log.info(f"✓ 已显示 {subtitle_type} 字幕，将在 {delay} 秒后自动下字幕")
             
-            # 设置自动下字幕定时器
-            timer = threading.Timer(delay, 
-                                   lambda: self.hide_subtitle(subtitle_type, auto=True))
-            timer.start()
-            self.hide_timers[subtitle_type] = timer
+            # 设置（或顺延已有的）自动下字幕任务
+            with self._timer_lock:
+                task = self.hide_timers.get(subtitle_type)
+                if task is not None:
+                    self.scheduler.reschedule(task, delay)
+                else:
+                    self.hide_timers[subtitle_type] = self.scheduler.call_later(
+                        delay, self.hide_subtitle, subtitle_type, True)
             return True
         return False
     
+    def get_overlay(self, subtitle_type):
+        """获取指定类型字幕的 (输入, 叠加层)，类型无效时返回 (None, None)"""
+        if subtitle_type == "red_card":
+            return self.red_card_input, self.red_card_layer
+        elif subtitle_type == "yellow_card":
+            return self.yellow_card_input, self.yellow_card_layer
+        elif subtitle_type == "sub":
+            return self.sub_input, self.sub_layer
+        elif subtitle_type == "goal":
+            return self.goal_input, self.goal_layer
+        return None, None
+    
     def get_delay(self, subtitle_type):
         """获取指定类型的延迟时间"""
         if subtitle_type == "red_card":
@@ -446,12 +2813,49 @@ class VmixController:
             return self.goal_delay
         return 5
     
+    def get_title_input(self, title_type):
+        """获取直连标题模式下数据对应的GT标题Input"""
+        if title_type == "scoreboard":
+            return self.scoreboard_input
+        elif title_type == "red_card":
+            return self.red_card_input
+        elif title_type == "yellow_card":
+            return self.yellow_card_input
+        elif title_type == "sub":
+            return self.sub_input
+        elif title_type == "goal":
+            return self.goal_input
+        return ""
+    
+    def set_title_fields(self, title_type, values):
+        """直连标题模式：把字段值通过SetText/SetColor直接写入GT标题
+        values为 {字段键: 值}，字段键到GT字段名的映射见 title_fields；返回是否已发送（或已放入离线队列）
+        """
+        if not self.direct_title or not self.accepting:
+            return False
+        input_num = self.get_title_input(title_type)
+        fields = self.title_fields.get(title_type, {})
+        if not input_num or not fields:
+            return False
+        
+        with self.transaction():
+            for key, value in values.items():
+                field = fields.get(key)
+                if not field:
+                    continue
+                function = "SetColor" if key.endswith('_color') else "SetText"
+                self.send_command(f"{function} Input={input_num}&SelectedName={field}"
+                                  f"&Value={quote(str(value), safe='')}")
+        return True
+    
     def save_config(self):
         """保存配置到文件（合并所有配置）"""
         config = {
-            # vMix连接配置
+            # vMix连接配置（host/port为主机，targets为完整的连接池，第一个为主机）
             'host': self.host,
             'port': self.port,
+            'targets': [{'name': target.name, 'host': target.host, 'port': target.port}
+                        for target in self.targets],
             # vMix字幕配置
             'red_card_input': self.red_card_input,
             'red_card_layer': self.red_card_layer,
@@ -469,14 +2873,24 @@ class VmixController:
             'team_name_home': self.team_name_home,
             'team_name_away': self.team_name_away,
             'team_home_color': self.team_home_color,
-            'team_away_color': self.team_away_color
+            'team_away_color': self.team_away_color,
+            # 直连标题配置
+            'direct_title': self.direct_title,
+            'scoreboard_input': self.scoreboard_input,
+            'title_fields': self.title_fields,
+            # 名单分组配置
+            'home_squad': self.home_squad,
+            'away_squad': self.away_squad,
+            # 状态推送服务配置
+            'push_server_host': self.push_server_host,
+            'push_server_port': self.push_server_port
         }
         
         if FileManager.write_json(self.config_file, config):
-            print(f"✓ 配置已保存到 {self.config_file}")
+            log.info(f"✓ 配置已保存到 {self.config_file}")
             return True
         else:
-            print(f"✗ 保存配置失败")
+            log.error(f"✗ 保存配置失败")
             return False
     
     def load_config(self):
@@ -484,9 +2898,12 @@ class VmixController:
         # 尝试加载新配置文件
         config = FileManager.read_json(self.config_file)
         if config:
-            # vMix连接配置
+            # vMix连接配置（旧配置文件没有targets，只有主机的host/port）
             self.host = config.get('host', self.host)
             self.port = config.get('port', self.port)
+            targets = config.get('targets')
+            if isinstance(targets, list) and targets:
+                self.set_targets([item for item in targets if isinstance(item, dict)])
             # vMix字幕配置
             self.red_card_input = config.get('red_card_input', self.red_card_input)
             self.red_card_layer = config.get('red_card_layer', self.red_card_layer)
@@ -505,41 +2922,464 @@ class VmixController:
             self.team_name_away = config.get('team_name_away', self.team_name_away)
             self.team_home_color = config.get('team_home_color', self.team_home_color)
             self.team_away_color = config.get('team_away_color', self.team_away_color)
+            # 直连标题配置（字段名与默认值合并，兼容旧配置文件）
+            self.direct_title = bool(config.get('direct_title', self.direct_title))
+            self.scoreboard_input = str(config.get('scoreboard_input', self.scoreboard_input))
+            for title_type, fields in (config.get('title_fields') or {}).items():
+                if title_type in self.title_fields and isinstance(fields, dict):
+                    self.title_fields[title_type].update(fields)
+            # 名单分组配置
+            self.home_squad = str(config.get('home_squad', self.home_squad))
+            self.away_squad = str(config.get('away_squad', self.away_squad))
+            # 状态推送服务配置
+            self.push_server_host = str(config.get('push_server_host', self.push_server_host))
+            try:
+                self.push_server_port = int(config.get('push_server_port', self.push_server_port) or 0)
+            except (TypeError, ValueError):
+                log.error(f"✗ 状态推送服务端口无效: {config.get('push_server_port')!r}，使用默认端口 {PUSH_SERVER['PORT']}")
+                self.push_server_port = PUSH_SERVER['PORT']
             
-            print(f"✓ 已从 {self.config_file} 加载配置")
+            log.info(f"✓ 已从 {self.config_file} 加载配置")
             return
         
         # 保存配置到文件
         self.save_config()
-        print(f"✓ 配置已加载并保存到 {self.config_file}")
+        log.info(f"✓ 配置已加载并保存到 {self.config_file}")
     
     def hide_subtitle(self, subtitle_type, auto=False):
         """隐藏字幕"""
         # 根据类型选择配置
-        if subtitle_type == "red_card":
-            layer_num = self.red_card_layer
-        elif subtitle_type == "yellow_card":
-            layer_num = self.yellow_card_layer
-        elif subtitle_type == "sub":
-            layer_num = self.sub_layer
-        elif subtitle_type == "goal":
-            layer_num = self.goal_layer
-        else:
+        input_num, layer_num = self.get_overlay(subtitle_type)
+        if layer_num is None:
             return False
         
+        # 清除自动下字幕任务（手动下字幕时同时取消等待中的任务）
+        with self._timer_lock:
+            task = self.hide_timers.pop(subtitle_type, None)
+            if task is not None and not auto:
+                task.cancel()
+        
+        # 字幕已不在叠加层上（在vMix中被手动关闭或换成了其它输入）：不再发送Off，避免关掉别的画面
+        if self.overlay_state(input_num, layer_num) is False:
+            log.info(f"✓ {subtitle_type} 字幕已不在叠加层{layer_num}上，跳过下字幕")
+            return True
+        
         # 下字幕
         if self.overlay_off(layer_num):
             if auto:
-                print(f"✓ 自动下 {subtitle_type} 字幕")
+                log.info(f"✓ 自动下 {subtitle_type} 字幕")
             else:
-                print(f"✓ 手动下 {subtitle_type} 字幕")
-            
-            # 清除定时器
-            if subtitle_type in self.hide_timers:
-                del self.hide_timers[subtitle_type]
+                log.info(f"✓ 手动下 {subtitle_type} 字幕")
             return True
         return False
 
+# ============ 比赛引擎 ============
+class MatchEngine:
+    """无界面的比赛逻辑：比分、场次、名单查找和换人/红黄牌/进球记录
+    状态全部是普通Python数据，不依赖Tk，可由界面、命令行或测试程序驱动。
+    每次变化都按订阅顺序同步通知观察者 observer(engine, event, data)：
+      add       (kind, team, index, record)  新增一条记录
+      select    (kind, team, index, record)  选中一条记录（同类记录两队中同时只有一条被选中）
+      publish   (kind, team, record)         该记录成为当前字幕内容（新增和选中时都会发出）
+      delete    (kind, team, index)          删除一条记录
+      clear     (kind, team)                 清空某队某类记录
+      scoreboard ()                          比分、场次或球队名称/颜色变化
+      restore   (event_count)                从比赛日志恢复了整场状态
+    记录格式与卡片网格一致：
+      sub  (换下球员, 换上球员, 时间)
+      card (球员, "红牌"/"黄牌", 时间)
+      goal (球员, 时间, 主队比分, 客队比分)
+    """
+
+    KINDS = ('sub', 'card', 'goal')
+    TEAMS = ('home', 'away')
+    KIND_LABELS = {'sub': '换人', 'card': '红黄牌', 'goal': '进球'}
+
+    def __init__(self, rosters, home_name="", away_name="", home_color="", away_color=""):
+        self.rosters = rosters  # {'home': Roster, 'away': Roster}
+        self.team_names = {'home': home_name, 'away': away_name}
+        self.team_colors = {'home': home_color, 'away': away_color}
+        self.scores = {'home': 0, 'away': 0}
+        self.session = "上半场"
+        self.records = {(kind, team): [] for kind in self.KINDS for team in self.TEAMS}
+        self.selected = {}  # kind -> (team, index)
+        self._observers = []
+
+    def subscribe(self, observer):
+        """订阅比赛事件，返回observer本身"""
+        self._observers.append(observer)
+        return observer
+
+    def unsubscribe(self, observer):
+        if observer in self._observers:
+            self._observers.remove(observer)
+
+    def _emit(self, event, **data):
+        # 单个输出出错（磁盘、网络等）不影响其它观察者；每个观察者的耗时计入性能统计
+        metrics = Metrics.shared()
+        for observer in list(self._observers):
+            start = time.perf_counter()
+            try:
+                observer(self, event, data)
+            except Exception as e:
+                log.error(f"✗ 处理比赛事件 {event} 失败 ({type(observer).__name__}): {e}", exc_info=True)
+            name = getattr(observer, '__qualname__', None) or type(observer).__name__
+            metrics.record(f"observer.{name}", time.perf_counter() - start)
+
+    @staticmethod
+    def team_label(team):
+        return '主队' if team == 'home' else '客队'
+
+    @staticmethod
+    def title_type(kind, record):
+        """记录对应的字幕类型（sub/red_card/yellow_card/goal）"""
+        if kind == 'card':
+            return 'red_card' if record[1] == "红牌" else 'yellow_card'
+        return kind
+
+    def title_data(self, kind, team, record):
+        """记录作为字幕内容时的字段：返回(字幕类型, {字段键: 值})"""
+        team_name = self.team_names[team]
+        if kind == 'sub':
+            player_out, player_in = record[0], record[1]
+            return 'sub', {
+                'team': team_name,
+                'out_number': player_out.fields[0], 'out_name': player_out.name,
+                'in_number': player_in.fields[0], 'in_name': player_in.name,
+            }
+        player = record[0]
+        return self.title_type(kind, record), {'team': team_name, 'number': player.fields[0], 'name': player.name}
+
+    def scoreboard(self):
+        """当前记分板字段（与直连标题的scoreboard字段键一致）"""
+        return {
+            'home_name': self.team_names['home'],
+            'home_score': self.scores['home'],
+            'home_color': self.team_colors['home'],
+            'away_name': self.team_names['away'],
+            'away_score': self.scores['away'],
+            'away_color': self.team_colors['away'],
+            'session': self.session,
+        }
+
+    def find_player(self, team, number):
+        """按编号查找球员，返回PlayerRecord或None"""
+        return self.rosters[team].get(number)
+
+    def selected_index(self, kind, team):
+        """某队某类记录中当前选中的索引（没有则为None）"""
+        selected = self.selected.get(kind)
+        return selected[1] if selected and selected[0] == team else None
+
+    @staticmethod
+    def _now():
+        return datetime.now().strftime("%H:%M:%S")
+
+    def add_substitution(self, team, player_out, player_in):
+        record = self._add('sub', team, (player_out, player_in, self._now()))
+        log.info(f"✓ {self.team_label(team)}换人 - 换下：{player_out}，换上：{player_in}",
+                 extra={'fields': {'event': 'sub', 'team': team, 'player_out': player_out.number, 'player_in': player_in.number}})
+        return record
+
+    def add_card(self, team, player, card):
+        """添加红黄牌，card为"红牌"或"黄牌" """
+        record = self._add('card', team, (player, card, self._now()))
+        log.info(f"✓ {self.team_label(team)}{card} - {player}",
+                 extra={'fields': {'event': 'card', 'team': team, 'card': card, 'player': player.number}})
+        return record
+
+    def add_goal(self, team, player):
+        """添加进球（记录进球时的比分）"""
+        record = self._add('goal', team, (player, self._now(), self.scores['home'], self.scores['away']))
+        log.info(f"✓ {self.team_label(team)}进球 - {self.team_names[team]}: {player}",
+                 extra={'fields': {'event': 'goal', 'team': team, 'player': player.number,
+                                   'score': [self.scores['home'], self.scores['away']]}})
+        return record
+
+    def _add(self, kind, team, record):
+        records = self.records[(kind, team)]
+        records.append(record)
+        self._emit('add', kind=kind, team=team, index=len(records) - 1, record=record)
+        self._emit('publish', kind=kind, team=team, record=record)
+        return record
+
+    def select(self, kind, team, index):
+        """选中一条记录并作为当前字幕内容，返回该记录（索引无效返回None）"""
+        records = self.records[(kind, team)]
+        if not 0 <= index < len(records):
+            return None
+        record = records[index]
+        self.selected[kind] = (team, index)
+        self._emit('select', kind=kind, team=team, index=index, record=record)
+        self._emit('publish', kind=kind, team=team, record=record)
+        log.info(f"✓ {self.team_label(team)}切换当前{self.KIND_LABELS[kind]}到第{index+1}条",
+                 extra={'fields': {'event': 'select', 'kind': kind, 'team': team, 'index': index}})
+        return record
+
+    def delete(self, kind, team, index):
+        """删除一条记录，返回是否删除"""
+        records = self.records[(kind, team)]
+        if not 0 <= index < len(records):
+            return False
+        del records[index]
+        selected = self.selected_index(kind, team)
+        if selected == index:
+            del self.selected[kind]
+        elif selected is not None and selected > index:
+            self.selected[kind] = (team, selected - 1)
+        self._emit('delete', kind=kind, team=team, index=index)
+        log.info(f"✓ 已删除{self.team_label(team)}第{index+1}个{self.KIND_LABELS[kind]}记录",
+                 extra={'fields': {'event': 'delete', 'kind': kind, 'team': team, 'index': index}})
+        return True
+
+    def clear(self, kind, team):
+        """清空某队某类记录"""
+        self.records[(kind, team)].clear()
+        if self.selected_index(kind, team) is not None:
+            del self.selected[kind]
+        self._emit('clear', kind=kind, team=team)
+
+    def set_score(self, team, score):
+        self.scores[team] = max(0, int(score))
+        self._emit('scoreboard')
+
+    def change_score(self, team, delta):
+        self.set_score(team, self.scores[team] + delta)
+
+    def reset_score(self):
+        self.scores = {'home': 0, 'away': 0}
+        self._emit('scoreboard')
+
+    def set_session(self, session):
+        self.session = session
+        MatchClock.shared().start(session)
+        self._emit('scoreboard')
+
+    def set_teams(self, home_name, away_name, home_color, away_color):
+        self.team_names = {'home': home_name, 'away': away_name}
+        self.team_colors = {'home': home_color, 'away': away_color}
+        self._emit('scoreboard')
+
+    def publish_scoreboard(self):
+        """重新发出当前记分板（启动时让各输出写入初始状态）"""
+        self._emit('scoreboard')
+
+    def _record_from_event(self, team, event):
+        """把比赛日志中的add事件还原为记录"""
+        roster = self.rosters[team]
+
+        def player(data):
+            return roster.record_for(data[0], data[1])
+
+        if event['kind'] == 'sub':
+            return (player(event['player_out']), player(event['player_in']), event['time'])
+        if event['kind'] == 'card':
+            return (player(event['player']), event['card'], event['time'])
+        return (player(event['player']), event['time'], event['score'][0], event['score'][1])
+
+    def restore(self, state):
+        """应用比赛日志重放得到的状态（MatchState），并重新发出各字幕的最后内容和记分板"""
+        for (kind, team), events in state.records.items():
+            if (kind, team) in self.records:
+                self.records[(kind, team)][:] = [self._record_from_event(team, event) for event in events]
+        self.selected = {kind: (team, index) for (kind, team), index in state.selected.items()
+                         if (kind, team) in self.records}
+        if state.scoreboard:
+            self.scores = {'home': state.scoreboard.get('home', 0), 'away': state.scoreboard.get('away', 0)}
+            self.session = state.scoreboard.get('session', "上半场")
+            MatchClock.shared().start(self.session)
+        self._emit('restore', event_count=state.event_count)
+
+        # 各CSV文件最后写入的内容
+        for output in state.outputs.values():
+            if output is None:
+                continue
+            team, event = output
+            if team in self.TEAMS:
+                self._emit('publish', kind=event['kind'], team=team, record=self._record_from_event(team, event))
+        self._emit('scoreboard')
+
+
+class EngineObserver:
+    """比赛引擎观察者基类：事件分派到同名的 on_<事件> 方法，没有对应方法的事件忽略"""
+
+    def __call__(self, engine, event, data):
+        handler = getattr(self, f"on_{event}", None)
+        if handler is not None:
+            handler(engine, **data)
+
+
+class JournalRecorder(EngineObserver):
+    """把比赛事件追加到比赛日志"""
+
+    def __init__(self, journal):
+        self.journal = journal
+        self._last_scoreboard = None  # 最后记录到日志的记分板状态
+
+    @staticmethod
+    def _player(player):
+        """球员记录在日志中的格式：[编号, 姓名]"""
+        return [player.fields[0], player.name]
+
+    def on_add(self, engine, kind, team, index, record):
+        if kind == 'sub':
+            data = {'time': record[2], 'player_out': self._player(record[0]), 'player_in': self._player(record[1])}
+        elif kind == 'card':
+            data = {'card': record[1], 'time': record[2], 'player': self._player(record[0])}
+        else:
+            data = {'time': record[1], 'player': self._player(record[0]), 'score': [record[2], record[3]]}
+        self.journal.record('add', kind=kind, team=team, **data)
+
+    def on_select(self, engine, kind, team, index, record):
+        self.journal.record('select', kind=kind, team=team, index=index)
+
+    def on_delete(self, engine, kind, team, index):
+        self.journal.record('delete', kind=kind, team=team, index=index)
+
+    def on_clear(self, engine, kind, team):
+        self.journal.record('clear', kind=kind, team=team)
+
+    def on_scoreboard(self, engine):
+        # 只有比分或场次变化时才记录
+        scoreboard = (engine.scores['home'], engine.scores['away'], engine.session)
+        if scoreboard != self._last_scoreboard:
+            self._last_scoreboard = scoreboard
+            self.journal.record('scoreboard', home=scoreboard[0], away=scoreboard[1], session=scoreboard[2])
+
+
+class CsvOutput(EngineObserver):
+    """写出vMix数据源CSV文件"""
+
+    def on_publish(self, engine, kind, team, record):
+        team_name = engine.team_names[team]
+        if kind == 'sub':
+            # 格式：球队名称,换下号码,换下姓名 / 球队名称,换上号码,换上姓名
+            player_out, player_in = record[0], record[1]
+            content = f"{team_name},{player_out.fields[0]},{player_out.name}\n"
+            content += f"{team_name},{player_in.fields[0]},{player_in.name}\n"
+            if FileManager.write_csv('substitutions.csv', content):
+                log.info(f"✓ 已保存最新换人记录到 substitutions.csv")
+        elif kind == 'card':
+            FileManager.write_csv(f"{engine.title_type(kind, record)}.csv", f"{team_name},{record[0].info}")
+        else:
+            # 格式：球队名称,号码,姓名
+            FileManager.write_csv('goal.csv', f"{team_name},{record[0].fields[0]},{record[0].name}\n")
+
+    def on_clear(self, engine, kind, team):
+        for filename in MatchJournal.CSV_FILES[kind]:
+            FileManager.clear_file(filename)
+
+    def on_scoreboard(self, engine):
+        board = engine.scoreboard()
+        content = (f"{board['home_name']},{board['home_score']},{board['home_color']}\n"
+                   f"{board['away_name']},{board['away_score']},{board['away_color']}\n"
+                   f"{board['session']}")
+        FileManager.write_csv('scoreboard.csv', content)
+
+
+class SharedStateOutput(EngineObserver):
+    """写入共享比赛状态文件"""
+
+    def __init__(self, shared_state):
+        self.shared_state = shared_state
+
+    def on_publish(self, engine, kind, team, record):
+        title_type, fields = engine.title_data(kind, team, record)
+        if kind == 'sub':
+            self.shared_state.update_event('sub', fields['team'], fields['out_number'], fields['out_name'],
+                                           fields['in_number'], fields['in_name'])
+        else:
+            self.shared_state.update_event(title_type, fields['team'], fields['number'], fields['name'])
+
+    def on_scoreboard(self, engine):
+        board = engine.scoreboard()
+        self.shared_state.update_scoreboard(board['home_score'], board['away_score'], board['session'],
+                                            board['home_name'], board['away_name'],
+                                            board['home_color'], board['away_color'])
+
+
+class PushOutput(EngineObserver):
+    """推送给状态推送服务的订阅者（只有变化的字段会被推送）"""
+
+    def __init__(self, push_server):
+        self.push_server = push_server
+
+    def on_publish(self, engine, kind, team, record):
+        title_type, fields = engine.title_data(kind, team, record)
+        self.push_server.update(**{title_type: fields})
+
+    def on_clear(self, engine, kind, team):
+        title_types = ('red_card', 'yellow_card') if kind == 'card' else (kind,)
+        self.push_server.update(**dict.fromkeys(title_types))
+
+    def on_scoreboard(self, engine):
+        self.push_server.update(**engine.scoreboard())
+
+
+class VmixTitleOutput(EngineObserver):
+    """直连标题模式：把记分板和当前字幕内容直接写入GT标题，不必等待数据源轮询"""
+
+    def __init__(self, vmix):
+        self.vmix = vmix
+
+    def on_publish(self, engine, kind, team, record):
+        self.vmix.set_title_fields(*engine.title_data(kind, team, record))
+
+    def on_scoreboard(self, engine):
+        self.vmix.set_title_fields('scoreboard', engine.scoreboard())
+
+
+class MatchOutputs:
+    """比赛引擎的标准输出：比赛日志、CSV数据源、共享状态文件、推送服务和vMix直连标题
+    界面和无界面模式共用；界面等其它观察者订阅完成后再调用recover()
+    """
+
+    def __init__(self, engine, vmix):
+        self.engine = engine
+        # 比赛事件日志（崩溃后重启可从日志恢复本场比赛）
+        self.journal = MatchJournal()
+        # 共享比赛状态文件（内存映射，其它本地程序可直接读取比分和最新事件）
+        self.shared_state = SharedMatchState()
+        self.shared_state.open()
+        # 状态推送服务（HTML叠加层通过WebSocket订阅比分和最新事件）
+        self.push_server = None
+        if vmix.push_server_port:
+            self.push_server = StatePushServer(vmix.push_server_host, vmix.push_server_port)
+            if not self.push_server.start():
+                self.push_server = None
+
+        self.observers = [JournalRecorder(self.journal), CsvOutput(), SharedStateOutput(self.shared_state)]
+        if self.push_server:
+            self.observers.append(PushOutput(self.push_server))
+        self.observers.append(VmixTitleOutput(vmix))
+        for observer in self.observers:
+            engine.subscribe(observer)
+
+    def recover(self):
+        """上次未正常退出时从比赛日志恢复（一次性重放），然后开始记录本场事件"""
+        events = self.journal.load_unfinished()
+        if events:
+            state = MatchJournal.replay(events)
+            self.engine.restore(state)
+            log.info(f"✓ 上次比赛未正常结束，已从 {self.journal.filename} 恢复 {state.event_count} 条事件")
+        else:
+            self.engine.publish_scoreboard()
+        self.journal.open(resume=bool(events))
+
+    def close(self):
+        """停止接收比赛事件，写出等待中的数据文件，写入比赛日志结束标记，关闭共享状态文件和推送服务"""
+        for observer in self.observers:
+            self.engine.unsubscribe(observer)
+        FileManager.flush_outputs()
+        stats = FileManager.write_stats()
+        log.info(f"✓ 数据文件写入 {stats['written']} 次，内容未变跳过 {stats['skipped']} 次，合并 {stats['coalesced']} 次")
+        if stats['failed']:
+            log.error(f"✗ 数据文件后台写出失败 {stats['failed']} 次")
+        self.journal.close()
+        self.shared_state.close()
+        if self.push_server:
+            self.push_server.stop()
+
 # ============ 带倒计时的字幕控制按钮 ============
 class SubtitleButton:
     def __init__(self, parent, vmix_controller, subtitle_type, text="上字幕", 
@@ -566,6 +3406,13 @@ class SubtitleButton:
         self.text_color = COLORS['text_light']
         self.progress_color = "#ff4444"
         
+        # 画布元素只创建一次，之后只更新坐标和属性（避免每帧delete("all")重建）
+        self._create_items()
+        self._canvas_size = (width, height)
+        self._progress_width = None  # 上次绘制的进度条宽度（像素）
+        self._countdown_text = None  # 上次绘制的倒计时文字
+        self._countdown_job = None  # 等待中的倒计时after任务
+        
         # 绘制初始状态
         self.draw_button()
         
@@ -574,11 +3421,23 @@ class SubtitleButton:
         
         # 绑定大小变化事件，以便在容器大小改变时重新绘制
         self.canvas.bind('<Configure>', lambda e: self.draw_button())
+    
+    def _create_items(self):
+        """创建按钮的所有画布元素（背景、进度条、文字），按状态显示或隐藏"""
+        self.bg_item = self.canvas.create_rectangle(0, 0, 0, 0, fill=self.bg_color, outline="")
+        self.progress_item = self.canvas.create_rectangle(0, 0, 0, 0, fill="#cc0000",
+                                                          outline="", state=HIDDEN)
+        # 未激活状态：主文字和延迟时间提示
+        self.title_item = self.canvas.create_text(0, 0, text=self.text, fill=self.text_color,
+                                                  font=('Arial', 16, 'bold'))
+        self.delay_item = self.canvas.create_text(0, 0, text="", fill=self.text_color,
+                                                  font=('Arial', 9))
+        # 激活状态：倒计时文字
+        self.countdown_item = self.canvas.create_text(0, 0, text="", fill="white",
+                                                      font=('Arial', 14, 'bold'), state=HIDDEN)
         
     def draw_button(self):
-        """绘制按钮"""
-        self.canvas.delete("all")
-        
+        """按当前状态更新按钮（只修改已有元素的坐标和属性，不重建画布元素）"""
         # 获取canvas的实际尺寸（支持动态高度）
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
@@ -587,44 +3446,76 @@ class SubtitleButton:
             canvas_width = self.width
         if canvas_height <= 1:
             canvas_height = self.height
+        self._canvas_size = (canvas_width, canvas_height)
+        
+        self.canvas.coords(self.bg_item, 0, 0, canvas_width, canvas_height)
         
         if not self.is_active:
             # 未激活状态：显示"上字幕"和延迟时间
-            self.canvas.create_rectangle(0, 0, canvas_width, canvas_height,
-                                        fill=self.bg_color, outline="")
-            # 主文字
-            self.canvas.create_text(canvas_width/2, canvas_height/2 - 8,
-                                   text=self.text, fill=self.text_color,
-                                   font=('Arial', 16, 'bold'))
-            # 延迟时间提示
+            self.canvas.itemconfig(self.bg_item, fill=self.bg_color)
+            self.canvas.coords(self.title_item, canvas_width/2, canvas_height/2 - 8)
+            self.canvas.itemconfig(self.title_item, text=self.text, state=NORMAL)
             delay = self.vmix.get_delay(self.subtitle_type)
-            self.canvas.create_text(canvas_width/2, canvas_height/2 + 12,
-                                   text=f"({delay}秒后自动下)", fill=self.text_color,
-                                   font=('Arial', 9))
+            self.canvas.coords(self.delay_item, canvas_width/2, canvas_height/2 + 12)
+            self.canvas.itemconfig(self.delay_item, text=f"({delay}秒后自动下)", state=NORMAL)
+            self.canvas.itemconfig(self.progress_item, state=HIDDEN)
+            self.canvas.itemconfig(self.countdown_item, state=HIDDEN)
         else:
-            # 激活状态：显示倒计时和进度条
-            # 计算进度
-            if self.total_time > 0:
-                progress = self.remaining_time / self.total_time
-            else:
-                progress = 0
-            
-            # 绘制进度条背景（红色）
-            self.canvas.create_rectangle(0, 0, canvas_width, canvas_height,
-                                        fill="#ff4444", outline="")
-            
-            # 绘制剩余时间的进度条（深红色）
-            progress_width = canvas_width * progress
+            # 激活状态：红色背景 + 剩余时间进度条（深红色）+ 倒计时文字
+            self.canvas.itemconfig(self.bg_item, fill="#ff4444")
+            self.canvas.itemconfig(self.title_item, state=HIDDEN)
+            self.canvas.itemconfig(self.delay_item, state=HIDDEN)
+            self.canvas.coords(self.countdown_item, canvas_width/2, canvas_height/2)
+            self.canvas.itemconfig(self.countdown_item, state=NORMAL)
+            # 尺寸可能已变化，强制刷新进度条和文字
+            self._progress_width = None
+            self._countdown_text = None
+            self.update_progress()
+    
+    def update_progress(self):
+        """倒计时刷新：只更新进度条坐标和倒计时文字，且仅在有变化时更新"""
+        canvas_width, canvas_height = self._canvas_size
+        if self.total_time > 0:
+            progress = self.remaining_time / self.total_time
+        else:
+            progress = 0
+        
+        progress_width = int(canvas_width * progress)
+        if progress_width != self._progress_width:
+            self._progress_width = progress_width
             if progress_width > 0:
-                self.canvas.create_rectangle(0, 0, progress_width, canvas_height,
-                                            fill="#cc0000", outline="")
-            
-            # 显示倒计时文字
-            time_text = f"点击下字幕 {self.remaining_time:.1f}s"
-            self.canvas.create_text(canvas_width/2, canvas_height/2,
-                                   text=time_text, fill="white",
-                                   font=('Arial', 14, 'bold'))
+                self.canvas.coords(self.progress_item, 0, 0, progress_width, canvas_height)
+                # 进度条位于倒计时文字下方
+                self.canvas.itemconfig(self.progress_item, state=NORMAL)
+                self.canvas.tag_raise(self.countdown_item)
+            else:
+                self.canvas.itemconfig(self.progress_item, state=HIDDEN)
+        
+        time_text = f"点击下字幕 {self.remaining_time:.1f}s"
+        if time_text != self._countdown_text:
+            self._countdown_text = time_text
+            self.canvas.itemconfig(self.countdown_item, text=time_text)
     
+    def _next_refresh_delay(self):
+        """自适应刷新间隔（毫秒）：等到倒计时文字或进度条下一次会变化时再刷新"""
+        # 倒计时文字保留1位小数，四舍五入后在 x.x5 处变化
+        to_next_text = (self.remaining_time - 0.05) % 0.1 or 0.1
+        # 进度条每缩短1像素所需的时间
+        canvas_width = self._canvas_size[0]
+        per_pixel = self.total_time / canvas_width if canvas_width > 0 else to_next_text
+        delay_ms = int(min(to_next_text, per_pixel) * 1000) + 1
+        return max(UI_UPDATE_INTERVALS['COUNTDOWN'], min(delay_ms, UI_UPDATE_INTERVALS['COUNTDOWN_MAX']))
+    
+    def _cancel_countdown(self):
+        """取消等待中的倒计时刷新"""
+        if self._countdown_job is not None:
+            try:
+                self.canvas.after_cancel(self._countdown_job)
+            except (TclError, ValueError):
+                pass
+            self._countdown_job = None
+    
+    @timed
     def on_click(self, event=None):
         """按钮点击事件"""
         if not self.is_active:
@@ -634,6 +3525,7 @@ class SubtitleButton:
             # 下字幕
             self.hide_subtitle()
     
+    @vmix_transaction
     def show_subtitle(self):
         """显示字幕并开始倒计时"""
         if self.vmix.show_subtitle(self.subtitle_type):
@@ -641,14 +3533,17 @@ class SubtitleButton:
             self.total_time = self.vmix.get_delay(self.subtitle_type)
             self.remaining_time = self.total_time
             self.stop_timer = False
-            self.start_time = time.time()
+            self.start_time = time.monotonic()
             
             # 使用tkinter的after方法进行倒计时，避免线程问题
+            self._cancel_countdown()
+            self.draw_button()
             self.countdown()
     
     def hide_subtitle(self):
         """隐藏字幕并停止倒计时"""
         self.stop_timer = True
+        self._cancel_countdown()
         self.vmix.hide_subtitle(self.subtitle_type, auto=False)
         self.is_active = False
         self.draw_button()
@@ -661,23 +3556,466 @@ class SubtitleButton:
     
     def countdown(self):
         """倒计时 - 使用after方法避免卡顿"""
+        self._countdown_job = None
         if self.stop_timer or not self.is_active:
             return
         
-        # 基于实际时间计算剩余时间
-        elapsed = time.time() - self.start_time
-        self.remaining_time = max(0, self.total_time - elapsed)
+        # 字幕已在vMix中被关闭（状态镜像显示上字幕之后叠加层发生了变化且不再是本字幕）：结束倒计时
+        if self.vmix.subtitle_on_air(self.subtitle_type, since=self.start_time) is False:
+            self.hide_subtitle()
+            return
+        
+        # 基于实际时间计算剩余时间
+        elapsed = time.monotonic() - self.start_time
+        self.remaining_time = max(0, self.total_time - elapsed)
+        
+        # 只更新进度条和倒计时文字
+        self.update_progress()
+        
+        if self.remaining_time > 0:
+            # 自适应间隔：显示内容不变时不刷新
+            self._countdown_job = self.canvas.after(self._next_refresh_delay(), self.countdown)
+        else:
+            # 时间到，自动下字幕
+            self.is_active = False
+            self.draw_button()
+
+# ============ 虚拟化卡片网格 ============
+class VirtualCardGrid:
+    """虚拟化卡片网格（换人、红黄牌、进球记录）
+    只为可见行创建卡片控件，滚动时把移出视野的卡片回收复用，
+    删除记录时只重新绑定受影响的可见卡片，不再销毁重建全部卡片
+    view_class: 卡片视图类，需提供 widget、bind(index, item)、set_selected(selected)
+    """
+    
+    def __init__(self, parent, view_class, items=None, columns=7, padding=SPACING['xs'],
+                 on_select=None, on_delete=None):
+        self.view_class = view_class
+        self.items = items if items is not None else []
+        self.columns = columns
+        self.padding = padding  # 卡片之间的间距
+        self.on_select = on_select
+        self.on_delete = on_delete
+        self.selected = None  # 当前选中的记录索引
+        self.row_height = 0  # 行高（由已绑定卡片的实际高度确定）
+        self._views = {}  # 记录索引 -> 当前显示该记录的卡片视图
+        self._pool = []  # 已回收、可复用的卡片视图
+        
+        self.container = Frame(parent, bg=COLORS['bg_card'])
+        self.canvas = Canvas(self.container, bg=COLORS['bg_card'], highlightthickness=0)
+        self.scrollbar = Scrollbar(self.container, orient="vertical", command=self._yview)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.pack(side=LEFT, fill=BOTH, expand=True)
+        self.scrollbar.pack(side=RIGHT, fill=Y)
+        self.canvas.bind("<Configure>", lambda e: self.layout())
+    
+    def _yview(self, *args):
+        """滚动条拖动/点击：滚动后重新分配可见卡片"""
+        self.canvas.yview(*args)
+        self.layout()
+    
+    def reset(self, items):
+        """替换整个数据列表（清空记录时使用）"""
+        self.items = items
+        self.selected = None
+        self.canvas.yview_moveto(0)
+        self.layout()
+    
+    def item_added(self):
+        """数据列表末尾新增了一条记录"""
+        self.layout()
+    
+    def item_removed(self, index):
+        """数据列表中第index条记录已删除（只重新绑定受影响的可见卡片）"""
+        if self.selected is not None:
+            if self.selected == index:
+                self.selected = None
+            elif self.selected > index:
+                self.selected -= 1
+        self.layout()
+    
+    def select(self, index):
+        """选中第index条记录（None表示取消选中）
+        只重绘之前选中的卡片和新选中的卡片（不在可见范围内的卡片复用时再按状态绘制）
+        """
+        previous = self.selected
+        self.selected = index
+        for view_index in (previous, index):
+            view = self._views.get(view_index)
+            if view is not None:
+                self._apply_selected(view, view_index == index)
+    
+    @staticmethod
+    def _apply_selected(view, selected):
+        """只在选中状态变化时更新卡片样式"""
+        if view.is_selected != selected:
+            view.is_selected = selected
+            view.set_selected(selected)
+    
+    def _click(self, view):
+        if self.on_select and view.index is not None:
+            self.on_select(view.index)
+    
+    def _delete(self, view):
+        if self.on_delete and view.index is not None:
+            self.on_delete(view.index)
+    
+    def _acquire_view(self):
+        """从回收池取一个卡片视图，没有则新建"""
+        if self._pool:
+            return self._pool.pop()
+        view = self.view_class(self.canvas, self._click, self._delete)
+        view.window_id = self.canvas.create_window(0, 0, window=view.widget, anchor="nw", state=HIDDEN)
+        return view
+    
+    def _release_view(self, view):
+        """回收卡片视图（隐藏，保留控件以便复用）"""
+        self.canvas.itemconfig(view.window_id, state=HIDDEN)
+        view.index = None
+        view.item = None
+        self._pool.append(view)
+    
+    def layout(self):
+        """按当前滚动位置和尺寸，把卡片分配给可见的记录"""
+        canvas_width = self.canvas.winfo_width()
+        if canvas_width <= 1:
+            canvas_width = self.canvas.winfo_reqwidth()
+        col_width = canvas_width / self.columns
+        count = len(self.items)
+        
+        # 可见范围（行高未知时先按一行估算，绑定后再按实际高度重新布局）
+        row_height = self.row_height or 1
+        rows = -(-count // self.columns)
+        self.canvas.configure(scrollregion=(0, 0, canvas_width, rows * self.row_height))
+        top = self.canvas.canvasy(0)
+        view_height = max(self.canvas.winfo_height(), 1)
+        first = int(top // row_height) * self.columns
+        if self.row_height:
+            last = min(count, (int((top + view_height) // row_height) + 1) * self.columns)
+        else:
+            last = min(count, first + self.columns)
+        
+        # 回收移出可见范围的卡片
+        for index in [i for i in self._views if not first <= i < last]:
+            self._release_view(self._views.pop(index))
+        
+        measured = self.row_height
+        for index in range(first, last):
+            item = self.items[index]
+            view = self._views.get(index)
+            if view is None:
+                view = self._views[index] = self._acquire_view()
+            if view.index != index or view.item is not item:
+                view.index = index
+                view.item = item
+                view.bind(index, item)
+            self._apply_selected(view, index == self.selected)
+            if not self.row_height:
+                view.widget.update_idletasks()
+                measured = max(measured, view.widget.winfo_reqheight() + 2 * self.padding)
+            row, col = divmod(index, self.columns)
+            self.canvas.coords(view.window_id, col * col_width + self.padding,
+                               row * max(self.row_height, measured) + self.padding)
+            size = {'width': max(int(col_width - 2 * self.padding), 1)}
+            if self.row_height:
+                # 同一行的卡片等高（与原Grid布局的sticky="nsew"一致）
+                size['height'] = self.row_height - 2 * self.padding
+            self.canvas.itemconfig(view.window_id, state=NORMAL, **size)
+        
+        if measured != self.row_height:
+            # 第一次得到行高：按实际高度重新计算可见范围
+            self.row_height = measured
+            self.layout()
+
+
+class _CardView:
+    """卡片视图基类：控件只创建一次，bind()时只更新文字和颜色"""
+    
+    def __init__(self, parent, on_click, on_delete):
+        self.index = None
+        self.item = None
+        self.window_id = None
+        self.is_selected = False
+        self._on_click = on_click
+        self._on_delete = on_delete
+        self.widget = self._build(parent)
+        self._bind_click(self.widget)
+    
+    def _build(self, parent):
+        raise NotImplementedError
+    
+    def _bind_click(self, widget):
+        """绑定点击事件（除了删除按钮）"""
+        if not isinstance(widget, Button):
+            widget.bind("<Button-1>", lambda e: self._on_click(self))
+        for child in widget.winfo_children():
+            self._bind_click(child)
+    
+    def _delete_button(self, parent, **options):
+        return Button(parent, text="✕", bg="#DC3545", fg="white", relief=FLAT, cursor="hand2",
+                      bd=0, command=lambda: self._on_delete(self),
+                      activebackground="#C62828", activeforeground="white", **options)
+
+
+class SubCardView(_CardView):
+    """换人记录卡片：(换下球员, 换上球员, 时间)"""
+    
+    highlight_bg = "#BBDEFB"  # 选中时的浅蓝色背景
+    
+    def _build(self, parent):
+        # 选中时需要改为高亮背景的控件（颜色指示条和删除按钮保持原色）
+        self.bg_widgets = []
+        
+        # 卡片样式：现代扁平设计，带边框阴影效果
+        card = Frame(parent, bg=COLORS['bg_card'], relief=FLAT, bd=1,
+                    highlightthickness=1, highlightbackground=COLORS['border'])
+        
+        # 卡片内容容器（紧凑布局）
+        card_content = Frame(card, bg=COLORS['bg_card'], padx=SPACING['sm'], pady=SPACING['xs'])
+        card_content.pack(fill=BOTH, expand=True)
+        
+        # 顶部选中指示条（初始隐藏，通过高度控制显示）
+        self.selected_indicator = Frame(card_content, bg=COLORS['info'], height=0)
+        self.selected_indicator.pack(fill=X, pady=(0, SPACING['xs']))
+        self.selected_indicator.pack_propagate(False)
+        
+        # 顶部：编号和时间（增大字体）
+        top_line = Frame(card_content, bg=COLORS['bg_card'], height=24)
+        top_line.pack(fill=X)
+        top_line.pack_propagate(False)
+        self.index_label = Label(top_line, font=('YaHei', 9, 'bold'),
+                                 bg=COLORS['bg_card'], fg=COLORS['text_muted'])
+        self.index_label.pack(side=LEFT)
+        self.time_label = Label(top_line, font=('YaHei', 8),
+                                bg=COLORS['bg_card'], fg=COLORS['text_muted'])
+        self.time_label.pack(side=RIGHT)
+        self.bg_widgets += [card_content, top_line, self.index_label, self.time_label]
+        
+        # 换下/换上区域（增大字体，使用左侧颜色条）
+        self.out_label = self._build_player_row(card_content, "↓ 换下", "#E53935")
+        self.in_label = self._build_player_row(card_content, "↑ 换上", "#388E3C")
+        
+        # 删除按钮（紧凑，小尺寸）
+        btn_delete = self._delete_button(card_content, font=('Arial', 9, 'bold'),
+                                         padx=SPACING['sm'], pady=SPACING['xs']//2)
+        btn_delete.pack(fill=X, pady=(SPACING['xs'], 0))
+        return card
+    
+    def _build_player_row(self, parent, title, color):
+        row = Frame(parent, bg=COLORS['bg_card'], height=40)
+        row.pack(fill=X, pady=(SPACING['xs']//2, 0))
+        row.pack_propagate(False)
+        
+        # 左侧颜色指示条
+        indicator = Frame(row, bg=color, width=4)
+        indicator.pack(side=LEFT, fill=Y, padx=(0, SPACING['xs']))
+        indicator.pack_propagate(False)
+        
+        info = Frame(row, bg=COLORS['bg_card'])
+        info.pack(side=LEFT, fill=BOTH, expand=True, padx=(0, SPACING['xs']))
+        title_label = Label(info, text=title, font=('YaHei', 8, 'bold'),
+                            bg=COLORS['bg_card'], fg=color, anchor=W)
+        title_label.pack(anchor=W)
+        player_label = Label(info, font=('YaHei', 9), bg=COLORS['bg_card'], fg=COLORS['text_dark'],
+                             anchor=W, wraplength=80, justify=LEFT)
+        player_label.pack(anchor=W, pady=(2, 0))
+        self.bg_widgets += [row, info, title_label, player_label]
+        return player_label
+    
+    def bind(self, index, item):
+        player_out, player_in, timestamp = item
+        self.index_label.config(text=f"#{index+1}")
+        self.time_label.config(text=timestamp)
+        self.out_label.config(text=player_out.info)
+        self.in_label.config(text=player_in.info)
+    
+    def set_selected(self, selected):
+        """更新选中状态（浅蓝色背景 + 深蓝色边框，保持文字清晰）"""
+        if selected:
+            bg = self.highlight_bg
+            self.widget.config(bg=bg, relief=RAISED, bd=3,
+                               highlightthickness=4, highlightbackground="#2196F3")
+            self.selected_indicator.config(height=5, bg="#2196F3")
+        else:
+            bg = COLORS['bg_card']
+            self.widget.config(bg=bg, relief=FLAT, bd=1,
+                               highlightthickness=1, highlightbackground=COLORS['border'])
+            self.selected_indicator.config(height=0)
+        for widget in self.bg_widgets:
+            widget.config(bg=bg)
+
+
+class GoalCardView(SubCardView):
+    """进球记录卡片：(球员, 时间, 主队比分, 客队比分)"""
+    
+    def _build(self, parent):
+        card = Frame(parent, bg=COLORS['bg_card'], relief=FLAT, bd=1,
+                    highlightthickness=1, highlightbackground=COLORS['border'])
+        
+        # 卡片内容容器（紧凑布局）
+        card_content = Frame(card, bg=COLORS['bg_card'], padx=SPACING['sm'], pady=SPACING['xs'])
+        card_content.pack(fill=BOTH, expand=True)
+        
+        # 顶部选中指示条（初始隐藏）
+        self.selected_indicator = Frame(card_content, bg=COLORS['info'], height=0)
+        self.selected_indicator.pack(fill=X, pady=(0, SPACING['xs']))
+        self.selected_indicator.pack_propagate(False)
+        
+        # 顶部：编号和时间（增大字体）
+        top_line = Frame(card_content, bg=COLORS['bg_card'], height=24)
+        top_line.pack(fill=X)
+        top_line.pack_propagate(False)
+        self.index_label = Label(top_line, font=('YaHei', 9, 'bold'),
+                                 bg=COLORS['bg_card'], fg=COLORS['text_muted'])
+        self.index_label.pack(side=LEFT)
+        self.time_label = Label(top_line, font=('YaHei', 8),
+                                bg=COLORS['bg_card'], fg=COLORS['text_muted'])
+        self.time_label.pack(side=RIGHT)
+        
+        # 进球信息区域（使用左侧颜色条）
+        goal_frame = Frame(card_content, bg=COLORS['bg_card'], height=50)
+        goal_frame.pack(fill=X, pady=(SPACING['xs']//2, 0))
+        goal_frame.pack_propagate(False)
+        
+        # 左侧颜色指示条（绿色表示进球）
+        goal_indicator = Frame(goal_frame, bg="#4CAF50", width=4)
+        goal_indicator.pack(side=LEFT, fill=Y, padx=(0, SPACING['xs']))
+        goal_indicator.pack_propagate(False)
+        
+        # 进球信息（显示比分和球员信息）
+        goal_info = Frame(goal_frame, bg=COLORS['bg_card'])
+        goal_info.pack(side=LEFT, fill=BOTH, expand=True, padx=(0, SPACING['xs']))
+        self.score_label = Label(goal_info, font=('YaHei', 9, 'bold'),
+                                 bg=COLORS['bg_card'], fg="#4CAF50", anchor=W)
+        self.score_label.pack(anchor=W)
+        self.player_label = Label(goal_info, font=('YaHei', 9), bg=COLORS['bg_card'],
+                                  fg=COLORS['text_dark'], anchor=W, wraplength=80, justify=LEFT)
+        self.player_label.pack(anchor=W, pady=(2, 0))
+        
+        # 选中时需要改为高亮背景的控件（颜色指示条和删除按钮保持原色）
+        self.bg_widgets = [card_content, top_line, self.index_label, self.time_label,
+                           goal_frame, goal_info, self.score_label, self.player_label]
+        
+        # 删除按钮（紧凑，小尺寸）
+        btn_delete = self._delete_button(card_content, font=('Arial', 9, 'bold'),
+                                         padx=SPACING['sm'], pady=SPACING['xs']//2)
+        btn_delete.pack(fill=X, pady=(SPACING['xs'], 0))
+        return card
+    
+    def bind(self, index, item):
+        # 兼容旧数据格式（没有比分信息）
+        if len(item) >= 4:
+            player_info, timestamp, score_home, score_away = item
+        else:
+            player_info, timestamp = item
+            score_home, score_away = 0, 0
+        self.index_label.config(text=f"#{index+1}")
+        self.time_label.config(text=timestamp)
+        # 显示比分而不是"进球"
+        self.score_label.config(text=f"⚽ {score_home}:{score_away}")
+        self.player_label.config(text=player_info.info)
+
+
+class CardRedView(_CardView):
+    """红黄牌记录卡片：(球员, 牌类型, 时间)"""
+    
+    # 牌类型 -> (牌颜色, 浅色背景, 文字颜色)
+    CARD_STYLES = {
+        "红牌": ("#E53935", "#FFCDD2", "#C62828"),
+        "黄牌": ("#F9A825", "#FFF9C4", "#F57F17"),
+    }
+    
+    def _build(self, parent):
+        card_bg = COLORS['bg_card']
+        card = Frame(parent, bg=card_bg, relief=FLAT, bd=1,
+                    highlightthickness=2, highlightbackground=COLORS['border'])
+        
+        # 卡片内容容器
+        card_content = Frame(card, bg=card_bg)
+        card_content.pack(fill=BOTH, expand=True, padx=0, pady=0)
+        
+        # 顶部选中指示条（初始隐藏，选中时显示）
+        self.selected_indicator = Frame(card_content, bg=COLORS['info'], height=0)
+        self.selected_indicator.pack(fill=X)
+        self.selected_indicator.pack_propagate(False)
+        
+        # === 顶部：牌类型标签区域（使用牌的颜色作为背景） ===
+        self.card_header = Frame(card_content, height=28)
+        self.card_header.pack(fill=X)
+        self.card_header.pack_propagate(False)
+        
+        # 左侧：牌类型图标和文字
+        self.header_left = Frame(self.card_header)
+        self.header_left.pack(side=LEFT, fill=Y, padx=(SPACING['sm'], 0), pady=SPACING['xs'])
+        self.icon_label = Label(self.header_left, text="■", font=('Microsoft YaHei UI', 12, 'bold'),
+                                fg=COLORS['text_light'])
+        self.icon_label.pack(side=LEFT, padx=(0, 2))
+        self.type_label = Label(self.header_left, font=('Microsoft YaHei UI', 9, 'bold'),
+                                fg=COLORS['text_light'])
+        self.type_label.pack(side=LEFT)
+        
+        # 右侧：序号标签
+        self.header_right = Frame(self.card_header)
+        self.header_right.pack(side=RIGHT, fill=Y, padx=(0, SPACING['sm']), pady=SPACING['xs'])
+        self.index_label = Label(self.header_right, font=('Microsoft YaHei UI', 8),
+                                 fg=COLORS['text_light'], padx=4, pady=1)
+        self.index_label.pack()
         
-        # 更新显示
-        self.draw_button()
+        # === 中间：球员信息区域（使用浅色背景突出显示） ===
+        self.player_frame = Frame(card_content)
+        self.player_frame.pack(fill=BOTH, expand=True, padx=0, pady=0)
         
-        if self.remaining_time > 0:
-            # 使用常量定义的更新间隔
-            self.canvas.after(UI_UPDATE_INTERVALS['COUNTDOWN'], self.countdown)
+        # 球员号码（大号显示）和姓名（小号显示）
+        self.number_label = Label(self.player_frame, font=('Microsoft YaHei UI', 16, 'bold'))
+        self.number_label.pack(pady=(SPACING['md'], SPACING['xs']))
+        self.name_label = Label(self.player_frame, font=('Microsoft YaHei UI', 9),
+                                fg=COLORS['text_dark'], wraplength=100)
+        self.name_label.pack(pady=(0, SPACING['md']))
+        
+        # === 底部：时间和删除按钮区域 ===
+        bottom_frame = Frame(card_content, bg=card_bg, height=24)
+        bottom_frame.pack(fill=X, side=BOTTOM)
+        bottom_frame.pack_propagate(False)
+        
+        # 左侧：时间
+        time_frame = Frame(bottom_frame, bg=card_bg)
+        time_frame.pack(side=LEFT, fill=Y, padx=(SPACING['sm'], 0), pady=SPACING['xs'])
+        self.time_label = Label(time_frame, font=('Microsoft YaHei UI', 7),
+                                bg=card_bg, fg=COLORS['text_muted'])
+        self.time_label.pack()
+        
+        # 右侧：删除按钮（小图标样式）
+        delete_frame = Frame(bottom_frame, bg=card_bg)
+        delete_frame.pack(side=RIGHT, fill=Y, padx=(0, SPACING['xs']), pady=2)
+        btn_delete = self._delete_button(delete_frame, font=('Arial', 8, 'bold'),
+                                         padx=4, pady=1, width=3, height=1)
+        btn_delete.pack()
+        return card
+    
+    def bind(self, index, item):
+        player_info, card_type, timestamp = item
+        card_color, card_color_light, card_text_color = self.CARD_STYLES.get(card_type, self.CARD_STYLES["黄牌"])
+        for widget in (self.card_header, self.header_left, self.header_right,
+                       self.icon_label, self.type_label, self.index_label):
+            widget.config(bg=card_color)
+        self.type_label.config(text=card_type)
+        self.index_label.config(text=f"#{index+1}")
+        self.player_frame.config(bg=card_color_light)
+        # 球员记录中已解析好号码和姓名
+        self.number_label.config(text=player_info.fields[0], bg=card_color_light, fg=card_text_color)
+        self.name_label.config(text=player_info.name, bg=card_color_light)
+        self.time_label.config(text=timestamp)
+    
+    def set_selected(self, selected):
+        """更新选中状态（深蓝色边框 + 顶部蓝色指示条）"""
+        if selected:
+            self.widget.config(relief=RAISED, bd=2, highlightthickness=3, highlightbackground="#2196F3")
+            self.selected_indicator.config(height=4, bg="#2196F3")
         else:
-            # 时间到，自动下字幕
-            self.is_active = False
-            self.draw_button()
+            self.widget.config(bg=COLORS['bg_card'], relief=FLAT, bd=1,
+                               highlightthickness=2, highlightbackground=COLORS['border'])
+            self.selected_indicator.config(height=0, bg=COLORS['info'])
+
 
 class MY_GUI():
     def __init__(self,init_window_name):
@@ -693,6 +4031,17 @@ class MY_GUI():
         teamname_home = self.vmix.team_name_home
         teamname_away = self.vmix.team_name_away
         
+        # 名单有多个分组时，按配置切换到当前使用的分组
+        for roster, squad in ((home_roster, self.vmix.home_squad), (away_roster, self.vmix.away_squad)):
+            if squad and not roster.set_squad(squad):
+                log.warning(f"✗ 名单中没有分组 [{squad}]，使用 [{roster.active_squad}]")
+        
+        # 比赛引擎（比分、场次和各类记录，不依赖界面），界面只订阅它的事件
+        self.engine = MatchEngine({'home': home_roster, 'away': away_roster},
+                                  teamname_home, teamname_away, self.team_home_color, self.team_away_color)
+        # 比赛日志、CSV数据源、共享状态文件、推送服务和直连标题都作为引擎的观察者
+        self.outputs = MatchOutputs(self.engine, self.vmix)
+        
         # 使用StringVar实现球队名称的动态更新
         self.home_name_var = StringVar(value=f"[主队]{teamname_home}")
         self.away_name_var = StringVar(value=f"[客队]{teamname_away}")
@@ -704,14 +4053,15 @@ class MY_GUI():
         self.home_color_labels = []
         self.away_color_labels = []
         
-        # vMix连接管理相关变量
-        self.is_first_connect_attempt = True  # 标记是否是首次连接尝试
-        self.reconnect_attempt_count = 0  # 重连尝试次数
+        # vMix连接管理相关变量（断开后的自动重连由VmixController在后台进行）
         self.last_connected_state = False  # 上一次的连接状态
-        self.should_auto_reconnect = True  # 是否应该自动重连（弹窗后设为False，手动连接后重置）
-        self.has_alerted_disconnect = False  # 是否已经弹窗提醒过断开（避免重复弹窗）
+        self.is_connecting = False  # 是否正在后台连接（避免重复发起连接）
+        
+        # 后台线程投递到Tk主线程的回调队列（由after定时轮询执行）
+        self._ui_queue = queue.Queue()
     #设置窗口
-    def set_init_window(self):
+    def set_init_window(self, startup=None):
+        startup = startup or StartupTimer()
         # 生成版本号：V + 年月日时分 (例如 V202511110055)
         version = datetime.now().strftime("V%Y%m%d%H%M")
         self.init_window_name.title(f"足球比赛字幕控制系统 {version}")
@@ -743,7 +4093,7 @@ class MY_GUI():
                     self.init_window_name.iconbitmap('app.ico')
         except Exception as e:
             # 如果设置图标失败，不影响程序运行
-            print(f"提示: 无法设置窗口图标 ({e})")
+            log.warning(f"提示: 无法设置窗口图标 ({e})")
         
         self.sessionVar = StringVar()
         self.sessionVar.set("上半场")
@@ -754,6 +4104,9 @@ class MY_GUI():
         self.scoreAwayVar = IntVar()
         self.scoreAwayVar.set(0)
 
+        # 开始轮询后台线程投递的回调（需在自动连接之前启动）
+        self._process_ui_queue()
+        
         # === 底部状态栏（首先创建，确保在最底层） ===
         self.create_status_bar()
         
@@ -762,6 +4115,7 @@ class MY_GUI():
             if hasattr(self, 'status_frame'):
                 self.status_frame.lift()
         self.init_window_name.bind('<Configure>', on_window_configure)
+        startup.mark('status_bar')
         
         # 创建主容器：使用Grid布局实现响应式
         main_container = Frame(self.init_window_name, bg=COLORS['bg_main'])
@@ -856,6 +4210,8 @@ class MY_GUI():
                         lambda: self.show_panel('vmix'), 2, 0)
         create_menu_card(menu_buttons_frame, "球队设置", "[设置]", "#FFF3E0", 
                         lambda: self.show_panel('team_settings'), 2, 1)
+        create_menu_card(menu_buttons_frame, "性能诊断", "[诊断]", "#F3E5F5", 
+                        lambda: self.show_panel('diagnostics'), 3, 0)
 
         # === 右侧：内容显示区域 ===
         right_panel = Frame(main_container, bg=COLORS['bg_main'])
@@ -863,35 +4219,306 @@ class MY_GUI():
         right_panel.grid_rowconfigure(0, weight=1)
         right_panel.grid_columnconfigure(0, weight=1)
         
-        self.right_content = Frame(right_panel, bg=COLORS['bg_card'], relief=FLAT, bd=0, highlightthickness=1, highlightbackground=COLORS['border'])
-        self.right_content.grid(row=0, column=0, sticky="nsew")
-
-        # 创建各个内容面板（统一高度约束）
-        self.frame_player_list = Frame(self.right_content, bg=COLORS['bg_card'])
-        self.frame_sub = Frame(self.right_content, bg=COLORS['bg_card'])
-        self.frame_red_yellow_card = Frame(self.right_content, bg=COLORS['bg_card'])
-        self.frame_goal = Frame(self.right_content, bg=COLORS['bg_card'])
-        self.frame_vmix_config = Frame(self.right_content, bg=COLORS['bg_card'])
-        self.frame_team_settings = Frame(self.right_content, bg=COLORS['bg_card'])
+        self.right_content = Frame(right_panel, bg=COLORS['bg_card'], relief=FLAT, bd=0, highlightthickness=1, highlightbackground=COLORS['border'])
+        self.right_content.grid(row=0, column=0, sticky="nsew")
+
+        # 创建各个内容面板（统一高度约束）
+        self.frame_player_list = Frame(self.right_content, bg=COLORS['bg_card'])
+        self.frame_sub = Frame(self.right_content, bg=COLORS['bg_card'])
+        self.frame_red_yellow_card = Frame(self.right_content, bg=COLORS['bg_card'])
+        self.frame_goal = Frame(self.right_content, bg=COLORS['bg_card'])
+        self.frame_vmix_config = Frame(self.right_content, bg=COLORS['bg_card'])
+        self.frame_team_settings = Frame(self.right_content, bg=COLORS['bg_card'])
+        self.frame_diagnostics = Frame(self.right_content, bg=COLORS['bg_card'])
+        
+        # 确保所有面板都能正确填充可用空间
+        for frame in [self.frame_player_list, self.frame_sub, self.frame_red_yellow_card, 
+                     self.frame_goal, self.frame_vmix_config, self.frame_team_settings,
+                     self.frame_diagnostics]:
+            frame.grid_rowconfigure(0, weight=1)
+            frame.grid_columnconfigure(0, weight=1)
+
+        # 默认显示球队名单面板
+        self.frame_player_list.pack(fill=BOTH, expand=True)
+
+        # 记分板直接放在左上
+        self.frame_scoreboard = scoreboard_container
+
+        # 当前显示的面板
+        self.current_panel = self.frame_player_list
+
+        # 各内容面板在第一次显示时才创建（启动时只创建默认显示的名单面板），其余面板在空闲时预先创建
+        self._panel_builders = {
+            'player_list': self._build_player_list_panel,
+            'sub': self._build_sub_panel,
+            'cards': self._build_card_panel,
+            'goal': self._build_goal_panel,
+            'vmix': self._build_vmix_panel,
+            'team_settings': self._build_team_settings_panel,
+            'diagnostics': self._build_diagnostics_panel,
+        }
+        self._built_panels = set()
+        self._last_published = {}  # 各类记录最后发布的 (team, record)，面板创建时同步预览
+        startup.mark('layout')
+        self.build_panel('player_list')
+        startup.mark('player_list')
+
+        '''记分板'''
+        # 配置记分板Grid布局（已删除标题横幅和独立控制区域）
+        self.frame_scoreboard.grid_rowconfigure(0, weight=1)  # 比分显示（包含控制按钮）
+        self.frame_scoreboard.grid_rowconfigure(1, weight=0)  # 场次选择
+        self.frame_scoreboard.grid_columnconfigure(0, weight=1)
+        
+        # 比分显示区域 - 使用卡片式设计
+        score_display_container = Frame(self.frame_scoreboard, bg=COLORS['bg_main'])
+        score_display_container.grid(row=0, column=0, sticky="nsew", pady=SPACING['sm'], padx=SPACING['md'])
+        score_display_container.grid_columnconfigure(0, weight=1)
+        score_display_container.grid_columnconfigure(1, weight=0)
+        score_display_container.grid_columnconfigure(2, weight=1)
+        score_display_container.grid_rowconfigure(0, weight=1)
+        
+        # 主队卡片
+        home_card = Frame(score_display_container, bg=COLORS['bg_card'], relief=RAISED, bd=2,
+                         highlightthickness=0)
+        home_card.grid(row=0, column=0, sticky="nsew", padx=(0, SPACING['xs']))
+        
+        # 主队颜色条
+        home_color_bar = Frame(home_card, bg=self.team_home_color, height=6)
+        home_color_bar.pack(fill=X)
+        self.home_color_labels.append(home_color_bar)
+        
+        # 主队内容 - 使用pack顺序控制布局
+        home_content = Frame(home_card, bg=COLORS['bg_card'])
+        home_content.pack(fill=BOTH, expand=True, padx=SPACING['md'], pady=SPACING['md'])
+        
+        Label(home_content, text="主队", font=FONTS['small'], 
+              bg=COLORS['bg_card'], fg=COLORS['text_muted']).pack()
+        
+        Label(home_content, textvariable=self.scoreboard_home_name_var, font=FONTS['subheading'], 
+              bg=COLORS['bg_card'], fg=COLORS['text_dark']).pack(pady=(0, SPACING['sm']))
+        
+        self.scoreboard_home_score_title = Label(home_content, textvariable=self.scoreHomeVar,
+                                                 font=FONTS['score'], bg=COLORS['bg_card'], 
+                                                 fg=self.team_home_color)
+        self.scoreboard_home_score_title.pack(expand=True)  # 占据中间空间
+        self.home_color_labels.append(self.scoreboard_home_score_title)
+        
+        # 主队比分控制按钮 - 放在卡片底部（加按钮70%，减按钮30%，高度一致）
+        home_btn_frame = Frame(home_content, bg=COLORS['bg_card'])
+        home_btn_frame.pack(side=BOTTOM, fill=X, pady=(SPACING['xs'], 0))
+        home_btn_frame.grid_columnconfigure(0, weight=7)  # 加按钮占70%
+        home_btn_frame.grid_columnconfigure(1, weight=3)  # 减按钮占30%
+        
+        self.scoreboard_home_scoreplus_button = Button(home_btn_frame, text="+1", 
+                                                       bg=COLORS['success'], fg='black',
+                                                       font=FONTS['body'], relief=FLAT, cursor="hand2",
+                                                       pady=SPACING['sm'], bd=0,
+                                                       command=self.scoreboard_home_scoreplus,
+                                                       activebackground=COLORS['success'],
+                                                       activeforeground='black')
+        self.scoreboard_home_scoreplus_button.grid(row=0, column=0, sticky="ew", padx=(0, SPACING['xs']))
+        
+        self.scoreboard_home_scoreminus_button = Button(home_btn_frame, text="-1",
+                                                        bg=COLORS['danger'], fg='black',
+                                                        font=FONTS['body'], relief=FLAT, cursor="hand2",
+                                                        pady=SPACING['sm'], bd=0,
+                                                        command=self.scoreboard_home_scoreminus,
+                                                        activebackground=COLORS['danger'],
+                                                        activeforeground='black')
+        self.scoreboard_home_scoreminus_button.grid(row=0, column=1, sticky="ew")
+        
+        # VS 分隔符 - 更大更明显
+        vs_frame = Frame(score_display_container, bg=COLORS['bg_main'], width=50)
+        vs_frame.grid(row=0, column=1, sticky="nsew", padx=SPACING['xs'])
+        vs_frame.grid_propagate(False)
+        
+        vs_label = Label(vs_frame, text="VS", font=FONTS['title'], 
+              bg=COLORS['bg_main'], fg=COLORS['text_muted'])
+        vs_label.pack(expand=True)
+        
+        # 客队卡片
+        away_card = Frame(score_display_container, bg=COLORS['bg_card'], relief=RAISED, bd=2,
+                         highlightthickness=0)
+        away_card.grid(row=0, column=2, sticky="nsew", padx=(SPACING['xs'], 0))
+        
+        # 客队颜色条
+        away_color_bar = Frame(away_card, bg=self.team_away_color, height=6)
+        away_color_bar.pack(fill=X)
+        self.away_color_labels.append(away_color_bar)
+        
+        # 客队内容 - 使用pack顺序控制布局
+        away_content = Frame(away_card, bg=COLORS['bg_card'])
+        away_content.pack(fill=BOTH, expand=True, padx=SPACING['md'], pady=SPACING['md'])
+        
+        Label(away_content, text="客队", font=FONTS['small'], 
+              bg=COLORS['bg_card'], fg=COLORS['text_muted']).pack()
+        
+        Label(away_content, textvariable=self.scoreboard_away_name_var, font=FONTS['subheading'], 
+              bg=COLORS['bg_card'], fg=COLORS['text_dark']).pack(pady=(0, SPACING['sm']))
+        
+        self.scoreboard_away_score_title = Label(away_content, textvariable=self.scoreAwayVar,
+                                                 font=FONTS['score'], bg=COLORS['bg_card'], 
+                                                 fg=self.team_away_color)
+        self.scoreboard_away_score_title.pack(expand=True)  # 占据中间空间
+        self.away_color_labels.append(self.scoreboard_away_score_title)
+        
+        # 客队比分控制按钮 - 放在卡片底部（加按钮70%，减按钮30%，高度一致）
+        away_btn_frame = Frame(away_content, bg=COLORS['bg_card'])
+        away_btn_frame.pack(side=BOTTOM, fill=X, pady=(SPACING['xs'], 0))
+        away_btn_frame.grid_columnconfigure(0, weight=7)  # 加按钮占70%
+        away_btn_frame.grid_columnconfigure(1, weight=3)  # 减按钮占30%
+        
+        self.scoreboard_away_scoreplus_button = Button(away_btn_frame, text="+1",
+                                                       bg=COLORS['success'], fg='black',
+                                                       font=FONTS['body'], relief=FLAT, cursor="hand2",
+                                                       pady=SPACING['sm'], bd=0,
+                                                       command=self.scoreboard_away_scoreplus,
+                                                       activebackground=COLORS['success'],
+                                                       activeforeground='black')
+        self.scoreboard_away_scoreplus_button.grid(row=0, column=0, sticky="ew", padx=(0, SPACING['xs']))
+        
+        self.scoreboard_away_scoreminus_button = Button(away_btn_frame, text="-1",
+                                                        bg=COLORS['danger'], fg='black',
+                                                        font=FONTS['body'], relief=FLAT, cursor="hand2",
+                                                        pady=SPACING['sm'], bd=0,
+                                                        command=self.scoreboard_away_scoreminus,
+                                                        activebackground=COLORS['danger'],
+                                                        activeforeground='black')
+        self.scoreboard_away_scoreminus_button.grid(row=0, column=1, sticky="ew")
+        
+        # 场次显示与选择 - 优化布局，节省空间
+        session_container = Frame(self.frame_scoreboard, bg=COLORS['bg_main'])
+        session_container.grid(row=1, column=0, sticky="ew", padx=SPACING['md'], pady=(SPACING['xs'], SPACING['sm']))
+        
+        # 紧凑布局：场次选择按钮（取消预览文字，通过按钮高亮显示）
+        session_row = Frame(session_container, bg=COLORS['bg_card'], relief=FLAT, bd=1)
+        session_row.pack(fill=X)
+        
+        # 场次选择按钮 - 单行紧凑布局，选中状态高亮显示
+        session_buttons = Frame(session_row, bg=COLORS['bg_card'])
+        session_buttons.pack(side=LEFT, fill=X, expand=True, padx=SPACING['sm'], pady=SPACING['xs'])
+        session_buttons.grid_columnconfigure(0, weight=1)
+        session_buttons.grid_columnconfigure(1, weight=1)
+        session_buttons.grid_columnconfigure(2, weight=1)
+        session_buttons.grid_columnconfigure(3, weight=1)
+        
+        # 单行排列所有按钮 - 选中时文字为白色，背景为主色调
+        self.scoreboard_session_first_radio = Radiobutton(session_buttons, text="上半场", value="上半场",
+                                                          bg=COLORS['bg_card'], font=FONTS['small'],
+                                                          variable=self.sessionVar, 
+                                                          command=self.scoreboard_session_switch,
+                                                          activebackground=COLORS['bg_card'],
+                                                          indicatoron=0, relief=FLAT, bd=1,
+                                                          selectcolor=COLORS['primary'], 
+                                                          fg=COLORS['text_dark'],
+                                                          activeforeground=COLORS['text_light'],
+                                                          pady=SPACING['xs'], cursor="hand2")
+        self.scoreboard_session_first_radio.grid(row=0, column=0, sticky="ew", padx=(0, SPACING['xs']))
+        
+        self.scoreboard_session_halftime_radio = Radiobutton(session_buttons, text="上半场比分", value="上半场比分",
+                                                             bg=COLORS['bg_card'], font=FONTS['small'],
+                                                             variable=self.sessionVar,
+                                                             command=self.scoreboard_session_switch,
+                                                             activebackground=COLORS['bg_card'],
+                                                             indicatoron=0, relief=FLAT, bd=1,
+                                                             selectcolor=COLORS['primary'],
+                                                             fg=COLORS['text_dark'],
+                                                             activeforeground=COLORS['text_light'],
+                                                             pady=SPACING['xs'], cursor="hand2")
+        self.scoreboard_session_halftime_radio.grid(row=0, column=1, sticky="ew", padx=SPACING['xs'])
+        
+        self.scoreboard_session_second_radio = Radiobutton(session_buttons, text="下半场", value="下半场",
+                                                           bg=COLORS['bg_card'], font=FONTS['small'],
+                                                           variable=self.sessionVar,
+                                                           command=self.scoreboard_session_switch,
+                                                           activebackground=COLORS['bg_card'],
+                                                           indicatoron=0, relief=FLAT, bd=1,
+                                                           selectcolor=COLORS['primary'],
+                                                           fg=COLORS['text_dark'],
+                                                           activeforeground=COLORS['text_light'],
+                                                           pady=SPACING['xs'], cursor="hand2")
+        self.scoreboard_session_second_radio.grid(row=0, column=2, sticky="ew", padx=SPACING['xs'])
+        
+        self.scoreboard_session_fulltime_radio = Radiobutton(session_buttons, text="全场比分", value="全场比分",
+                                                             bg=COLORS['bg_card'], font=FONTS['small'],
+                                                             variable=self.sessionVar,
+                                                             command=self.scoreboard_session_switch,
+                                                             activebackground=COLORS['bg_card'],
+                                                             indicatoron=0, relief=FLAT, bd=1,
+                                                             selectcolor=COLORS['primary'],
+                                                             fg=COLORS['text_dark'],
+                                                             activeforeground=COLORS['text_light'],
+                                                             pady=SPACING['xs'], cursor="hand2")
+        self.scoreboard_session_fulltime_radio.grid(row=0, column=3, sticky="ew", padx=(SPACING['xs'], 0))
+        
+        # 存储所有场次按钮引用，用于更新选中状态的文字颜色
+        self.session_radios = [
+            self.scoreboard_session_first_radio,
+            self.scoreboard_session_halftime_radio,
+            self.scoreboard_session_second_radio,
+            self.scoreboard_session_fulltime_radio
+        ]
+        
+        # 监听sessionVar变化，更新选中状态的文字颜色
+        self.sessionVar.trace('w', self._update_session_button_colors)
+        self._update_session_button_colors()  # 初始化颜色
+        
+        # 重置按钮 - 放在场次选择行右侧
+        self.scoreboard_score_clear_button = Button(session_row, text="重置",
+                                                    bg=COLORS['bg_card'], fg=COLORS['text_dark'],
+                                                    font=FONTS['small'], relief=FLAT, cursor="hand2",
+                                                    pady=SPACING['xs'], padx=SPACING['sm'], bd=1,
+                                                    command=self.scoreboard_score_clear,
+                                                    activebackground=COLORS['bg_hover'])
+        self.scoreboard_score_clear_button.pack(side=RIGHT, padx=(SPACING['xs'], SPACING['sm']), pady=SPACING['xs'])
         
-        # 确保所有面板都能正确填充可用空间
-        for frame in [self.frame_player_list, self.frame_sub, self.frame_red_yellow_card, 
-                     self.frame_goal, self.frame_vmix_config, self.frame_team_settings]:
-            frame.grid_rowconfigure(0, weight=1)
-            frame.grid_columnconfigure(0, weight=1)
-
-        # 默认显示球队名单面板
-        self.frame_player_list.pack(fill=BOTH, expand=True)
-
-        # 记分板直接放在左上
-        self.frame_scoreboard = scoreboard_container
-
-        # 当前显示的面板
-        self.current_panel = self.frame_player_list
-
-        #组件
-
-        '''名单显示'''
+        # 确保初始化时所有球队名称标签的文字颜色正确设置（特别是白色背景时）
+        self._ensure_team_label_colors()
+        startup.mark('scoreboard')
+        
+        # 界面订阅比赛引擎；上次未正常退出时从比赛日志恢复，然后开始记录本场事件
+        self.engine.subscribe(self._on_match_event)
+        self.outputs.recover()
+        self.init_window_name.protocol("WM_DELETE_WINDOW", self.on_closing)
+        startup.mark('recover')
+        
+        # 窗口第一次空闲时（已绘制、可以操作）输出启动耗时，然后开始预先创建其余面板
+        def on_first_idle():
+            startup.report()
+            if UI_UPDATE_INTERVALS['PANEL_PREWARM']:
+                self.init_window_name.after(UI_UPDATE_INTERVALS['PANEL_PREWARM'], self._prewarm_panels)
+        self.init_window_name.after_idle(on_first_idle)
+    
+    def build_panel(self, panel_name):
+        """创建面板（每个面板只创建一次），耗时计入性能统计 panel.<名称>"""
+        if panel_name in self._built_panels:
+            return
+        self._built_panels.add(panel_name)
+        with Metrics.shared().timer(f"panel.{panel_name}"):
+            self._panel_builders[panel_name]()
+            for kind, name in self.KIND_PANELS.items():
+                if name == panel_name:
+                    self._sync_match_panel(kind)
+    
+    def _prewarm_panels(self):
+        """空闲时每次创建一个尚未创建的面板，避免一次占用主线程太久"""
+        for panel_name in self._panel_builders:
+            if panel_name not in self._built_panels:
+                self.build_panel(panel_name)
+                self.init_window_name.after(UI_UPDATE_INTERVALS['PANEL_PREWARM'],
+                                            lambda: self.init_window_name.after_idle(self._prewarm_panels))
+                return
+    
+    def _sync_match_panel(self, kind):
+        """面板创建后同步创建前发生的比赛事件：选中状态和预览区内容（卡片网格直接使用引擎的记录列表）"""
+        for team in MatchEngine.TEAMS:
+            self._match_widget(kind, team, 'grid').select(self.engine.selected_index(kind, team))
+        if kind in self._last_published:
+            team, record = self._last_published[kind]
+            self._on_match_publish(kind, team, record)
+    
+    def _build_player_list_panel(self):
+        """创建球队名单面板"""
         # 配置Grid布局实现左右响应式
         self.frame_player_list.grid_rowconfigure(0, weight=1)
         self.frame_player_list.grid_columnconfigure(0, weight=1)
@@ -927,8 +4554,8 @@ class MY_GUI():
                                 selectbackground=COLORS['info'],
                                 selectforeground=COLORS['text_light'],
                                 yscrollcommand=home_scrollbar.set)
-        for item in home_list:
-            self.list_home.insert(END, item)
+        for player in home_roster.active_players():
+            self.list_home.insert(END, player.info)
         self.list_home.pack(side=LEFT, fill=BOTH, expand=True)
         home_scrollbar.config(command=self.list_home.yview)
         
@@ -962,13 +4589,13 @@ class MY_GUI():
                                 selectbackground=COLORS['accent'],
                                 selectforeground=COLORS['text_light'],
                                 yscrollcommand=away_scrollbar.set)
-        for item in away_list:
-            self.list_away.insert(END, item)
+        for player in away_roster.active_players():
+            self.list_away.insert(END, player.info)
         self.list_away.pack(side=LEFT, fill=BOTH, expand=True)
         away_scrollbar.config(command=self.list_away.yview)
-
-
-        '''换人模块'''
+    
+    def _build_sub_panel(self):
+        """创建换人面板"""
         # 配置Grid布局（取消标题横幅，改为左右布局）
         self.frame_sub.grid_rowconfigure(0, weight=0)  # 上字幕按钮和预览区域（左右布局）
         self.frame_sub.grid_rowconfigure(1, weight=1)  # 主队
@@ -1097,25 +4724,27 @@ class MY_GUI():
         self.sub_home_out_label = self.sub_current_out_label
         self.sub_home_in_label = self.sub_current_in_label
         
+        # 存储换人列表
+        self.sub_away_list = self.engine.records[('sub', 'away')]
+        self.sub_home_list = self.engine.records[('sub', 'home')]
+        
         # 使用统一方法创建主队/客队面板（调整行索引：从3,4改为1,2）
-        frame_sub_home, self.sub_home_entry, self.sub_home_cards_frame = self.create_team_panel(
+        frame_sub_home, self.sub_home_entry, _ = self.create_team_panel(
             self.frame_sub, 1, 'home', "所有记录（点击选择）", "换人编号",
-            cards_frame_attr='sub_home_cards_frame',
+            grid_attr='sub_home_grid', view_class=SubCardView, items=self.sub_home_list,
+            on_select=self.select_sub_card_home, on_delete=self.delete_sub_card_home,
             add_command=self.sub_home_add, clear_command=self.sub_clear_home
         )
         
-        frame_sub_away, self.sub_away_entry, self.sub_away_cards_frame = self.create_team_panel(
+        frame_sub_away, self.sub_away_entry, _ = self.create_team_panel(
             self.frame_sub, 2, 'away', "所有记录（点击选择）", "换人编号",
-            cards_frame_attr='sub_away_cards_frame',
+            grid_attr='sub_away_grid', view_class=SubCardView, items=self.sub_away_list,
+            on_select=self.select_sub_card_away, on_delete=self.delete_sub_card_away,
             add_command=self.sub_away_add, clear_command=self.sub_clear_away
         )
-
-        # 存储换人列表
-        self.sub_away_list = []
-        self.sub_home_list = []
-
-
-        '''红黄牌'''
+    
+    def _build_card_panel(self):
+        """创建红黄牌面板"""
         # 配置Grid布局
         self.frame_red_yellow_card.grid_rowconfigure(0, weight=0)  # 预览区域
         self.frame_red_yellow_card.grid_rowconfigure(1, weight=1)  # 主队
@@ -1221,6 +4850,10 @@ class MY_GUI():
             self.create_button(input_frame, "清空", COLORS['danger'], clear_cmd)
             return entry
         
+        # 存储红黄牌列表
+        self.red_home_list = self.engine.records[('card', 'home')]
+        self.red_away_list = self.engine.records[('card', 'away')]
+        
         # 主队红黄牌面板
         frame_red_home = Frame(self.frame_red_yellow_card, bg=COLORS['bg_card'],
                               highlightthickness=SIZES['border_width'],
@@ -1229,7 +4862,8 @@ class MY_GUI():
         self.red_home_entry = create_card_input_area(frame_red_home, 'home',
                                                     self.red_home_add, self.yellow_home_add, self.red_home_clear)
         self.red_home_current_label = self.red_card_display_label
-        _, _, _ = self.create_scrollable_canvas(frame_red_home, 'red_home_cards_frame')
+        self.create_card_grid(frame_red_home, CardRedView, 'red_home_grid', self.red_home_list,
+                              self.select_card_red_home, self.delete_card_red_home)
         
         # 客队红黄牌面板
         frame_red_away = Frame(self.frame_red_yellow_card, bg=COLORS['bg_card'],
@@ -1239,13 +4873,11 @@ class MY_GUI():
         self.red_away_entry = create_card_input_area(frame_red_away, 'away',
                                                     self.red_away_add, self.yellow_away_add, self.red_away_clear)
         self.red_away_current_label = self.red_card_display_label
-        _, _, _ = self.create_scrollable_canvas(frame_red_away, 'red_away_cards_frame')
-
-        # 存储红黄牌列表
-        self.red_home_list = []
-        self.red_away_list = []
-
-        '''进球信息'''
+        self.create_card_grid(frame_red_away, CardRedView, 'red_away_grid', self.red_away_list,
+                              self.select_card_red_away, self.delete_card_red_away)
+    
+    def _build_goal_panel(self):
+        """创建进球面板"""
         # 配置Grid布局
         self.frame_goal.grid_rowconfigure(0, weight=0)  # 预览区域
         self.frame_goal.grid_rowconfigure(1, weight=1)  # 主队
@@ -1330,6 +4962,10 @@ class MY_GUI():
             self.create_button(input_frame, "清空", COLORS['danger'], clear_cmd)
             return entry
         
+        # 存储进球列表
+        self.goal_home_list = self.engine.records[('goal', 'home')]
+        self.goal_away_list = self.engine.records[('goal', 'away')]
+        
         # 主队进球面板
         frame_goal_home = Frame(self.frame_goal, bg=COLORS['bg_card'],
                                highlightthickness=SIZES['border_width'],
@@ -1337,7 +4973,8 @@ class MY_GUI():
         frame_goal_home.grid(row=1, column=0, sticky="nsew", padx=SPACING['md'], pady=(SPACING['xs'], SPACING['xs']))
         self.goal_home_entry = create_goal_input_area(frame_goal_home, 'home',
                                                       self.goal_home_add, self.goal_home_clear)
-        _, _, _ = self.create_scrollable_canvas(frame_goal_home, 'goal_home_cards_frame')
+        self.create_card_grid(frame_goal_home, GoalCardView, 'goal_home_grid', self.goal_home_list,
+                              self.select_goal_card_home, self.delete_goal_card_home)
         
         # 客队进球面板
         frame_goal_away = Frame(self.frame_goal, bg=COLORS['bg_card'],
@@ -1346,13 +4983,11 @@ class MY_GUI():
         frame_goal_away.grid(row=2, column=0, sticky="nsew", padx=SPACING['md'], pady=(SPACING['xs'], SPACING['md']))
         self.goal_away_entry = create_goal_input_area(frame_goal_away, 'away',
                                                       self.goal_away_add, self.goal_away_clear)
-        _, _, _ = self.create_scrollable_canvas(frame_goal_away, 'goal_away_cards_frame')
-
-        # 存储进球列表
-        self.goal_home_list = []
-        self.goal_away_list = []
-
-        '''vMix配置'''
+        self.create_card_grid(frame_goal_away, GoalCardView, 'goal_away_grid', self.goal_away_list,
+                              self.select_goal_card_away, self.delete_goal_card_away)
+    
+    def _build_vmix_panel(self):
+        """创建vMix设置面板"""
         # 配置Grid布局
         self.frame_vmix_config.grid_rowconfigure(0, weight=0)  # 标题
         self.frame_vmix_config.grid_rowconfigure(1, weight=0)  # 连接配置
@@ -1456,6 +5091,23 @@ class MY_GUI():
         # 进球配置
         self._create_subtitle_config_row(config_container, "[进球]", "goal")
         
+        # 直连标题模式（SetText直接写入GT标题，不依赖数据源轮询）
+        direct_row = Frame(config_container, bg="white", highlightthickness=1, highlightbackground=COLORS['border_light'])
+        direct_row.pack(fill=X, pady=SPACING['xs'])
+        
+        self.vmix_direct_title_var = BooleanVar(value=self.vmix.direct_title)
+        Checkbutton(direct_row, text="直连标题(SetText)", variable=self.vmix_direct_title_var,
+                    font=FONTS['body'], bg="white", fg=COLORS['text_dark'],
+                    activebackground="white", anchor=W).pack(side=LEFT, padx=SPACING['md'], pady=SPACING['sm'])
+        
+        Label(direct_row, text="记分板Input:", font=FONTS['body'], bg="white",
+              fg=COLORS['text_dark']).pack(side=LEFT, padx=(SPACING['md'], 0))
+        self.vmix_scoreboard_input_entry = Entry(direct_row, font=FONTS['input'], relief=FLAT,
+                                                 bg='white', fg='black',
+                                                 highlightthickness=1, highlightbackground=COLORS['border'], width=12)
+        self.vmix_scoreboard_input_entry.pack(side=LEFT, padx=SPACING['md'], ipady=2)
+        self.vmix_scoreboard_input_entry.insert(0, self.vmix.scoreboard_input)
+        
         # 保存按钮
         save_frame = Frame(subtitle_frame, bg=COLORS['bg_card'])
         save_frame.pack(fill=X, padx=SPACING['md'], pady=(SPACING['md'], SPACING['sm']))
@@ -1466,11 +5118,13 @@ class MY_GUI():
         # 说明信息
         info_vmix = Frame(subtitle_frame, bg=COLORS['info'])
         info_vmix.pack(fill=X, pady=(SPACING['md'], 0))
-        Label(info_vmix, text="提示: 配置完成后，在换人和红黄牌预览界面可以直接控制字幕上下",
+        Label(info_vmix, text="提示: 配置完成后，在换人和红黄牌预览界面可以直接控制字幕上下；"
+                              "开启直连标题后数据直接写入标题字段（字段名见config.json的title_fields）",
               font=FONTS['small'], bg=COLORS['info'], fg=COLORS['text_light'],
               padx=SPACING['md'], pady=SPACING['sm']).pack()
-
-        '''球队设置'''
+    
+    def _build_team_settings_panel(self):
+        """创建球队设置面板"""
         # 配置Grid布局
         self.frame_team_settings.grid_rowconfigure(0, weight=0)  # 标题
         self.frame_team_settings.grid_rowconfigure(1, weight=0)  # 球队名称设置
@@ -1535,282 +5189,119 @@ class MY_GUI():
               bg=COLORS['bg_card'], fg=COLORS['text_dark'], width=15, anchor=W).pack(side=LEFT)
         
         self.team_home_color_entry = Entry(home_color_row, font=FONTS['input'], relief=FLAT,
-                                           bg='white', fg='black',
-                                           highlightthickness=SIZES['border_width'],
-                                           highlightbackground=COLORS['border'], width=15)
-        self.team_home_color_entry.pack(side=LEFT, padx=SPACING['sm'], ipady=3)
-        self.team_home_color_entry.insert(0, self.team_home_color)
-        
-        home_preview_text_color = get_contrast_text_color(self.team_home_color)
-        self.team_home_color_preview = Label(home_color_row, text="   预览   ", font=FONTS['body'],
-                                             bg=self.team_home_color, fg=home_preview_text_color, relief=RAISED, padx=SPACING['lg'], pady=SPACING['xs'])
-        self.team_home_color_preview.pack(side=LEFT, padx=SPACING['md'])
-        
-        Button(home_color_row, text="选择颜色", bg=COLORS['secondary'], fg='black',
-               font=FONTS['button'], relief=FLAT, cursor="hand2",
-               padx=SPACING['md'], pady=SPACING['xs'],
-               activeforeground='black',
-               command=lambda: self.choose_team_color('home')).pack(side=LEFT)
-        
-        # 客队颜色
-        away_color_row = Frame(color_frame, bg=COLORS['bg_card'])
-        away_color_row.pack(fill=X, padx=SPACING['md'], pady=SPACING['sm'])
-        
-        Label(away_color_row, text="[客队]颜色:", font=FONTS['body'],
-              bg=COLORS['bg_card'], fg=COLORS['text_dark'], width=15, anchor=W).pack(side=LEFT)
-        
-        self.team_away_color_entry = Entry(away_color_row, font=FONTS['input'], relief=FLAT,
-                                           bg='white', fg='black',
-                                           highlightthickness=SIZES['border_width'],
-                                           highlightbackground=COLORS['border'], width=15)
-        self.team_away_color_entry.pack(side=LEFT, padx=SPACING['sm'], ipady=3)
-        self.team_away_color_entry.insert(0, self.team_away_color)
-        
-        away_preview_text_color = get_contrast_text_color(self.team_away_color)
-        self.team_away_color_preview = Label(away_color_row, text="   预览   ", font=FONTS['body'],
-                                             bg=self.team_away_color, fg=away_preview_text_color, relief=RAISED, padx=SPACING['lg'], pady=SPACING['xs'])
-        self.team_away_color_preview.pack(side=LEFT, padx=SPACING['md'])
-        
-        self.create_button(away_color_row, "选择颜色", COLORS['secondary'],
-                          lambda: self.choose_team_color('away'))
-        
-        # 保存按钮
-        team_save_frame = Frame(self.frame_team_settings, bg=COLORS['bg_card'])
-        team_save_frame.grid(row=3, column=0, sticky="n", pady=SPACING['lg'])
-        
-        self.create_button(team_save_frame, "保存球队设置", COLORS['success'], self.save_team_settings,
-                          padx=SPACING['xl'], pady=SPACING['sm'], side=TOP)
-        
-        # 说明信息
-        info_team = Frame(color_frame, bg=COLORS['info'])
-        info_team.pack(fill=X, pady=(SPACING['md'], 0))
-        Label(info_team, text="提示: 颜色格式为十六进制 如 #3498DB。保存后立即生效",
-              font=FONTS['small'], bg=COLORS['info'], fg=COLORS['text_light'],
-              padx=SPACING['md'], pady=SPACING['sm']).pack()
-        
-        # 右下角：开发信息和反馈提示
-        feedback_frame = Frame(self.frame_team_settings, bg=COLORS['bg_card'])
-        feedback_frame.grid(row=3, column=0, sticky="se", padx=SPACING['lg'], pady=(0, SPACING['lg']))
-        
-        feedback_text = ("本软件由重庆寰网致博体育文化传播有限公司开发\n"
-                        "使用过程中如遇到bug或有更好的建议，欢迎反馈给我们\n"
-                        "可通过手机号 18523999949 添加微信联系我们")
-        feedback_label = Label(feedback_frame, text=feedback_text, font=FONTS['small'],
-                              bg=COLORS['bg_card'], fg=COLORS['text_muted'],
-                              justify=LEFT, anchor=W)
-        feedback_label.pack(anchor=E)
-
-        '''记分板'''
-        # 配置记分板Grid布局（已删除标题横幅和独立控制区域）
-        self.frame_scoreboard.grid_rowconfigure(0, weight=1)  # 比分显示（包含控制按钮）
-        self.frame_scoreboard.grid_rowconfigure(1, weight=0)  # 场次选择
-        self.frame_scoreboard.grid_columnconfigure(0, weight=1)
-        
-        # 比分显示区域 - 使用卡片式设计
-        score_display_container = Frame(self.frame_scoreboard, bg=COLORS['bg_main'])
-        score_display_container.grid(row=0, column=0, sticky="nsew", pady=SPACING['sm'], padx=SPACING['md'])
-        score_display_container.grid_columnconfigure(0, weight=1)
-        score_display_container.grid_columnconfigure(1, weight=0)
-        score_display_container.grid_columnconfigure(2, weight=1)
-        score_display_container.grid_rowconfigure(0, weight=1)
-        
-        # 主队卡片
-        home_card = Frame(score_display_container, bg=COLORS['bg_card'], relief=RAISED, bd=2,
-                         highlightthickness=0)
-        home_card.grid(row=0, column=0, sticky="nsew", padx=(0, SPACING['xs']))
-        
-        # 主队颜色条
-        home_color_bar = Frame(home_card, bg=self.team_home_color, height=6)
-        home_color_bar.pack(fill=X)
-        self.home_color_labels.append(home_color_bar)
-        
-        # 主队内容 - 使用pack顺序控制布局
-        home_content = Frame(home_card, bg=COLORS['bg_card'])
-        home_content.pack(fill=BOTH, expand=True, padx=SPACING['md'], pady=SPACING['md'])
-        
-        Label(home_content, text="主队", font=FONTS['small'], 
-              bg=COLORS['bg_card'], fg=COLORS['text_muted']).pack()
-        
-        Label(home_content, textvariable=self.scoreboard_home_name_var, font=FONTS['subheading'], 
-              bg=COLORS['bg_card'], fg=COLORS['text_dark']).pack(pady=(0, SPACING['sm']))
-        
-        self.scoreboard_home_score_title = Label(home_content, textvariable=self.scoreHomeVar,
-                                                 font=FONTS['score'], bg=COLORS['bg_card'], 
-                                                 fg=self.team_home_color)
-        self.scoreboard_home_score_title.pack(expand=True)  # 占据中间空间
-        self.home_color_labels.append(self.scoreboard_home_score_title)
-        
-        # 主队比分控制按钮 - 放在卡片底部（加按钮70%，减按钮30%，高度一致）
-        home_btn_frame = Frame(home_content, bg=COLORS['bg_card'])
-        home_btn_frame.pack(side=BOTTOM, fill=X, pady=(SPACING['xs'], 0))
-        home_btn_frame.grid_columnconfigure(0, weight=7)  # 加按钮占70%
-        home_btn_frame.grid_columnconfigure(1, weight=3)  # 减按钮占30%
-        
-        self.scoreboard_home_scoreplus_button = Button(home_btn_frame, text="+1", 
-                                                       bg=COLORS['success'], fg='black',
-                                                       font=FONTS['body'], relief=FLAT, cursor="hand2",
-                                                       pady=SPACING['sm'], bd=0,
-                                                       command=self.scoreboard_home_scoreplus,
-                                                       activebackground=COLORS['success'],
-                                                       activeforeground='black')
-        self.scoreboard_home_scoreplus_button.grid(row=0, column=0, sticky="ew", padx=(0, SPACING['xs']))
-        
-        self.scoreboard_home_scoreminus_button = Button(home_btn_frame, text="-1",
-                                                        bg=COLORS['danger'], fg='black',
-                                                        font=FONTS['body'], relief=FLAT, cursor="hand2",
-                                                        pady=SPACING['sm'], bd=0,
-                                                        command=self.scoreboard_home_scoreminus,
-                                                        activebackground=COLORS['danger'],
-                                                        activeforeground='black')
-        self.scoreboard_home_scoreminus_button.grid(row=0, column=1, sticky="ew")
-        
-        # VS 分隔符 - 更大更明显
-        vs_frame = Frame(score_display_container, bg=COLORS['bg_main'], width=50)
-        vs_frame.grid(row=0, column=1, sticky="nsew", padx=SPACING['xs'])
-        vs_frame.grid_propagate(False)
-        
-        vs_label = Label(vs_frame, text="VS", font=FONTS['title'], 
-              bg=COLORS['bg_main'], fg=COLORS['text_muted'])
-        vs_label.pack(expand=True)
-        
-        # 客队卡片
-        away_card = Frame(score_display_container, bg=COLORS['bg_card'], relief=RAISED, bd=2,
-                         highlightthickness=0)
-        away_card.grid(row=0, column=2, sticky="nsew", padx=(SPACING['xs'], 0))
-        
-        # 客队颜色条
-        away_color_bar = Frame(away_card, bg=self.team_away_color, height=6)
-        away_color_bar.pack(fill=X)
-        self.away_color_labels.append(away_color_bar)
-        
-        # 客队内容 - 使用pack顺序控制布局
-        away_content = Frame(away_card, bg=COLORS['bg_card'])
-        away_content.pack(fill=BOTH, expand=True, padx=SPACING['md'], pady=SPACING['md'])
-        
-        Label(away_content, text="客队", font=FONTS['small'], 
-              bg=COLORS['bg_card'], fg=COLORS['text_muted']).pack()
-        
-        Label(away_content, textvariable=self.scoreboard_away_name_var, font=FONTS['subheading'], 
-              bg=COLORS['bg_card'], fg=COLORS['text_dark']).pack(pady=(0, SPACING['sm']))
-        
-        self.scoreboard_away_score_title = Label(away_content, textvariable=self.scoreAwayVar,
-                                                 font=FONTS['score'], bg=COLORS['bg_card'], 
-                                                 fg=self.team_away_color)
-        self.scoreboard_away_score_title.pack(expand=True)  # 占据中间空间
-        self.away_color_labels.append(self.scoreboard_away_score_title)
-        
-        # 客队比分控制按钮 - 放在卡片底部（加按钮70%，减按钮30%，高度一致）
-        away_btn_frame = Frame(away_content, bg=COLORS['bg_card'])
-        away_btn_frame.pack(side=BOTTOM, fill=X, pady=(SPACING['xs'], 0))
-        away_btn_frame.grid_columnconfigure(0, weight=7)  # 加按钮占70%
-        away_btn_frame.grid_columnconfigure(1, weight=3)  # 减按钮占30%
-        
-        self.scoreboard_away_scoreplus_button = Button(away_btn_frame, text="+1",
-                                                       bg=COLORS['success'], fg='black',
-                                                       font=FONTS['body'], relief=FLAT, cursor="hand2",
-                                                       pady=SPACING['sm'], bd=0,
-                                                       command=self.scoreboard_away_scoreplus,
-                                                       activebackground=COLORS['success'],
-                                                       activeforeground='black')
-        self.scoreboard_away_scoreplus_button.grid(row=0, column=0, sticky="ew", padx=(0, SPACING['xs']))
-        
-        self.scoreboard_away_scoreminus_button = Button(away_btn_frame, text="-1",
-                                                        bg=COLORS['danger'], fg='black',
-                                                        font=FONTS['body'], relief=FLAT, cursor="hand2",
-                                                        pady=SPACING['sm'], bd=0,
-                                                        command=self.scoreboard_away_scoreminus,
-                                                        activebackground=COLORS['danger'],
-                                                        activeforeground='black')
-        self.scoreboard_away_scoreminus_button.grid(row=0, column=1, sticky="ew")
+                                           bg='white', fg='black',
+                                           highlightthickness=SIZES['border_width'],
+                                           highlightbackground=COLORS['border'], width=15)
+        self.team_home_color_entry.pack(side=LEFT, padx=SPACING['sm'], ipady=3)
+        self.team_home_color_entry.insert(0, self.team_home_color)
         
-        # 场次显示与选择 - 优化布局，节省空间
-        session_container = Frame(self.frame_scoreboard, bg=COLORS['bg_main'])
-        session_container.grid(row=1, column=0, sticky="ew", padx=SPACING['md'], pady=(SPACING['xs'], SPACING['sm']))
+        home_preview_text_color = get_contrast_text_color(self.team_home_color)
+        self.team_home_color_preview = Label(home_color_row, text="   预览   ", font=FONTS['body'],
+                                             bg=self.team_home_color, fg=home_preview_text_color, relief=RAISED, padx=SPACING['lg'], pady=SPACING['xs'])
+        self.team_home_color_preview.pack(side=LEFT, padx=SPACING['md'])
         
-        # 紧凑布局：场次选择按钮（取消预览文字，通过按钮高亮显示）
-        session_row = Frame(session_container, bg=COLORS['bg_card'], relief=FLAT, bd=1)
-        session_row.pack(fill=X)
+        Button(home_color_row, text="选择颜色", bg=COLORS['secondary'], fg='black',
+               font=FONTS['button'], relief=FLAT, cursor="hand2",
+               padx=SPACING['md'], pady=SPACING['xs'],
+               activeforeground='black',
+               command=lambda: self.choose_team_color('home')).pack(side=LEFT)
         
-        # 场次选择按钮 - 单行紧凑布局，选中状态高亮显示
-        session_buttons = Frame(session_row, bg=COLORS['bg_card'])
-        session_buttons.pack(side=LEFT, fill=X, expand=True, padx=SPACING['sm'], pady=SPACING['xs'])
-        session_buttons.grid_columnconfigure(0, weight=1)
-        session_buttons.grid_columnconfigure(1, weight=1)
-        session_buttons.grid_columnconfigure(2, weight=1)
-        session_buttons.grid_columnconfigure(3, weight=1)
+        # 客队颜色
+        away_color_row = Frame(color_frame, bg=COLORS['bg_card'])
+        away_color_row.pack(fill=X, padx=SPACING['md'], pady=SPACING['sm'])
         
-        # 单行排列所有按钮 - 选中时文字为白色，背景为主色调
-        self.scoreboard_session_first_radio = Radiobutton(session_buttons, text="上半场", value="上半场",
-                                                          bg=COLORS['bg_card'], font=FONTS['small'],
-                                                          variable=self.sessionVar, 
-                                                          command=self.scoreboard_session_switch,
-                                                          activebackground=COLORS['bg_card'],
-                                                          indicatoron=0, relief=FLAT, bd=1,
-                                                          selectcolor=COLORS['primary'], 
-                                                          fg=COLORS['text_dark'],
-                                                          activeforeground=COLORS['text_light'],
-                                                          pady=SPACING['xs'], cursor="hand2")
-        self.scoreboard_session_first_radio.grid(row=0, column=0, sticky="ew", padx=(0, SPACING['xs']))
+        Label(away_color_row, text="[客队]颜色:", font=FONTS['body'],
+              bg=COLORS['bg_card'], fg=COLORS['text_dark'], width=15, anchor=W).pack(side=LEFT)
         
-        self.scoreboard_session_halftime_radio = Radiobutton(session_buttons, text="上半场比分", value="上半场比分",
-                                                             bg=COLORS['bg_card'], font=FONTS['small'],
-                                                             variable=self.sessionVar,
-                                                             command=self.scoreboard_session_switch,
-                                                             activebackground=COLORS['bg_card'],
-                                                             indicatoron=0, relief=FLAT, bd=1,
-                                                             selectcolor=COLORS['primary'],
-                                                             fg=COLORS['text_dark'],
-                                                             activeforeground=COLORS['text_light'],
-                                                             pady=SPACING['xs'], cursor="hand2")
-        self.scoreboard_session_halftime_radio.grid(row=0, column=1, sticky="ew", padx=SPACING['xs'])
+        self.team_away_color_entry = Entry(away_color_row, font=FONTS['input'], relief=FLAT,
+                                           bg='white', fg='black',
+                                           highlightthickness=SIZES['border_width'],
+                                           highlightbackground=COLORS['border'], width=15)
+        self.team_away_color_entry.pack(side=LEFT, padx=SPACING['sm'], ipady=3)
+        self.team_away_color_entry.insert(0, self.team_away_color)
         
-        self.scoreboard_session_second_radio = Radiobutton(session_buttons, text="下半场", value="下半场",
-                                                           bg=COLORS['bg_card'], font=FONTS['small'],
-                                                           variable=self.sessionVar,
-                                                           command=self.scoreboard_session_switch,
-                                                           activebackground=COLORS['bg_card'],
-                                                           indicatoron=0, relief=FLAT, bd=1,
-                                                           selectcolor=COLORS['primary'],
-                                                           fg=COLORS['text_dark'],
-                                                           activeforeground=COLORS['text_light'],
-                                                           pady=SPACING['xs'], cursor="hand2")
-        self.scoreboard_session_second_radio.grid(row=0, column=2, sticky="ew", padx=SPACING['xs'])
+        away_preview_text_color = get_contrast_text_color(self.team_away_color)
+        self.team_away_color_preview = Label(away_color_row, text="   预览   ", font=FONTS['body'],
+                                             bg=self.team_away_color, fg=away_preview_text_color, relief=RAISED, padx=SPACING['lg'], pady=SPACING['xs'])
+        self.team_away_color_preview.pack(side=LEFT, padx=SPACING['md'])
         
-        self.scoreboard_session_fulltime_radio = Radiobutton(session_buttons, text="全场比分", value="全场比分",
-                                                             bg=COLORS['bg_card'], font=FONTS['small'],
-                                                             variable=self.sessionVar,
-                                                             command=self.scoreboard_session_switch,
-                                                             activebackground=COLORS['bg_card'],
-                                                             indicatoron=0, relief=FLAT, bd=1,
-                                                             selectcolor=COLORS['primary'],
-                                                             fg=COLORS['text_dark'],
-                                                             activeforeground=COLORS['text_light'],
-                                                             pady=SPACING['xs'], cursor="hand2")
-        self.scoreboard_session_fulltime_radio.grid(row=0, column=3, sticky="ew", padx=(SPACING['xs'], 0))
+        self.create_button(away_color_row, "选择颜色", COLORS['secondary'],
+                          lambda: self.choose_team_color('away'))
         
-        # 存储所有场次按钮引用，用于更新选中状态的文字颜色
-        self.session_radios = [
-            self.scoreboard_session_first_radio,
-            self.scoreboard_session_halftime_radio,
-            self.scoreboard_session_second_radio,
-            self.scoreboard_session_fulltime_radio
-        ]
+        # 保存按钮
+        team_save_frame = Frame(self.frame_team_settings, bg=COLORS['bg_card'])
+        team_save_frame.grid(row=3, column=0, sticky="n", pady=SPACING['lg'])
         
-        # 监听sessionVar变化，更新选中状态的文字颜色
-        self.sessionVar.trace('w', self._update_session_button_colors)
-        self._update_session_button_colors()  # 初始化颜色
+        self.create_button(team_save_frame, "保存球队设置", COLORS['success'], self.save_team_settings,
+                          padx=SPACING['xl'], pady=SPACING['sm'], side=TOP)
         
-        # 重置按钮 - 放在场次选择行右侧
-        self.scoreboard_score_clear_button = Button(session_row, text="重置",
-                                                    bg=COLORS['bg_card'], fg=COLORS['text_dark'],
-                                                    font=FONTS['small'], relief=FLAT, cursor="hand2",
-                                                    pady=SPACING['xs'], padx=SPACING['sm'], bd=1,
-                                                    command=self.scoreboard_score_clear,
-                                                    activebackground=COLORS['bg_hover'])
-        self.scoreboard_score_clear_button.pack(side=RIGHT, padx=(SPACING['xs'], SPACING['sm']), pady=SPACING['xs'])
+        # 说明信息
+        info_team = Frame(color_frame, bg=COLORS['info'])
+        info_team.pack(fill=X, pady=(SPACING['md'], 0))
+        Label(info_team, text="提示: 颜色格式为十六进制 如 #3498DB。保存后立即生效",
+              font=FONTS['small'], bg=COLORS['info'], fg=COLORS['text_light'],
+              padx=SPACING['md'], pady=SPACING['sm']).pack()
         
-        # 确保初始化时所有球队名称标签的文字颜色正确设置（特别是白色背景时）
-        self._ensure_team_label_colors()
+        # 右下角：开发信息和反馈提示
+        feedback_frame = Frame(self.frame_team_settings, bg=COLORS['bg_card'])
+        feedback_frame.grid(row=3, column=0, sticky="se", padx=SPACING['lg'], pady=(0, SPACING['lg']))
+        
+        feedback_text = ("本软件由重庆寰网致博体育文化传播有限公司开发\n"
+                        "使用过程中如遇到bug或有更好的建议，欢迎反馈给我们\n"
+                        "可通过手机号 18523999949 添加微信联系我们")
+        feedback_label = Label(feedback_frame, text=feedback_text, font=FONTS['small'],
+                              bg=COLORS['bg_card'], fg=COLORS['text_muted'],
+                              justify=LEFT, anchor=W)
+        feedback_label.pack(anchor=E)
+    
+    def _build_diagnostics_panel(self):
+        """创建性能诊断面板"""
+        self.frame_diagnostics.grid_rowconfigure(0, weight=0)  # 标题
+        self.frame_diagnostics.grid_rowconfigure(1, weight=0)  # 操作路径摘要和按钮
+        self.frame_diagnostics.grid_rowconfigure(2, weight=1)  # 统计表格
+        self.frame_diagnostics.grid_rowconfigure(3, weight=0)  # vMix目标
+        self.frame_diagnostics.grid_columnconfigure(0, weight=1)
+        
+        self.create_header(self.frame_diagnostics, "性能诊断", COLORS['primary'], 40)
+        
+        diag_summary_frame = Frame(self.frame_diagnostics, bg=COLORS['bg_card'])
+        diag_summary_frame.grid(row=1, column=0, sticky="ew", padx=SPACING['lg'], pady=SPACING['md'])
+        
+        self.diag_summary_label = Label(diag_summary_frame, text="", font=FONTS['body'],
+                                        bg=COLORS['bg_card'], fg=COLORS['text_dark'], anchor=W)
+        self.diag_summary_label.pack(side=LEFT, fill=X, expand=True)
+        self.create_button(diag_summary_frame, "导出JSON", COLORS['success'], self.export_metrics,
+                          padx=SPACING['md'])
+        self.create_button(diag_summary_frame, "清零", COLORS['danger'], self.reset_metrics,
+                          padx=SPACING['md'])
+        
+        diag_table_frame = Frame(self.frame_diagnostics, bg=COLORS['bg_card'])
+        diag_table_frame.grid(row=2, column=0, sticky="nsew", padx=SPACING['lg'])
+        diag_columns = ('count', 'mean', 'p50', 'p99', 'p999', 'max', 'over')
+        from tkinter import ttk  # 只有诊断面板使用
+        self.diag_table = ttk.Treeview(diag_table_frame, columns=diag_columns, height=12)
+        self.diag_table.heading('#0', text="名称", anchor=W)
+        self.diag_table.column('#0', width=260, stretch=True)
+        for column, title in zip(diag_columns, ("次数", "平均ms", "p50", "p99", "p99.9", "最大ms", "超帧")):
+            self.diag_table.heading(column, text=title)
+            self.diag_table.column(column, width=70, anchor=E, stretch=False)
+        diag_scrollbar = Scrollbar(diag_table_frame, orient=VERTICAL, command=self.diag_table.yview)
+        self.diag_table.configure(yscrollcommand=diag_scrollbar.set)
+        self.diag_table.pack(side=LEFT, fill=BOTH, expand=True)
+        diag_scrollbar.pack(side=RIGHT, fill=Y)
+        
+        self.diag_targets_label = Label(self.frame_diagnostics, text="", font=FONTS['small'],
+                                        bg=COLORS['bg_card'], fg=COLORS['text_muted'],
+                                        justify=LEFT, anchor=W)
+        self.diag_targets_label.grid(row=3, column=0, sticky="ew", padx=SPACING['lg'], pady=SPACING['md'])
+        self._diag_job = None
+    
+    def on_closing(self):
+        """关闭窗口：写出等待中的数据文件，写入比赛日志结束标记，导出性能统计后退出"""
+        self.engine.unsubscribe(self._on_match_event)
+        self.outputs.close()
+        Metrics.shared().dump()
+        self.init_window_name.destroy()
     
     def _ensure_team_label_colors(self):
         """确保所有球队相关标签的文字颜色正确设置（初始化时调用）"""
@@ -1901,48 +5392,13 @@ class MY_GUI():
             return header_frame
         return header_frame
     
-    def create_scrollable_canvas(self, parent, frame_attr_name=None):
-        """创建带滚动条的Canvas容器（统一风格，支持Grid布局）"""
-        # 卡片容器（换人、红黄牌、进球）使用更紧凑的间距
-        is_card_container = frame_attr_name and ('sub' in frame_attr_name or 'red' in frame_attr_name or 'goal' in frame_attr_name)
-        padding = SPACING['xs'] if is_card_container else SPACING['md']
-        container = Frame(parent, bg=COLORS['bg_card'])
-        container.pack(fill=BOTH, expand=True, padx=padding, pady=(0, padding))
-        
-        canvas = Canvas(container, bg=COLORS['bg_card'], highlightthickness=0)
-        scrollbar = Scrollbar(container, orient="vertical", command=canvas.yview)
-        cards_frame = Frame(canvas, bg=COLORS['bg_card'])
-        
-        # 如果是卡片容器（换人、红黄牌、进球），预先配置Grid布局为7列（降低卡片宽度）
-        if is_card_container:
-            cards_frame.grid_columnconfigure(0, weight=1, uniform="card_col")
-            cards_frame.grid_columnconfigure(1, weight=1, uniform="card_col")
-            cards_frame.grid_columnconfigure(2, weight=1, uniform="card_col")
-            cards_frame.grid_columnconfigure(3, weight=1, uniform="card_col")
-            cards_frame.grid_columnconfigure(4, weight=1, uniform="card_col")
-            cards_frame.grid_columnconfigure(5, weight=1, uniform="card_col")
-            cards_frame.grid_columnconfigure(6, weight=1, uniform="card_col")
-        
-        canvas.create_window((0, 0), window=cards_frame, anchor="nw", tags="cards_frame")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        canvas.pack(side=LEFT, fill=BOTH, expand=True)
-        scrollbar.pack(side=RIGHT, fill=Y)
-        
-        def on_frame_configure(event):
-            canvas.configure(scrollregion=canvas.bbox("all"))
-        def on_canvas_configure(event):
-            canvas.itemconfig("cards_frame", width=event.width)
-        
-        cards_frame.bind("<Configure>", on_frame_configure)
-        canvas.bind("<Configure>", on_canvas_configure)
-        
-        if frame_attr_name:
-            setattr(self, frame_attr_name, cards_frame)
-            # 自动保存canvas引用（用于兼容现有代码）
-            canvas_attr_name = frame_attr_name.replace('_cards_frame', '_canvas')
-            setattr(self, canvas_attr_name, canvas)
-        
-        return container, canvas, cards_frame
+    def create_card_grid(self, parent, view_class, grid_attr, items, on_select, on_delete):
+        """创建虚拟化卡片网格（换人、红黄牌、进球记录，7列，只创建可见卡片）"""
+        grid = VirtualCardGrid(parent, view_class, items=items,
+                               on_select=on_select, on_delete=on_delete)
+        grid.container.pack(fill=BOTH, expand=True, padx=SPACING['xs'], pady=(0, SPACING['xs']))
+        setattr(self, grid_attr, grid)
+        return grid
     
     def create_input_area(self, parent, team_type, input_label, entry_bind_key=None,
                          add_command=None, add_text="添加", clear_command=None,
@@ -1993,7 +5449,8 @@ class MY_GUI():
         return entry
     
     def create_team_panel(self, parent, row, team_type, title_label, input_label, 
-                          input_width=12, cards_frame_attr=None, add_command=None,
+                          input_width=12, grid_attr=None, view_class=None, items=None,
+                          on_select=None, on_delete=None, add_command=None,
                           clear_command=None, extra_buttons=None):
         """创建统一的主队/客队面板（输入区域+卡片容器）"""
         # 主面板Frame
@@ -2016,14 +5473,10 @@ class MY_GUI():
         Label(panel_frame, text=title_label, font=FONTS['small'],
              bg=COLORS['bg_card'], fg=COLORS['text_muted']).pack(anchor=W, padx=SPACING['md'], pady=(SPACING['md'], SPACING['xs']))
         
-        # 卡片容器（带滚动条）
-        container, canvas, cards_frame = self.create_scrollable_canvas(panel_frame, cards_frame_attr)
-        
-        # 存储canvas引用（如果需要）
-        if cards_frame_attr:
-            setattr(self, cards_frame_attr.replace('_frame', '_canvas'), canvas)
+        # 卡片容器（虚拟化网格，带滚动条）
+        grid = self.create_card_grid(panel_frame, view_class, grid_attr, items, on_select, on_delete)
         
-        return panel_frame, entry, cards_frame
+        return panel_frame, entry, grid
     
     def create_preview_container(self, parent, row, title, preview_bg, preview_content_creator):
         """创建统一预览容器"""
@@ -2113,15 +5566,51 @@ class MY_GUI():
             self.vmix_goal_layer_entry = layer_entry
             self.vmix_goal_delay_entry = delay_entry
     
+    def run_in_ui(self, callback, *args):
+        """从后台线程把回调投递到Tk主线程执行（线程安全）"""
+        self._ui_queue.put((callback, args))
+    
+    def _process_ui_queue(self):
+        """在Tk主线程中执行后台线程投递的回调"""
+        while True:
+            try:
+                callback, args = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except (TclError, AttributeError, RuntimeError) as e:
+                log.error(f"✗ 界面回调执行失败: {e}", exc_info=True)
+        self.init_window_name.after(UI_UPDATE_INTERVALS['UI_QUEUE'], self._process_ui_queue)
+    
+    def connect_vmix_in_background(self, on_result):
+        """在后台连接vMix，连接结果通过 on_result(ok) 回到Tk主线程处理"""
+        if self.is_connecting:
+            return
+        self.is_connecting = True
+        self.status_vmix_indicator.config(fg=COLORS['warning'])
+        self.status_vmix_text.config(text="vMix: 连接中...", fg=COLORS['warning'])
+        if hasattr(self, 'vmix_status_indicator'):
+            self.vmix_status_indicator.config(fg=COLORS['warning'])
+        if hasattr(self, 'vmix_status_label'):
+            self.vmix_status_label.config(text="连接中...", fg=COLORS['warning'])
+        
+        def finish(ok):
+            self.is_connecting = False
+            on_result(ok)
+        
+        self.vmix.connect_async(lambda ok: self.run_in_ui(finish, ok))
+    
     def status_bar_connect(self):
         """状态栏连接按钮的处理方法"""
-        # 尝试连接
-        if self.vmix.connect():
+        # 在后台尝试连接
+        self.connect_vmix_in_background(self._on_status_bar_connect_result)
+    
+    def _on_status_bar_connect_result(self, ok):
+        """状态栏连接结果处理（Tk主线程）"""
+        if ok:
             # 连接成功，更新状态
             self.last_connected_state = True
-            self.reconnect_attempt_count = 0
-            self.should_auto_reconnect = True  # 重置自动重连标志
-            self.has_alerted_disconnect = False  # 重置断开提醒标志
             # 隐藏连接按钮
             if hasattr(self, 'status_vmix_connect_btn'):
                 if self.status_vmix_connect_btn.winfo_viewable():
@@ -2157,14 +5646,15 @@ class MY_GUI():
         except (ValueError, AttributeError):
             self.vmix.port = 8099
         
-        # 尝试连接
-        if self.vmix.connect():
+        # 在后台尝试连接
+        self.connect_vmix_in_background(self._on_vmix_connect_result)
+    
+    def _on_vmix_connect_result(self, ok):
+        """vMix设置页连接结果处理（Tk主线程）"""
+        if ok:
             self.vmix_status_indicator.config(fg="green")
             self.vmix_status_label.config(text="已连接", fg=COLORS['success'])
             self.last_connected_state = True
-            self.reconnect_attempt_count = 0
-            self.should_auto_reconnect = True  # 重置自动重连标志
-            self.has_alerted_disconnect = False  # 重置断开提醒标志
             # 更新状态栏
             self.check_vmix_connection()
         else:
@@ -2179,9 +5669,7 @@ class MY_GUI():
         self.vmix.disconnect()
         self.vmix_status_indicator.config(fg="gray")
         self.vmix_status_label.config(text="未连接", fg=COLORS['text_muted'])
-        self.last_connected_state = False
-        self.reconnect_attempt_count = 0  # 手动断开时重置重连计数
-        self.should_auto_reconnect = False  # 手动断开后，不自动重连
+        self.last_connected_state = False  # 手动断开后不自动重连（VmixController.disconnect已停止重连）
         # 显示连接按钮
         if hasattr(self, 'status_vmix_connect_btn'):
             if not self.status_vmix_connect_btn.winfo_viewable():
@@ -2223,6 +5711,10 @@ class MY_GUI():
         except (ValueError, AttributeError):
             self.vmix.goal_delay = DELAYS['GOAL']
         
+        # 保存直连标题配置
+        self.vmix.direct_title = bool(self.vmix_direct_title_var.get())
+        self.vmix.scoreboard_input = self.vmix_scoreboard_input_entry.get().strip()
+        
         # 保存IP和端口
         self.vmix.host = self.vmix_ip_entry.get().strip()
         try:
@@ -2232,7 +5724,7 @@ class MY_GUI():
         
         # 持久化保存到文件
         self.vmix.save_config()
-        print("✓ vMix配置已保存")
+        log.info("✓ vMix配置已保存")
     
     def choose_team_color(self, team_type):
         """打开颜色选择器"""
@@ -2242,6 +5734,7 @@ class MY_GUI():
             current_color = self.team_away_color_entry.get()
         
         # 打开颜色选择对话框
+        from tkinter import colorchooser
         color_code = colorchooser.askcolor(title="选择球队颜色", initialcolor=current_color)
         
         if color_code[1]:  # 用户选择了颜色
@@ -2265,7 +5758,7 @@ class MY_GUI():
         away_name = self.team_away_name_entry.get().strip()
         
         if not home_name or not away_name:
-            print("✗ 球队名称不能为空")
+            log.warning("✗ 球队名称不能为空")
             return
         
         # 获取新颜色值
@@ -2297,31 +5790,12 @@ class MY_GUI():
         # 更新所有界面上的球队名称和颜色
         self.update_team_names_in_ui()
         
-        # 更新scoreboard.csv文件（包含球队名称和颜色）
-        self._save_scoreboard()
+        # 更新比赛引擎中的球队（scoreboard.csv等输出随之更新）
+        self.engine.set_teams(home_name, away_name, new_home_color, new_away_color)
         
-        print(f"✓ 球队设置已保存到配置文件: 主队={home_name} ({new_home_color}), 客队={away_name} ({new_away_color})")
-        print("✓ 球队名称已更新到界面")
-        print("✓ scoreboard.csv 已更新")
-    
-    def save_substitutions(self, team_name, player_out, player_in):
-        """保存最新一条换人记录到统一的CSV文件
-        格式：
-        球队名称,换下号码,换下姓名
-        球队名称,换上号码,换上姓名
-        """
-        try:
-            # 解析球员信息：号码,姓名
-            out_parts = player_out.split(',')
-            in_parts = player_in.split(',')
-            
-            if len(out_parts) == 2 and len(in_parts) == 2:
-                content = f"{team_name},{out_parts[0]},{out_parts[1]}\n"
-                content += f"{team_name},{in_parts[0]},{in_parts[1]}\n"
-                if FileManager.write_csv('substitutions.csv', content):
-                    print(f"✓ 已保存最新换人记录到 substitutions.csv")
-        except (ValueError, IndexError) as e:
-            print(f"保存换人记录失败: {e}")
+        log.info(f"✓ 球队设置已保存到配置文件: 主队={home_name} ({new_home_color}), 客队={away_name} ({new_away_color})")
+        log.info("✓ 球队名称已更新到界面")
+        log.info("✓ scoreboard.csv 已更新")
     
     def update_team_names_in_ui(self):
         """更新界面上所有显示球队名称的地方"""
@@ -2526,6 +6000,11 @@ class MY_GUI():
                                      bg=COLORS['bg_card'], fg=COLORS['text_muted'])
         self.status_vmix_addr.pack(side=LEFT)
         
+        # 连接池中其它vMix目标（备份/推流）的状态
+        self.status_vmix_targets = Label(left_status, text="", font=FONTS['small'],
+                                        bg=COLORS['bg_card'], fg=COLORS['text_muted'])
+        self.status_vmix_targets.pack(side=LEFT, padx=(SPACING['md'], 0))
+        
         # 连接按钮（只在未连接时显示）
         self.status_vmix_connect_btn = Button(left_status, text="连接", font=FONTS['small'],
                                              bg=COLORS['success'], fg='white',
@@ -2554,8 +6033,12 @@ class MY_GUI():
         self.init_window_name.after(500, self.auto_connect_vmix)
     
     def auto_connect_vmix(self):
-        """自动连接vMix（程序启动时调用）"""
-        if self.vmix.connect():
+        """自动连接vMix（程序启动时调用，连接在后台进行）"""
+        self.connect_vmix_in_background(self._on_auto_connect_result)
+    
+    def _on_auto_connect_result(self, ok):
+        """自动连接结果处理（Tk主线程）"""
+        if ok:
             # 更新状态栏
             if hasattr(self, 'status_vmix_indicator'):
                 self.status_vmix_indicator.config(fg="green")
@@ -2567,15 +6050,11 @@ class MY_GUI():
             if hasattr(self, 'vmix_status_label'):
                 self.vmix_status_label.config(text="已连接", fg=COLORS['success'])
             self.last_connected_state = True
-            self.is_first_connect_attempt = False
-            self.reconnect_attempt_count = 0
-            self.should_auto_reconnect = True
-            self.has_alerted_disconnect = False  # 重置断开提醒标志
             # 隐藏连接按钮
             if hasattr(self, 'status_vmix_connect_btn'):
                 if self.status_vmix_connect_btn.winfo_viewable():
                     self.status_vmix_connect_btn.pack_forget()
-            print("✓ 自动连接vMix成功")
+            log.info("✓ 自动连接vMix成功")
         else:
             # 更新状态栏
             if hasattr(self, 'status_vmix_indicator'):
@@ -2588,8 +6067,6 @@ class MY_GUI():
             if hasattr(self, 'vmix_status_label'):
                 self.vmix_status_label.config(text="连接失败", fg=COLORS['danger'])
             self.last_connected_state = False
-            self.is_first_connect_attempt = False
-            self.should_auto_reconnect = False  # 首次连接失败后，不自动重连，等待用户手动连接
             
             # 确保显示连接按钮（初始状态已显示，这里确保显示）
             if hasattr(self, 'status_vmix_connect_btn'):
@@ -2606,9 +6083,9 @@ class MY_GUI():
                 f"1. vMix是否正在运行\n"
                 f"2. 网络连接是否正常\n"
                 f"3. IP地址和端口是否正确\n\n"
-                f"请点击状态栏的\"连接\"按钮手动连接。"
+                f"程序会在后台自动重试连接，也可以点击状态栏的\"连接\"按钮立即重试。"
             )
-            print("✗ 自动连接vMix失败")
+            log.warning("✗ 自动连接vMix失败，后台自动重试中")
     
     def check_vmix_connection_periodically(self):
         """定期检查vMix连接状态"""
@@ -2619,89 +6096,87 @@ class MY_GUI():
         self.init_window_name.after(TIMEOUTS['CHECK_INTERVAL'], self.check_vmix_connection_periodically)
     
     def check_vmix_connection(self):
-        """检查vMix连接状态（优化：使用轻量级socket状态检查，减少网络负载）"""
+        """刷新vMix连接状态显示（只读取后台心跳和自动重连的状态，不访问网络）"""
         # 更新连接地址显示
         addr_text = f"{self.vmix.host}:{self.vmix.port}"
         self.status_vmix_addr.config(text=addr_text)
+        if hasattr(self, 'status_vmix_targets'):
+            self.status_vmix_targets.config(text=self._targets_status_text())
         
-        if self.vmix.connected and self.vmix.socket:
-            # 优化：使用getsockopt检查socket状态，避免发送测试命令减少网络负载
-            try:
-                # 使用getsockopt检查socket错误状态（轻量级，不发送数据）
-                error_code = self.vmix.socket.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
-                if error_code != 0:
-                    raise OSError(f"Socket error: {error_code}")
-                
-                # 连接正常
+        # 后台连接进行中，保持"连接中"状态显示，等待连接结果回调
+        if self.is_connecting:
+            return
+        
+        link_state = self.vmix.link_state
+        if link_state:
+            # 连接由后台心跳维持（vMix卡死或TCP半开时心跳超时会断开连接），这里只读取心跳结果
+            if link_state == 'degraded':
+                self.status_vmix_indicator.config(fg="orange")
+                status_text, text_color = "vMix: 响应慢", COLORS['warning']
+            else:
                 self.status_vmix_indicator.config(fg="green")
-                self.status_vmix_text.config(text="vMix: 已连接", fg=COLORS['success'])
-                # 如果之前未连接，现在已连接，重置重连计数和自动重连标志
-                if not self.last_connected_state:
-                    self.reconnect_attempt_count = 0
-                    self.should_auto_reconnect = True  # 连接成功后，重置自动重连标志
-                    self.has_alerted_disconnect = False  # 重置断开提醒标志，下次断开时可以再次提醒
-                self.last_connected_state = True
-                # 隐藏连接按钮
-                if hasattr(self, 'status_vmix_connect_btn'):
-                    self.status_vmix_connect_btn.pack_forget()
-                return
-                
-            except (OSError, socket.error, AttributeError) as e:
-                # 检查失败，连接已断开
-                print(f"✗ vMix连接检查失败: {e}")
-                try:
-                    self.vmix.socket.close()
-                except (OSError, socket.error, AttributeError):
-                    pass
-                self.vmix.socket = None
-                self.vmix.connected = False
-        
-        # 未连接状态
-        if not self.vmix.connected or not self.vmix.socket:
-            # 如果之前是连接状态，现在断开了
-            if self.last_connected_state and not self.is_first_connect_attempt:
-                # 第一次检测到断开，立即弹窗提醒，并停止自动重连（只弹窗一次）
-                if not self.has_alerted_disconnect:
-                    from tkinter import messagebox
-                    messagebox.showwarning(
-                        "vMix连接断开",
-                        f"检测到vMix连接已断开！\n\n"
-                        f"地址: {self.vmix.host}:{self.vmix.port}\n\n"
-                        f"可能原因：\n"
-                        f"1. vMix程序已关闭\n"
-                        f"2. 网络连接中断\n"
-                        f"3. 防火墙阻止连接\n\n"
-                        f"请点击状态栏的\"连接\"按钮手动重新连接。"
-                    )
-                    print("✗ 检测到vMix连接断开，已停止自动重连")
-                    # 停止自动重连，等待用户手动连接
-                    self.should_auto_reconnect = False
-                    # 标记已经弹窗提醒过，避免重复弹窗
-                    self.has_alerted_disconnect = True
-            
-            # 更新UI显示为未连接状态
-            self.status_vmix_indicator.config(fg="gray")
-            self.status_vmix_text.config(text="vMix: 未连接", fg=COLORS['text_muted'])
-            
-            # 显示连接按钮（如果未显示）
+                status_text, text_color = "vMix: 已连接", COLORS['success']
+            rtt = self.vmix.rtt_stats
+            if rtt:
+                status_text += f" | 心跳 {rtt['last'] * 1000:.0f}ms (平均 {rtt['avg'] * 1000:.0f}ms)"
+            failed = self.vmix.primary.stats['failed'] + self.vmix.primary.stats['rejected']
+            if failed:
+                status_text += f" | 失败 {failed}"
+            self.status_vmix_text.config(text=status_text, fg=text_color)
+            self.last_connected_state = True
+            # 隐藏连接按钮
             if hasattr(self, 'status_vmix_connect_btn'):
-                # 使用winfo_viewable()检查按钮是否可见，比异常处理更优雅
-                if not self.status_vmix_connect_btn.winfo_viewable():
-                    self.status_vmix_connect_btn.pack(side=LEFT, padx=(SPACING['sm'], 0))
-            
-            # 同时更新vMix配置页面的状态显示（如果存在）
-            if hasattr(self, 'vmix_status_indicator'):
-                self.vmix_status_indicator.config(fg="gray")
-            if hasattr(self, 'vmix_status_label'):
-                self.vmix_status_label.config(text="未连接", fg=COLORS['text_muted'])
-            
-            # 更新连接状态标记：只有在已经尝试过重连且重连失败后，才更新标记
-            # 如果之前是连接状态，现在断开了，但在本次检查中已经尝试了重连，保持 last_connected_state 不变
-            # 这样可以确保下次检查时继续尝试重连
-            # 只有当手动断开或首次连接失败时，才设置为 False
-            if not (self.last_connected_state and not self.is_first_connect_attempt):
-                # 如果之前就不是连接状态（首次连接失败或手动断开），更新标记
-                self.last_connected_state = False
+                self.status_vmix_connect_btn.pack_forget()
+            return
+        
+        # 未连接状态：连接中断或连接失败后VmixController在后台自动重连，这里只显示状态，不弹窗打断操作
+        if self.last_connected_state:
+            log.warning("✗ 检测到vMix连接断开，后台自动重连中")
+            self.last_connected_state = False
+        
+        if self.vmix.reconnecting:
+            wait = max(0.0, (self.vmix.next_reconnect_at or time.time()) - time.time())
+            status_text = f"vMix: 重连中（{wait:.0f}秒后重试）"
+            queued = self.vmix.offline_count
+            if queued:
+                status_text += f" | 待补发 {queued} 条"
+            indicator_color, text_color, label_text = COLORS['warning'], COLORS['warning'], "重连中..."
+        else:
+            status_text = "vMix: 未连接"
+            indicator_color, text_color, label_text = "gray", COLORS['text_muted'], "未连接"
+        self.status_vmix_indicator.config(fg=indicator_color)
+        self.status_vmix_text.config(text=status_text, fg=text_color)
+        
+        # 显示连接按钮（如果未显示），重连等待期间也可以点击立即重试
+        if hasattr(self, 'status_vmix_connect_btn'):
+            # 使用winfo_viewable()检查按钮是否可见，比异常处理更优雅
+            if not self.status_vmix_connect_btn.winfo_viewable():
+                self.status_vmix_connect_btn.pack(side=LEFT, padx=(SPACING['sm'], 0))
+        
+        # 同时更新vMix配置页面的状态显示（如果存在）
+        if hasattr(self, 'vmix_status_indicator'):
+            self.vmix_status_indicator.config(fg=indicator_color)
+        if hasattr(self, 'vmix_status_label'):
+            self.vmix_status_label.config(text=label_text, fg=text_color)
+    
+    def _targets_status_text(self):
+        """连接池中主机以外各目标的状态摘要（延迟和失败次数）"""
+        parts = []
+        for info in self.vmix.target_summary()[1:]:
+            if info['state'] in ('ok', 'degraded'):
+                text = "响应慢" if info['state'] == 'degraded' else "已连接"
+                latency = info['rtt']['last'] if info['rtt'] else info['latency']
+                if latency is not None:
+                    text += f" {latency * 1000:.0f}ms"
+            elif info['state'] == 'reconnecting':
+                text = "重连中"
+            else:
+                text = "未连接"
+            failed = info['failed'] + info['rejected']
+            if failed:
+                text += f" 失败{failed}"
+            parts.append(f"{info['name']}: {text}")
+        return " ｜ ".join(parts)
     
     def update_status_bar(self):
         """更新状态栏显示"""
@@ -2721,10 +6196,12 @@ class MY_GUI():
             'cards': self.frame_red_yellow_card,
             'goal': self.frame_goal,
             'vmix': self.frame_vmix_config,
-            'team_settings': self.frame_team_settings
+            'team_settings': self.frame_team_settings,
+            'diagnostics': self.frame_diagnostics
         }
         
         if panel_name in panel_map:
+            self.build_panel(panel_name)
             self.current_panel = panel_map[panel_name]
             self.current_panel.pack(fill=BOTH, expand=True)
             # 强制更新显示
@@ -2732,116 +6209,65 @@ class MY_GUI():
             # 确保状态栏始终在最上层可见
             if hasattr(self, 'status_frame'):
                 self.status_frame.lift()
-
-    '''换人 - 使用通用方法减少重复代码'''
-    def create_sub_card(self, parent_frame, index, player_out, player_in, timestamp, select_callback, delete_callback):
-        """通用换人卡片创建方法（优化布局，紧凑美观）"""
-        # 使用Grid布局，支持多列显示以减少空间浪费
-        # 卡片样式：现代扁平设计，带边框阴影效果
-        card = Frame(parent_frame, bg=COLORS['bg_card'], relief=FLAT, bd=1,
-                    highlightthickness=1, highlightbackground=COLORS['border'])
-        card.grid(row=index // 7, column=index % 7, padx=SPACING['xs'], pady=SPACING['xs'], 
-                 sticky="nsew")
-        
-        # 确保父容器已配置Grid列（如果还没有）
-        col = index % 7
-        try:
-            parent_frame.grid_columnconfigure(col, weight=1, uniform="card_col")
-        except (TclError, AttributeError):
-            pass
-        
-        # 卡片内容容器（紧凑布局）
-        card_content = Frame(card, bg=COLORS['bg_card'], padx=SPACING['sm'], pady=SPACING['xs'])
-        card_content.pack(fill=BOTH, expand=True)
-        
-        # 顶部选中指示条（初始隐藏，通过高度控制显示）
-        selected_indicator = Frame(card_content, bg=COLORS['info'], height=0)
-        selected_indicator.pack(fill=X, pady=(0, SPACING['xs']))
-        selected_indicator.pack_propagate(False)
-        card.selected_indicator = selected_indicator
-        
-        # 顶部：编号和时间（增大字体）
-        top_line = Frame(card_content, bg=COLORS['bg_card'], height=24)
-        top_line.pack(fill=X)
-        top_line.pack_propagate(False)
-        Label(top_line, text=f"#{index+1}", font=('YaHei', 9, 'bold'), 
-              bg=COLORS['bg_card'], fg=COLORS['text_muted']).pack(side=LEFT)
-        Label(top_line, text=timestamp, font=('YaHei', 8), 
-              bg=COLORS['bg_card'], fg=COLORS['text_muted']).pack(side=RIGHT)
-        
-        # 换下区域（增大字体，使用左侧颜色条）
-        out_frame = Frame(card_content, bg=COLORS['bg_card'], height=40)
-        out_frame.pack(fill=X, pady=(SPACING['xs']//2, 0))
-        out_frame.pack_propagate(False)
-        
-        # 左侧颜色指示条
-        out_indicator = Frame(out_frame, bg="#E53935", width=4)
-        out_indicator.pack(side=LEFT, fill=Y, padx=(0, SPACING['xs']))
-        out_indicator.pack_propagate(False)
-        
-        # 换下信息（增大字体）
-        out_info = Frame(out_frame, bg=COLORS['bg_card'])
-        out_info.pack(side=LEFT, fill=BOTH, expand=True, padx=(0, SPACING['xs']))
-        Label(out_info, text="↓ 换下", font=('YaHei', 8, 'bold'), 
-              bg=COLORS['bg_card'], fg="#E53935", anchor=W).pack(anchor=W)
-        Label(out_info, text=player_out, font=('YaHei', 9), 
-              bg=COLORS['bg_card'], fg=COLORS['text_dark'], anchor=W, 
-              wraplength=80, justify=LEFT).pack(anchor=W, pady=(2, 0))
-        
-        # 换上区域（增大字体，使用左侧颜色条）
-        in_frame = Frame(card_content, bg=COLORS['bg_card'], height=40)
-        in_frame.pack(fill=X, pady=(SPACING['xs']//2, 0))
-        in_frame.pack_propagate(False)
+            # 诊断面板只在显示时定时刷新
+            if panel_name == 'diagnostics':
+                self.refresh_diagnostics()
+    
+    def refresh_diagnostics(self):
+        """刷新性能诊断面板（面板可见时每秒刷新一次）"""
+        if self._diag_job is not None:
+            self.init_window_name.after_cancel(self._diag_job)
+            self._diag_job = None
+        if self.current_panel is not self.frame_diagnostics:
+            return
         
-        # 左侧颜色指示条
-        in_indicator = Frame(in_frame, bg="#388E3C", width=4)
-        in_indicator.pack(side=LEFT, fill=Y, padx=(0, SPACING['xs']))
-        in_indicator.pack_propagate(False)
-        
-        # 换上信息（增大字体）
-        in_info = Frame(in_frame, bg=COLORS['bg_card'])
-        in_info.pack(side=LEFT, fill=BOTH, expand=True, padx=(0, SPACING['xs']))
-        Label(in_info, text="↑ 换上", font=('YaHei', 8, 'bold'), 
-              bg=COLORS['bg_card'], fg="#388E3C", anchor=W).pack(anchor=W)
-        Label(in_info, text=player_in, font=('YaHei', 9), 
-              bg=COLORS['bg_card'], fg=COLORS['text_dark'], anchor=W, 
-              wraplength=80, justify=LEFT).pack(anchor=W, pady=(2, 0))
+        metrics = Metrics.shared()
+        snapshot = metrics.snapshot()
+        worst = metrics.operator_path(snapshot)
+        budget_ms = snapshot['frame_budget_ms']
+        if worst['name']:
+            within = worst['max_ms'] < budget_ms
+            self.diag_summary_label.config(
+                text=f"操作路径 p99 {worst['p99_ms']:.2f}ms（{worst['name']}） 最大 {worst['max_ms']:.2f}ms "
+                     f"超帧 {worst['over_budget']} 次 {'✓ 低于一帧' if within else '✗ 超过一帧'}（{budget_ms:.0f}ms）",
+                fg=COLORS['success'] if within else COLORS['danger'])
+        else:
+            self.diag_summary_label.config(text=f"还没有操作记录（一帧 = {budget_ms:.0f}ms）",
+                                           fg=COLORS['text_muted'])
+        
+        for name, stats in snapshot['histograms'].items():
+            values = (stats['count'], f"{stats['mean_ms']:.2f}", f"{stats['p50_ms']:.2f}",
+                      f"{stats['p99_ms']:.2f}", f"{stats['p999_ms']:.2f}", f"{stats['max_ms']:.2f}",
+                      stats['over_budget'])
+            if self.diag_table.exists(name):
+                self.diag_table.item(name, values=values)
+            else:
+                self.diag_table.insert('', END, iid=name, text=name, values=values)
         
-        # 删除按钮（紧凑，小尺寸）
-        btn_delete = Button(card_content, text="✕", bg="#DC3545", fg="white", 
-                           font=('Arial', 9, 'bold'), relief=FLAT, cursor="hand2", 
-                           padx=SPACING['sm'], pady=SPACING['xs']//2, bd=0, 
-                           command=delete_callback,
-                           activebackground="#C62828", activeforeground="white")
-        btn_delete.pack(fill=X, pady=(SPACING['xs'], 0))
+        lines = []
+        for info in self.vmix.target_summary():
+            latency = f"{info['latency'] * 1000:.1f}ms" if info['latency'] is not None else "-"
+            lines.append(f"vMix[{info['name']}] {info['address']} {info['state']} 平均应答 {latency} "
+                         f"发送 {info['sent']} 成功 {info['ok']} 拒绝 {info['rejected']} "
+                         f"失败 {info['failed']} 待补发 {info['offline']}")
+        self.diag_targets_label.config(text="\n".join(lines))
         
-        card.card_index = index
-        # 绑定点击事件（除了删除按钮）
-        def bind_click(widget):
-            if not isinstance(widget, Button):
-                widget.bind("<Button-1>", lambda e: select_callback())
-            for child in widget.winfo_children():
-                if child != btn_delete:
-                    bind_click(child)
-        bind_click(card)
-    
-    def create_sub_card_away(self, index, player_out, player_in, timestamp):
-        self.create_sub_card(self.sub_away_cards_frame, index, player_out, player_in, timestamp,
-                           lambda: self.select_sub_card_away(index), lambda: self.delete_sub_card_away(index))
-    
-    def create_sub_card_home(self, index, player_out, player_in, timestamp):
-        self.create_sub_card(self.sub_home_cards_frame, index, player_out, player_in, timestamp,
-                           lambda: self.select_sub_card_home(index), lambda: self.delete_sub_card_home(index))
-
-    # 根据编号查找球员信息
-    def find_player_by_number(self, number, player_list):
-        """根据编号查找球员，返回完整信息（编号,姓名）"""
-        number = number.strip()
-        for player in player_list:
-            if player.startswith(number + ","):
-                return player
-        return None
+        self._diag_job = self.init_window_name.after(1000, self.refresh_diagnostics)
+    
+    def export_metrics(self):
+        """导出性能统计到JSON文件"""
+        from tkinter import messagebox
+        if Metrics.shared().dump():
+            messagebox.showinfo("导出成功", f"性能统计已导出到 {FileManager.get_file_path(METRICS['FILENAME'])}")
+        else:
+            messagebox.showerror("导出失败", "无法写入性能统计文件，请查看控制台输出")
     
+    def reset_metrics(self):
+        """清空性能统计"""
+        Metrics.shared().reset()
+        self.diag_table.delete(*self.diag_table.get_children())
+        self.refresh_diagnostics()
+
     # 解析输入的编号对
     def parse_sub_input(self, input_text):
         """解析输入的换人编号，返回(换下编号, 换上编号)或None
@@ -2853,6 +6279,7 @@ class MY_GUI():
             return None
         
         # 使用正则表达式提取所有数字
+        import re
         numbers = re.findall(r'\d+', input_text)
         
         # 如果恰好找到2个数字，返回它们
@@ -2861,7 +6288,124 @@ class MY_GUI():
         
         return None
 
-    def _add_substitution(self, team_type, entry, out_label, in_label, sub_list, player_list, team_name):
+    # ---------- 比赛引擎事件 -> 界面 ----------
+    # 各类记录所在的面板
+    KIND_PANELS = {'sub': 'sub', 'card': 'cards', 'goal': 'goal'}
+    
+    def _on_match_event(self, engine, event, data):
+        """比赛引擎观察者：把比赛事件同步到各面板（尚未创建的面板在创建时同步）"""
+        kind = data.get('kind')
+        if event == 'publish':
+            self._last_published[kind] = (data['team'], data['record'])
+        elif event == 'clear':
+            self._last_published.pop(kind, None)
+        if kind is not None and not self._kind_panel_built(kind):
+            return
+        handler = getattr(self, f"_on_match_{event}", None)
+        if handler is not None:
+            handler(**data)
+    
+    def _kind_panel_built(self, kind):
+        return self.KIND_PANELS[kind] in self._built_panels
+    
+    def _match_widget(self, kind, team, suffix):
+        """各类记录面板的控件（grid/entry），红黄牌面板控件以red_开头"""
+        prefix = 'red' if kind == 'card' else kind
+        return getattr(self, f"{prefix}_{team}_{suffix}")
+    
+    def _show_preview_team(self, panel, title, color):
+        """设置预览区标题文字和背景颜色（panel为sub/card/goal）"""
+        if hasattr(self, f'{panel}_preview_title_var'):
+            getattr(self, f'{panel}_preview_title_var').set(title)
+        if hasattr(self, f'{panel}_preview_header'):
+            getattr(self, f'{panel}_preview_header').config(bg=color)
+            if hasattr(self, f'{panel}_preview_title_label'):
+                text_color = get_contrast_text_color(color)
+                getattr(self, f'{panel}_preview_title_label').config(bg=color, fg=text_color)
+    
+    def _show_card_preview(self, card_type, text):
+        """显示红牌或黄牌预览（另一种清空），并切换控制按钮类型和预览宽度比例"""
+        if card_type == "red_card":
+            self.red_card_display_label.config(text=text)
+            self.yellow_card_display_label.config(text="")
+            # 调整宽度比例：红牌75%，黄牌25%
+            weights = (3, 1)
+        else:
+            self.yellow_card_display_label.config(text=text)
+            self.red_card_display_label.config(text="")
+            # 调整宽度比例：红牌25%，黄牌75%
+            weights = (1, 3)
+        self.current_card_type = card_type
+        if hasattr(self, 'card_button'):
+            self.card_button.update_subtitle_type(card_type)
+        self.card_preview_content.grid_columnconfigure(0, weight=weights[0])
+        self.card_preview_content.grid_columnconfigure(1, weight=weights[1])
+    
+    def _on_match_add(self, kind, team, index, record):
+        # 新记录加入对应队伍的卡片网格
+        self._match_widget(kind, team, 'grid').item_added()
+        self._match_widget(kind, team, 'entry').delete(0, END)
+    
+    def _on_match_select(self, kind, team, index, record):
+        # 更新选中状态（确保两队中同时只有一个卡片被选中）
+        other = 'home' if team == 'away' else 'away'
+        self._match_widget(kind, other, 'grid').select(None)
+        self._match_widget(kind, team, 'grid').select(index)
+    
+    def _on_match_publish(self, kind, team, record):
+        # 更新预览区：标题显示队伍名称，背景为队伍颜色
+        team_name = self.engine.team_names[team]
+        team_color = self.team_home_color if team == 'home' else self.team_away_color
+        if kind == 'sub':
+            player_out, player_in = record[0], record[1]
+            getattr(self, f"sub_{team}_out_label").config(text=player_out.info)
+            getattr(self, f"sub_{team}_in_label").config(text=player_in.info)
+            self._show_preview_team('sub', f"{team_name} - 换人字幕预览", team_color)
+        elif kind == 'card':
+            self._show_preview_team('card', team_name, team_color)
+            self._show_card_preview(self.engine.title_type(kind, record), f"{team_name}\n{record[0]}")
+        else:
+            self._show_preview_team('goal', team_name, team_color)
+            self.goal_display_label.config(text=f"{team_name}\n{record[0]}")
+    
+    def _on_match_delete(self, kind, team, index):
+        # 只更新受影响的可见卡片
+        self._match_widget(kind, team, 'grid').item_removed(index)
+    
+    def _on_match_clear(self, kind, team):
+        self._match_widget(kind, team, 'grid').reset(self.engine.records[(kind, team)])
+        self._match_widget(kind, team, 'entry').delete(0, END)
+        if kind == 'sub':
+            getattr(self, f"sub_{team}_out_label").config(text="-- --")
+            getattr(self, f"sub_{team}_in_label").config(text="-- --")
+            # 恢复预览标题和背景颜色为默认值
+            self._show_preview_team('sub', "当前换人字幕预览", COLORS['warning'])
+        elif kind == 'card':
+            # 清空两个预览区域，恢复宽度比例为各50%
+            self.red_card_display_label.config(text="")
+            self.yellow_card_display_label.config(text="")
+            self.card_preview_content.grid_columnconfigure(0, weight=1)
+            self.card_preview_content.grid_columnconfigure(1, weight=1)
+        else:
+            self.goal_display_label.config(text="--- 等待输入 ---")
+    
+    def _on_match_restore(self, event_count):
+        # 每个卡片网格只布局一次（未创建的面板创建时直接使用恢复后的记录）
+        for kind in MatchEngine.KINDS:
+            if not self._kind_panel_built(kind):
+                continue
+            for team in MatchEngine.TEAMS:
+                grid = self._match_widget(kind, team, 'grid')
+                grid.reset(self.engine.records[(kind, team)])
+                grid.select(self.engine.selected_index(kind, team))
+    
+    def _on_match_scoreboard(self):
+        self.scoreHomeVar.set(self.engine.scores['home'])
+        self.scoreAwayVar.set(self.engine.scores['away'])
+        self.sessionVar.set(self.engine.session)
+    
+    # ---------- 换人 ----------
+    def _add_substitution(self, team_type, entry, out_label, in_label):
         """通用添加换人方法（统一保存到 substitutions.csv）"""
         input_text = entry.get().strip()
         if not input_text:
@@ -2874,640 +6418,113 @@ class MY_GUI():
             return
         
         out_num, in_num = result
-        player_out = self.find_player_by_number(out_num, player_list)
-        player_in = self.find_player_by_number(in_num, player_list)
+        player_out = self.engine.find_player(team_type, out_num)
+        player_in = self.engine.find_player(team_type, in_num)
         
         if player_out is None or player_in is None:
             out_label.config(text=f"编号 {out_num}" if player_out is None else "?")
             in_label.config(text=f"编号 {in_num}" if player_in is None else "?")
             return
         
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        sub_list.append((player_out, player_in, timestamp))
-        
-        # 统一保存到 substitutions.csv（不再单独保存主客队文件）
-        self.save_substitutions(team_name, player_out, player_in)
-        
-        # 更新预览标题显示队伍名称和背景颜色
-        if hasattr(self, 'sub_preview_title_var'):
-            self.sub_preview_title_var.set(f"{team_name} - 换人字幕预览")
-        # 更新预览标题背景颜色和文字颜色为队伍颜色
-        if hasattr(self, 'sub_preview_header'):
-            team_color = self.team_home_color if team_type == 'home' else self.team_away_color
-            self.sub_preview_header.config(bg=team_color)
-            if hasattr(self, 'sub_preview_title_label'):
-                text_color = get_contrast_text_color(team_color)
-                self.sub_preview_title_label.config(bg=team_color, fg=text_color)
-        
-        # 根据team_type调用对应的创建方法
-        if team_type == 'away':
-            self.create_sub_card_away(len(sub_list) - 1, player_out, player_in, timestamp)
-        else:
-            self.create_sub_card_home(len(sub_list) - 1, player_out, player_in, timestamp)
-        
-        out_label.config(text=player_out)
-        in_label.config(text=player_in)
-        entry.delete(0, END)
-        print(f"✓ {'客队' if team_type == 'away' else '主队'}换人 - 换下：{player_out}，换上：{player_in}")
+        self.engine.add_substitution(team_type, player_out, player_in)
     
+    @timed
     def sub_away_add(self):
-        self._add_substitution('away', self.sub_away_entry, self.sub_away_out_label, self.sub_away_in_label,
-                              self.sub_away_list, away_list, teamname_away)
+        self._add_substitution('away', self.sub_away_entry, self.sub_away_out_label, self.sub_away_in_label)
     
+    @timed
     def sub_home_add(self):
-        self._add_substitution('home', self.sub_home_entry, self.sub_home_out_label, self.sub_home_in_label,
-                              self.sub_home_list, home_list, teamname_home)
-
-    def _select_sub_card(self, team_type, index, sub_list, out_label, in_label, cards_frame, team_name):
-        """通用选择换人卡片方法（确保同时只能有一个卡片被选中）"""
-        player_out, player_in, timestamp = sub_list[index]
-        out_label.config(text=player_out)
-        in_label.config(text=player_in)
-        # 统一保存到 substitutions.csv（不再单独保存主客队文件）
-        self.save_substitutions(team_name, player_out, player_in)
-        
-        # 更新预览标题显示队伍名称和背景颜色
-        if hasattr(self, 'sub_preview_title_var'):
-            self.sub_preview_title_var.set(f"{team_name} - 换人字幕预览")
-        # 更新预览标题背景颜色和文字颜色为队伍颜色
-        if hasattr(self, 'sub_preview_header'):
-            team_color = self.team_home_color if team_type == 'home' else self.team_away_color
-            self.sub_preview_header.config(bg=team_color)
-            if hasattr(self, 'sub_preview_title_label'):
-                text_color = get_contrast_text_color(team_color)
-                self.sub_preview_title_label.config(bg=team_color, fg=text_color)
-        
-        # 更新选中状态（增强高亮效果，保持文字清晰）
-        def update_card_style(card_widget, is_selected):
-            try:
-                if is_selected:
-                    # 使用浅蓝色背景高亮，但足够深以保持文字清晰
-                    highlight_bg = "#BBDEFB"  # 浅蓝色背景
-                    card_widget.config(bg=highlight_bg, relief=RAISED, bd=3,
-                                highlightthickness=4, highlightbackground="#2196F3")  # 深蓝色边框
-                    # 显示选中指示条
-                    if hasattr(card_widget, 'selected_indicator'):
-                        card_widget.selected_indicator.config(height=5, bg="#2196F3")  # 深蓝色指示条
-                    
-                    # 更新卡片内容容器的背景色
-                    for child in card_widget.winfo_children():
-                        if isinstance(child, Frame):
-                            try:
-                                child_bg = child.cget('bg')
-                                if child_bg == COLORS['bg_card']:
-                                    child.config(bg=highlight_bg)
-                                # 递归更新子组件背景色（但保留颜色指示条）
-                                def update_children_bg(widget):
-                                    for c in widget.winfo_children():
-                                        if isinstance(c, (Frame, Label)):
-                                            try:
-                                                c_bg = c.cget('bg')
-                                                # 不改变颜色指示条（红色#E53935和绿色#388E3C）和按钮的背景色
-                                                if c_bg == COLORS['bg_card'] and c_bg not in ["#E53935", "#388E3C", "#DC3545"]:
-                                                    c.config(bg=highlight_bg)
-                                                # 颜色指示条保持原色
-                                                elif c_bg in ["#E53935", "#388E3C"]:
-                                                    pass  # 保持原色
-                                                update_children_bg(c)
-                                            except (TclError, AttributeError, RuntimeError):
-                                                pass
-                                update_children_bg(child)
-                            except (TclError, AttributeError, RuntimeError):
-                                pass
-                else:
-                    card_widget.config(bg=COLORS['bg_card'], relief=FLAT, bd=1,
-                                highlightthickness=1, highlightbackground=COLORS['border'])
-                    # 隐藏选中指示条（高度设为0）
-                    if hasattr(card_widget, 'selected_indicator'):
-                        card_widget.selected_indicator.config(height=0)
-                    
-                    # 恢复所有背景色为默认
-                    def restore_bg(widget):
-                        for child in widget.winfo_children():
-                            if isinstance(child, (Frame, Label)):
-                                try:
-                                    child_bg = child.cget('bg')
-                                    if child_bg == "#BBDEFB":
-                                        child.config(bg=COLORS['bg_card'])
-                                    restore_bg(child)
-                                except (TclError, AttributeError, RuntimeError):
-                                    pass
-                    restore_bg(card_widget)
-            except Exception as e:
-                pass
-        
-        # 先清除另一个队伍的所有选中状态
-        if team_type == 'home':
-            # 清除客队的所有选中状态
-            if hasattr(self, 'sub_away_cards_frame'):
-                for card in self.sub_away_cards_frame.winfo_children():
-                    update_card_style(card, False)
-        else:
-            # 清除主队的所有选中状态
-            if hasattr(self, 'sub_home_cards_frame'):
-                for card in self.sub_home_cards_frame.winfo_children():
-                    update_card_style(card, False)
-        
-        # 更新当前队伍的选中状态
-        for card in cards_frame.winfo_children():
-            if hasattr(card, 'card_index') and card.card_index == index:
-                update_card_style(card, True)
-            else:
-                update_card_style(card, False)
-        print(f"✓ {'客队' if team_type == 'away' else '主队'}切换当前换人到第{index+1}组 - 换下：{player_out}，换上：{player_in}")
+        self._add_substitution('home', self.sub_home_entry, self.sub_home_out_label, self.sub_home_in_label)
     
+    @timed
     def select_sub_card_away(self, index):
-        self._select_sub_card('away', index, self.sub_away_list, self.sub_away_out_label, self.sub_away_in_label,
-                            self.sub_away_cards_frame, teamname_away)
+        self.engine.select('sub', 'away', index)
     
+    @timed
     def select_sub_card_home(self, index):
-        self._select_sub_card('home', index, self.sub_home_list, self.sub_home_out_label, self.sub_home_in_label,
-                            self.sub_home_cards_frame, teamname_home)
-    
-    def _clear_sub(self, out_label, in_label, entry, sub_list, cards_frame):
-        """通用清空换人方法（统一使用 substitutions.csv）"""
-        out_label.config(text="-- --")
-        in_label.config(text="-- --")
-        entry.delete(0, END)
-        sub_list.clear()
-        for widget in cards_frame.winfo_children():
-            widget.destroy()
-        
-        # 恢复预览标题和背景颜色为默认值
-        if hasattr(self, 'sub_preview_title_var'):
-            self.sub_preview_title_var.set("当前换人字幕预览")
-        # 恢复预览标题背景颜色和文字颜色为默认警告色
-        if hasattr(self, 'sub_preview_header'):
-            self.sub_preview_header.config(bg=COLORS['warning'])
-            if hasattr(self, 'sub_preview_title_label'):
-                text_color = get_contrast_text_color(COLORS['warning'])
-                self.sub_preview_title_label.config(bg=COLORS['warning'], fg=text_color)
-        
-        # 只清空统一的换人记录文件（不再清空单独的主客队文件）
-        FileManager.clear_file('substitutions.csv')
+        self.engine.select('sub', 'home', index)
     
+    @timed
     def sub_clear_away(self):
-        self._clear_sub(self.sub_away_out_label, self.sub_away_in_label, self.sub_away_entry,
-                       self.sub_away_list, self.sub_away_cards_frame)
+        self.engine.clear('sub', 'away')
     
+    @timed
     def sub_clear_home(self):
-        if hasattr(self, 'sub_preview_team_var'):
-            self.sub_preview_team_var.set("当前换人字幕预览")
-        self._clear_sub(self.sub_home_out_label, self.sub_home_in_label, self.sub_home_entry,
-                       self.sub_home_list, self.sub_home_cards_frame)
-
-
-    def _delete_sub_card(self, team_type, index, sub_list, cards_frame):
-        """通用删除换人卡片方法"""
-        if index < len(sub_list):
-            del sub_list[index]
-            for widget in cards_frame.winfo_children():
-                widget.destroy()
-            for i, (player_out, player_in, timestamp) in enumerate(sub_list):
-                if team_type == 'away':
-                    self.create_sub_card_away(i, player_out, player_in, timestamp)
-                else:
-                    self.create_sub_card_home(i, player_out, player_in, timestamp)
-            print(f"✓ 已删除{'客队' if team_type == 'away' else '主队'}第{index+1}个换人记录")
+        self.engine.clear('sub', 'home')
     
+    @timed
     def delete_sub_card_away(self, index):
-        self._delete_sub_card('away', index, self.sub_away_list, self.sub_away_cards_frame)
+        self.engine.delete('sub', 'away', index)
     
+    @timed
     def delete_sub_card_home(self, index):
-        self._delete_sub_card('home', index, self.sub_home_list, self.sub_home_cards_frame)
-
-    '''红黄牌 - 使用通用方法优化布局'''
-    def create_card_red(self, parent_frame, index, player_info, card_type, timestamp, select_callback, delete_callback):
-        """通用红黄牌卡片创建方法（重新设计，现代美观）"""
-        # 根据牌类型设置不同的颜色
-        if card_type == "红牌":
-            card_color = "#E53935"  # 红色
-            card_color_light = "#FFCDD2"  # 浅红色背景
-            card_text_color = "#C62828"  # 深红色文字
-            card_icon = "■"  # 红牌图标
-        else:  # 黄牌
-            card_color = "#F9A825"  # 黄色
-            card_color_light = "#FFF9C4"  # 浅黄色背景
-            card_text_color = "#F57F17"  # 深黄色文字
-            card_icon = "■"  # 黄牌图标
-        
-        card_bg = COLORS['bg_card']
-        
-        # 使用Grid布局，支持多列显示以减少空间浪费
-        card = Frame(parent_frame, bg=COLORS['bg_card'], relief=FLAT, bd=1,
-                    highlightthickness=2, highlightbackground=COLORS['border'])
-        card.grid(row=index // 7, column=index % 7, padx=SPACING['sm'], pady=SPACING['sm'], 
-                 sticky="nsew")
-        
-        # 确保父容器已配置Grid列
-        col = index % 7
-        try:
-            parent_frame.grid_columnconfigure(col, weight=1, uniform="card_col")
-        except (TclError, AttributeError):
-            pass
-        
-        # 卡片内容容器（重新设计布局）
-        card_content = Frame(card, bg=card_bg)
-        card_content.pack(fill=BOTH, expand=True, padx=0, pady=0)
-        
-        # 顶部选中指示条（初始隐藏，选中时显示）
-        selected_indicator = Frame(card_content, bg=COLORS['info'], height=0)
-        selected_indicator.pack(fill=X)
-        selected_indicator.pack_propagate(False)
-        card.selected_indicator = selected_indicator
-        
-        # === 顶部：牌类型标签区域（使用牌的颜色作为背景） ===
-        card_header = Frame(card_content, bg=card_color, height=28)
-        card_header.pack(fill=X)
-        card_header.pack_propagate(False)
-        
-        # 左侧：牌类型图标和文字
-        header_left = Frame(card_header, bg=card_color)
-        header_left.pack(side=LEFT, fill=Y, padx=(SPACING['sm'], 0), pady=SPACING['xs'])
-        Label(header_left, text=card_icon, font=('Microsoft YaHei UI', 12, 'bold'), 
-              bg=card_color, fg=COLORS['text_light']).pack(side=LEFT, padx=(0, 2))
-        Label(header_left, text=card_type, font=('Microsoft YaHei UI', 9, 'bold'), 
-              bg=card_color, fg=COLORS['text_light']).pack(side=LEFT)
-        
-        # 右侧：序号标签（小圆点样式）
-        header_right = Frame(card_header, bg=card_color)
-        header_right.pack(side=RIGHT, fill=Y, padx=(0, SPACING['sm']), pady=SPACING['xs'])
-        Label(header_right, text=f"#{index+1}", font=('Microsoft YaHei UI', 8), 
-              bg=card_color, fg=COLORS['text_light'], 
-              padx=4, pady=1).pack()
-        
-        # === 中间：球员信息区域（使用浅色背景突出显示） ===
-        player_info_frame = Frame(card_content, bg=card_color_light)
-        player_info_frame.pack(fill=BOTH, expand=True, padx=0, pady=0)
-        
-        # 解析player_info，提取号码和姓名（格式：编号,姓名）
-        if ',' in player_info:
-            number, name = player_info.split(',', 1)
-        else:
-            number = player_info
-            name = ""
-        
-        # 球员号码（大号显示）
-        number_label = Label(player_info_frame, text=number, 
-                            font=('Microsoft YaHei UI', 16, 'bold'),
-                            bg=card_color_light, fg=card_text_color)
-        number_label.pack(pady=(SPACING['md'], SPACING['xs']))
-        
-        # 球员姓名（小号显示）
-        if name:
-            name_label = Label(player_info_frame, text=name,
-                              font=('Microsoft YaHei UI', 9),
-                              bg=card_color_light, fg=COLORS['text_dark'],
-                              wraplength=100)
-            name_label.pack(pady=(0, SPACING['md']))
-        
-        # === 底部：时间和删除按钮区域 ===
-        bottom_frame = Frame(card_content, bg=card_bg, height=24)
-        bottom_frame.pack(fill=X, side=BOTTOM)
-        bottom_frame.pack_propagate(False)
-        
-        # 左侧：时间
-        time_frame = Frame(bottom_frame, bg=card_bg)
-        time_frame.pack(side=LEFT, fill=Y, padx=(SPACING['sm'], 0), pady=SPACING['xs'])
-        Label(time_frame, text=timestamp, font=('Microsoft YaHei UI', 7),
-              bg=card_bg, fg=COLORS['text_muted']).pack()
-        
-        # 右侧：删除按钮（小图标样式）
-        delete_frame = Frame(bottom_frame, bg=card_bg)
-        delete_frame.pack(side=RIGHT, fill=Y, padx=(0, SPACING['xs']), pady=2)
-        btn_delete = Button(delete_frame, text="✕", bg="#DC3545", fg="white", 
-                           font=('Arial', 8, 'bold'), relief=FLAT, cursor="hand2", 
-                           padx=4, pady=1, bd=0, width=3, height=1,
-                           command=delete_callback,
-                           activebackground="#C62828", activeforeground="white")
-        btn_delete.pack()
-        
-        card.card_index = index
-        card.card_type = card_type
-        
-        # 绑定点击事件（除了删除按钮）
-        def bind_click(widget):
-            if not isinstance(widget, Button):
-                widget.bind("<Button-1>", lambda e: select_callback())
-            for child in widget.winfo_children():
-                if child != btn_delete:
-                    bind_click(child)
-        bind_click(card)
+        self.engine.delete('sub', 'home', index)
     
-    # 创建主队红黄牌卡片
-    def create_card_red_home(self, index, player_info, card_type, timestamp):
-        self.create_card_red(self.red_home_cards_frame, index, player_info, card_type, timestamp,
-                           lambda: self.select_card_red_home(index), lambda: self.delete_card_red_home(index))
-
-    # 创建客队红黄牌卡片
-    def create_card_red_away(self, index, player_info, card_type, timestamp):
-        self.create_card_red(self.red_away_cards_frame, index, player_info, card_type, timestamp,
-                           lambda: self.select_card_red_away(index), lambda: self.delete_card_red_away(index))
-
-    # 主队红牌
-    def red_home_add(self):
-        number = self.red_home_entry.get().strip()
+    # ---------- 红黄牌 ----------
+    def _add_card(self, team_type, card, entry, display_label):
+        """通用添加红黄牌方法（card为"红牌"或"黄牌"）"""
+        number = entry.get().strip()
         if not number:
             return
         
-        player_info = self.find_player_by_number(number, home_list)
+        player_info = self.engine.find_player(team_type, number)
         if player_info is None:
-            self.red_card_display_label.config(text=f"未找到编号 {number}")
+            display_label.config(text=f"未找到编号 {number}")
             return
         
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.red_home_list.append((player_info, "红牌", timestamp))
-        
-        self.create_card_red_home(len(self.red_home_list) - 1, player_info, "红牌", timestamp)
-        
-        # 更新预览标题显示队伍名称
-        if hasattr(self, 'card_preview_title_var'):
-            self.card_preview_title_var.set(teamname_home)
-        # 更新预览标题背景颜色和文字颜色为队伍颜色
-        if hasattr(self, 'card_preview_header'):
-            self.card_preview_header.config(bg=self.team_home_color)
-            if hasattr(self, 'card_preview_title_label'):
-                text_color = get_contrast_text_color(self.team_home_color)
-                self.card_preview_title_label.config(bg=self.team_home_color, fg=text_color)
-        
-        # 更新红牌预览，清空黄牌预览
-        self.red_card_display_label.config(text=f"{teamname_home}\n{player_info}")
-        self.yellow_card_display_label.config(text="")
-        
-        # 更新按钮类型为红牌
-        self.current_card_type = "red_card"
-        if hasattr(self, 'card_button'):
-            self.card_button.update_subtitle_type("red_card")
-        
-        # 调整宽度比例：红牌75%，黄牌25%
-        self.card_preview_content.grid_columnconfigure(0, weight=3)
-        self.card_preview_content.grid_columnconfigure(1, weight=1)
-        
-        FileManager.write_csv('red_card.csv', f"{teamname_home},{player_info}")
-        
-        self.red_home_entry.delete(0, END)
-        print(f"✓ 主队红牌 - {player_info}")
-
+        self.engine.add_card(team_type, player_info, card)
+    
+    # 主队红牌
+    @timed
+    def red_home_add(self):
+        self._add_card('home', "红牌", self.red_home_entry, self.red_card_display_label)
+    
     # 主队黄牌
+    @timed
     def yellow_home_add(self):
-        number = self.red_home_entry.get().strip()
-        if not number:
-            return
-        
-        player_info = self.find_player_by_number(number, home_list)
-        if player_info is None:
-            self.yellow_card_display_label.config(text=f"未找到编号 {number}")
-            return
-        
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.red_home_list.append((player_info, "黄牌", timestamp))
-        
-        self.create_card_red_home(len(self.red_home_list) - 1, player_info, "黄牌", timestamp)
-        
-        # 更新预览标题显示队伍名称
-        if hasattr(self, 'card_preview_title_var'):
-            self.card_preview_title_var.set(teamname_home)
-        # 更新预览标题背景颜色和文字颜色为队伍颜色
-        if hasattr(self, 'card_preview_header'):
-            self.card_preview_header.config(bg=self.team_home_color)
-            if hasattr(self, 'card_preview_title_label'):
-                text_color = get_contrast_text_color(self.team_home_color)
-                self.card_preview_title_label.config(bg=self.team_home_color, fg=text_color)
-        
-        # 更新黄牌预览，清空红牌预览
-        self.yellow_card_display_label.config(text=f"{teamname_home}\n{player_info}")
-        self.red_card_display_label.config(text="")
-        
-        # 更新按钮类型为黄牌
-        self.current_card_type = "yellow_card"
-        if hasattr(self, 'card_button'):
-            self.card_button.update_subtitle_type("yellow_card")
-        
-        # 调整宽度比例：红牌25%，黄牌75%
-        self.card_preview_content.grid_columnconfigure(0, weight=1)
-        self.card_preview_content.grid_columnconfigure(1, weight=3)
-        
-        FileManager.write_csv('yellow_card.csv', f"{teamname_home},{player_info}")
-        
-        self.red_home_entry.delete(0, END)
-        print(f"✓ 主队黄牌 - {player_info}")
-
+        self._add_card('home', "黄牌", self.red_home_entry, self.yellow_card_display_label)
+    
     # 客队红牌
+    @timed
     def red_away_add(self):
-        number = self.red_away_entry.get().strip()
-        if not number:
-            return
-        
-        player_info = self.find_player_by_number(number, away_list)
-        if player_info is None:
-            self.red_card_display_label.config(text=f"未找到编号 {number}")
-            return
-        
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.red_away_list.append((player_info, "红牌", timestamp))
-        
-        self.create_card_red_away(len(self.red_away_list) - 1, player_info, "红牌", timestamp)
-        
-        # 更新预览标题显示队伍名称
-        if hasattr(self, 'card_preview_title_var'):
-            self.card_preview_title_var.set(teamname_away)
-        # 更新预览标题背景颜色和文字颜色为队伍颜色
-        if hasattr(self, 'card_preview_header'):
-            self.card_preview_header.config(bg=self.team_away_color)
-            if hasattr(self, 'card_preview_title_label'):
-                text_color = get_contrast_text_color(self.team_away_color)
-                self.card_preview_title_label.config(bg=self.team_away_color, fg=text_color)
-        
-        # 更新红牌预览，清空黄牌预览
-        self.red_card_display_label.config(text=f"{teamname_away}\n{player_info}")
-        self.yellow_card_display_label.config(text="")
-        
-        # 更新按钮类型为红牌
-        self.current_card_type = "red_card"
-        if hasattr(self, 'card_button'):
-            self.card_button.update_subtitle_type("red_card")
-        
-        # 调整宽度比例：红牌75%，黄牌25%
-        self.card_preview_content.grid_columnconfigure(0, weight=3)
-        self.card_preview_content.grid_columnconfigure(1, weight=1)
-        
-        FileManager.write_csv('red_card.csv', f"{teamname_away},{player_info}")
-        
-        self.red_away_entry.delete(0, END)
-        print(f"✓ 客队红牌 - {player_info}")
-
+        self._add_card('away', "红牌", self.red_away_entry, self.red_card_display_label)
+    
     # 客队黄牌
+    @timed
     def yellow_away_add(self):
-        number = self.red_away_entry.get().strip()
-        if not number:
-            return
-        
-        player_info = self.find_player_by_number(number, away_list)
-        if player_info is None:
-            self.yellow_card_display_label.config(text=f"未找到编号 {number}")
-            return
-        
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.red_away_list.append((player_info, "黄牌", timestamp))
-        
-        self.create_card_red_away(len(self.red_away_list) - 1, player_info, "黄牌", timestamp)
-        
-        # 更新预览标题显示队伍名称
-        if hasattr(self, 'card_preview_title_var'):
-            self.card_preview_title_var.set(teamname_away)
-        # 更新预览标题背景颜色和文字颜色为队伍颜色
-        if hasattr(self, 'card_preview_header'):
-            self.card_preview_header.config(bg=self.team_away_color)
-            if hasattr(self, 'card_preview_title_label'):
-                text_color = get_contrast_text_color(self.team_away_color)
-                self.card_preview_title_label.config(bg=self.team_away_color, fg=text_color)
-        
-        # 更新黄牌预览，清空红牌预览
-        self.yellow_card_display_label.config(text=f"{teamname_away}\n{player_info}")
-        self.red_card_display_label.config(text="")
-        
-        # 更新按钮类型为黄牌
-        self.current_card_type = "yellow_card"
-        if hasattr(self, 'card_button'):
-            self.card_button.update_subtitle_type("yellow_card")
-        
-        # 调整宽度比例：红牌25%，黄牌75%
-        self.card_preview_content.grid_columnconfigure(0, weight=1)
-        self.card_preview_content.grid_columnconfigure(1, weight=3)
-        
-        FileManager.write_csv('yellow_card.csv', f"{teamname_away},{player_info}")
-        
-        self.red_away_entry.delete(0, END)
-        print(f"✓ 客队黄牌 - {player_info}")
-
-    def _select_card_red(self, team_type, index, card_list, cards_frame, team_name):
-        """通用选择红黄牌卡片方法（确保同时只能有一个卡片被选中）"""
-        player_info, card_type, timestamp = card_list[index]
-        
-        # 更新预览标题显示队伍名称
-        if hasattr(self, 'card_preview_title_var'):
-            self.card_preview_title_var.set(team_name)
-        # 更新预览标题背景颜色和文字颜色为队伍颜色
-        if hasattr(self, 'card_preview_header'):
-            team_color = self.team_home_color if team_type == 'home' else self.team_away_color
-            self.card_preview_header.config(bg=team_color)
-            if hasattr(self, 'card_preview_title_label'):
-                text_color = get_contrast_text_color(team_color)
-                self.card_preview_title_label.config(bg=team_color, fg=text_color)
-        
-        if card_type == "红牌":
-            # 更新红牌预览，清空黄牌预览
-            self.red_card_display_label.config(text=f"{team_name}\n{player_info}")
-            self.yellow_card_display_label.config(text="")
-            # 更新按钮类型为红牌
-            self.current_card_type = "red_card"
-            if hasattr(self, 'card_button'):
-                self.card_button.update_subtitle_type("red_card")
-            # 调整宽度比例：红牌75%，黄牌25%
-            self.card_preview_content.grid_columnconfigure(0, weight=3)
-            self.card_preview_content.grid_columnconfigure(1, weight=1)
-            FileManager.write_csv('red_card.csv', f"{team_name},{player_info}")
-        else:
-            # 更新黄牌预览，清空红牌预览
-            self.yellow_card_display_label.config(text=f"{team_name}\n{player_info}")
-            self.red_card_display_label.config(text="")
-            # 更新按钮类型为黄牌
-            self.current_card_type = "yellow_card"
-            if hasattr(self, 'card_button'):
-                self.card_button.update_subtitle_type("yellow_card")
-            # 调整宽度比例：红牌25%，黄牌75%
-            self.card_preview_content.grid_columnconfigure(0, weight=1)
-            self.card_preview_content.grid_columnconfigure(1, weight=3)
-            FileManager.write_csv('yellow_card.csv', f"{team_name},{player_info}")
-        
-        # 更新选中状态（增强高亮效果，适配新设计）
-        def update_card_style(card_widget, is_selected):
-            try:
-                if is_selected:
-                    # 使用深蓝色边框高亮
-                    highlight_border = "#2196F3"  # 深蓝色边框
-                    card_widget.config(relief=RAISED, bd=2,
-                                highlightthickness=3, highlightbackground=highlight_border)
-                    # 显示选中指示条（顶部蓝色条）
-                    if hasattr(card_widget, 'selected_indicator'):
-                        card_widget.selected_indicator.config(height=4, bg=highlight_border)
-                else:
-                    # 恢复默认样式（与创建时一致）
-                    card_widget.config(bg=COLORS['bg_card'], relief=FLAT, bd=1,
-                                highlightthickness=2, highlightbackground=COLORS['border'])
-                    # 隐藏选中指示条（高度设为0）
-                    if hasattr(card_widget, 'selected_indicator'):
-                        card_widget.selected_indicator.config(height=0, bg=COLORS['info'])
-            except Exception as e:
-                pass
-        
-        # 先清除另一个队伍的所有选中状态
-        if team_type == 'home':
-            # 清除客队的所有选中状态
-            if hasattr(self, 'red_away_cards_frame'):
-                for card in self.red_away_cards_frame.winfo_children():
-                    update_card_style(card, False)
-        else:
-            # 清除主队的所有选中状态
-            if hasattr(self, 'red_home_cards_frame'):
-                for card in self.red_home_cards_frame.winfo_children():
-                    update_card_style(card, False)
-        
-        # 更新当前队伍的选中状态
-        for card in cards_frame.winfo_children():
-            if hasattr(card, 'card_index') and card.card_index == index:
-                update_card_style(card, True)
-            else:
-                update_card_style(card, False)
+        self._add_card('away', "黄牌", self.red_away_entry, self.yellow_card_display_label)
     
     # 选择主队卡片
+    @timed
     def select_card_red_home(self, index):
-        self._select_card_red('home', index, self.red_home_list, self.red_home_cards_frame, teamname_home)
-
+        self.engine.select('card', 'home', index)
+    
     # 选择客队卡片
+    @timed
     def select_card_red_away(self, index):
-        self._select_card_red('away', index, self.red_away_list, self.red_away_cards_frame, teamname_away)
-
+        self.engine.select('card', 'away', index)
+    
     # 主队清空
+    @timed
     def red_home_clear(self):
-        # 清空两个预览区域
-        self.red_card_display_label.config(text="")
-        self.yellow_card_display_label.config(text="")
-        # 恢复宽度比例为各50%
-        self.card_preview_content.grid_columnconfigure(0, weight=1)
-        self.card_preview_content.grid_columnconfigure(1, weight=1)
-        self.red_home_entry.delete(0, END)
-        self.red_home_list = []
-        
-        for widget in self.red_home_cards_frame.winfo_children():
-            widget.destroy()
-        
-        for filename in ['red_card.csv', 'yellow_card.csv']:
-            FileManager.clear_file(filename)
-
+        self.engine.clear('card', 'home')
+    
     # 客队清空
+    @timed
     def red_away_clear(self):
-        # 清空两个预览区域
-        self.red_card_display_label.config(text="")
-        self.yellow_card_display_label.config(text="")
-        # 恢复宽度比例为各50%
-        self.card_preview_content.grid_columnconfigure(0, weight=1)
-        self.card_preview_content.grid_columnconfigure(1, weight=1)
-        self.red_away_entry.delete(0, END)
-        self.red_away_list = []
-        
-        for widget in self.red_away_cards_frame.winfo_children():
-            widget.destroy()
-        
-        for filename in ['red_card.csv', 'yellow_card.csv']:
-            FileManager.clear_file(filename)
-
-    '''记分板'''
-    def _save_scoreboard(self):
-        """保存记分板到CSV"""
-        content = f"{teamname_home},{self.scoreHomeVar.get()},{self.team_home_color}\n{teamname_away},{self.scoreAwayVar.get()},{self.team_away_color}\n{self.sessionVar.get()}"
-        FileManager.write_csv('scoreboard.csv', content)
+        self.engine.clear('card', 'away')
+    
+    # 删除主队红黄牌卡片
+    @timed
+    def delete_card_red_home(self, index):
+        self.engine.delete('card', 'home', index)
+    
+    # 删除客队红黄牌卡片
+    @timed
+    def delete_card_red_away(self, index):
+        self.engine.delete('card', 'away', index)
     
+    '''记分板'''
     def _update_session_button_colors(self, *args):
         """更新场次选择按钮的文字颜色（选中时白色，未选中时深色）"""
         current_value = self.sessionVar.get()
@@ -3519,429 +6536,210 @@ class MY_GUI():
                 # 未选中状态：深色文字
                 radio.config(fg=COLORS['text_dark'])
     
+    @timed
+    @vmix_transaction
     def scoreboard_session_switch(self):
-        self._save_scoreboard()
-
+        self.engine.set_session(self.sessionVar.get())
+    
+    @timed
+    @vmix_transaction
     def scoreboard_home_scoreplus(self):
-        self.scoreHomeVar.set(self.scoreHomeVar.get() + 1)
-        self._save_scoreboard()
+        self.engine.change_score('home', 1)
     
+    @timed
+    @vmix_transaction
     def scoreboard_away_scoreplus(self):
-        self.scoreAwayVar.set(self.scoreAwayVar.get() + 1)
-        self._save_scoreboard()
+        self.engine.change_score('away', 1)
     
+    @timed
+    @vmix_transaction
     def scoreboard_home_scoreminus(self):
-        self.scoreHomeVar.set(max(0, self.scoreHomeVar.get() - 1))
-        self._save_scoreboard()
+        self.engine.change_score('home', -1)
     
+    @timed
+    @vmix_transaction
     def scoreboard_away_scoreminus(self):
-        self.scoreAwayVar.set(max(0, self.scoreAwayVar.get() - 1))
-        self._save_scoreboard()
+        self.engine.change_score('away', -1)
     
+    @timed
+    @vmix_transaction
     def scoreboard_score_clear(self):
-        self.scoreHomeVar.set(0)
-        self.scoreAwayVar.set(0)
-        self._save_scoreboard()
-
+        self.engine.reset_score()
+    
     '''进球信息'''
-    # 主队进球
-    def goal_home_add(self):
-        player_num = self.goal_home_entry.get().strip()
-        
+    def _add_goal(self, team_type, entry):
+        """通用添加进球方法（记录进球时的比分）"""
+        player_num = entry.get().strip()
         if not player_num:
             return
         
-        # 查找球员
-        player_info = self.find_player_by_number(player_num, home_list)
-        
+        player_info = self.engine.find_player(team_type, player_num)
         if player_info is None:
             self.goal_display_label.config(text=f"未找到编号 {player_num} 的球员")
             return
         
-        # 获取当前比分
-        current_score_home = self.scoreHomeVar.get()
-        current_score_away = self.scoreAwayVar.get()
-        
-        # 添加到列表（包含比分信息）
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.goal_home_list.append((player_info, timestamp, current_score_home, current_score_away))
-        
-        # 创建卡片
-        self.create_goal_card_home(len(self.goal_home_list) - 1, player_info, timestamp, current_score_home, current_score_away)
-        
-        # 更新预览标题显示队伍名称
-        if hasattr(self, 'goal_preview_title_var'):
-            self.goal_preview_title_var.set(teamname_home)
-        # 更新预览标题背景颜色和文字颜色为队伍颜色
-        if hasattr(self, 'goal_preview_header'):
-            self.goal_preview_header.config(bg=self.team_home_color)
-            if hasattr(self, 'goal_preview_title_label'):
-                text_color = get_contrast_text_color(self.team_home_color)
-                self.goal_preview_title_label.config(bg=self.team_home_color, fg=text_color)
-        
-        # 更新预览
-        self.goal_display_label.config(text=f"{teamname_home}\n{player_info}")
-        
-        # 保存到CSV（格式：球队名称,号码,姓名）
-        parts = player_info.split(',')
-        if len(parts) == 2:
-            FileManager.write_csv('goal.csv', f"{teamname_home},{parts[0]},{parts[1]}\n")
-        
-        # 清空输入框
-        self.goal_home_entry.delete(0, END)
-        
-        print(f"✓ 主队进球 - {teamname_home}: {player_info}")
+        self.engine.add_goal(team_type, player_info)
+    
+    # 主队进球
+    @timed
+    @vmix_transaction
+    def goal_home_add(self):
+        self._add_goal('home', self.goal_home_entry)
     
     # 客队进球
+    @timed
+    @vmix_transaction
     def goal_away_add(self):
-        player_num = self.goal_away_entry.get().strip()
-        
-        if not player_num:
-            return
-        
-        # 查找球员
-        player_info = self.find_player_by_number(player_num, away_list)
-        
-        if player_info is None:
-            self.goal_display_label.config(text=f"未找到编号 {player_num} 的球员")
-            return
-        
-        # 获取当前比分
-        current_score_home = self.scoreHomeVar.get()
-        current_score_away = self.scoreAwayVar.get()
-        
-        # 添加到列表（包含比分信息）
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.goal_away_list.append((player_info, timestamp, current_score_home, current_score_away))
-        
-        # 创建卡片
-        self.create_goal_card_away(len(self.goal_away_list) - 1, player_info, timestamp, current_score_home, current_score_away)
-        
-        # 更新预览标题显示队伍名称
-        if hasattr(self, 'goal_preview_title_var'):
-            self.goal_preview_title_var.set(teamname_away)
-        # 更新预览标题背景颜色和文字颜色为队伍颜色
-        if hasattr(self, 'goal_preview_header'):
-            self.goal_preview_header.config(bg=self.team_away_color)
-            if hasattr(self, 'goal_preview_title_label'):
-                text_color = get_contrast_text_color(self.team_away_color)
-                self.goal_preview_title_label.config(bg=self.team_away_color, fg=text_color)
-        
-        # 更新预览
-        self.goal_display_label.config(text=f"{teamname_away}\n{player_info}")
-        
-        # 保存到CSV（格式：球队名称,号码,姓名）
-        parts = player_info.split(',')
-        if len(parts) == 2:
-            FileManager.write_csv('goal.csv', f"{teamname_away},{parts[0]},{parts[1]}\n")
-        
-        # 清空输入框
-        self.goal_away_entry.delete(0, END)
-        
-        print(f"✓ 客队进球 - {teamname_away}: {player_info}")
-    
-    # 创建主队进球卡片
-    def create_goal_card(self, parent_frame, index, player_info, timestamp, score_home, score_away, select_callback, delete_callback):
-        """通用进球卡片创建方法（优化布局，紧凑美观，显示比分）"""
-        # 使用Grid布局，支持多列显示以减少空间浪费
-        card = Frame(parent_frame, bg=COLORS['bg_card'], relief=FLAT, bd=1,
-                    highlightthickness=1, highlightbackground=COLORS['border'])
-        card.grid(row=index // 7, column=index % 7, padx=SPACING['xs'], pady=SPACING['xs'], 
-                 sticky="nsew")
-        
-        # 确保父容器已配置Grid列
-        col = index % 7
-        try:
-            parent_frame.grid_columnconfigure(col, weight=1, uniform="card_col")
-        except (TclError, AttributeError):
-            pass
-        
-        # 卡片内容容器（紧凑布局）
-        card_content = Frame(card, bg=COLORS['bg_card'], padx=SPACING['sm'], pady=SPACING['xs'])
-        card_content.pack(fill=BOTH, expand=True)
-        
-        # 顶部选中指示条（初始隐藏）
-        selected_indicator = Frame(card_content, bg=COLORS['info'], height=0)
-        selected_indicator.pack(fill=X, pady=(0, SPACING['xs']))
-        selected_indicator.pack_propagate(False)
-        card.selected_indicator = selected_indicator
-        
-        # 顶部：编号和时间（增大字体）
-        top_line = Frame(card_content, bg=COLORS['bg_card'], height=24)
-        top_line.pack(fill=X)
-        top_line.pack_propagate(False)
-        Label(top_line, text=f"#{index+1}", font=('YaHei', 9, 'bold'), 
-              bg=COLORS['bg_card'], fg=COLORS['text_muted']).pack(side=LEFT)
-        Label(top_line, text=timestamp, font=('YaHei', 8), 
-              bg=COLORS['bg_card'], fg=COLORS['text_muted']).pack(side=RIGHT)
-        
-        # 进球信息区域（使用左侧颜色条）
-        goal_frame = Frame(card_content, bg=COLORS['bg_card'], height=50)
-        goal_frame.pack(fill=X, pady=(SPACING['xs']//2, 0))
-        goal_frame.pack_propagate(False)
-        
-        # 左侧颜色指示条（绿色表示进球）
-        goal_indicator = Frame(goal_frame, bg="#4CAF50", width=4)
-        goal_indicator.pack(side=LEFT, fill=Y, padx=(0, SPACING['xs']))
-        goal_indicator.pack_propagate(False)
-        
-        # 进球信息（显示比分和球员信息）
-        goal_info = Frame(goal_frame, bg=COLORS['bg_card'])
-        goal_info.pack(side=LEFT, fill=BOTH, expand=True, padx=(0, SPACING['xs']))
-        # 显示比分而不是"进球"
-        score_text = f"{score_home}:{score_away}"
-        Label(goal_info, text=f"⚽ {score_text}", font=('YaHei', 9, 'bold'), 
-              bg=COLORS['bg_card'], fg="#4CAF50", anchor=W).pack(anchor=W)
-        Label(goal_info, text=player_info, font=('YaHei', 9), 
-              bg=COLORS['bg_card'], fg=COLORS['text_dark'], anchor=W, 
-              wraplength=80, justify=LEFT).pack(anchor=W, pady=(2, 0))
-        
-        # 删除按钮（紧凑，小尺寸）
-        btn_delete = Button(card_content, text="✕", bg="#DC3545", fg="white", 
-                           font=('Arial', 9, 'bold'), relief=FLAT, cursor="hand2", 
-                           padx=SPACING['sm'], pady=SPACING['xs']//2, bd=0, 
-                           command=delete_callback,
-                           activebackground="#C62828", activeforeground="white")
-        btn_delete.pack(fill=X, pady=(SPACING['xs'], 0))
-        
-        card.card_index = index
-        
-        # 绑定点击事件（除了删除按钮）
-        def bind_click(widget):
-            if not isinstance(widget, Button):
-                widget.bind("<Button-1>", lambda e: select_callback())
-            for child in widget.winfo_children():
-                if child != btn_delete:
-                    bind_click(child)
-        bind_click(card)
-    
-    def create_goal_card_home(self, index, player_info, timestamp, score_home, score_away):
-        self.create_goal_card(self.goal_home_cards_frame, index, player_info, timestamp, score_home, score_away,
-                           lambda: self.select_goal_card_home(index), lambda: self.delete_goal_card_home(index))
-    
-    # 创建客队进球卡片
-    def create_goal_card_away(self, index, player_info, timestamp, score_home, score_away):
-        self.create_goal_card(self.goal_away_cards_frame, index, player_info, timestamp, score_home, score_away,
-                           lambda: self.select_goal_card_away(index), lambda: self.delete_goal_card_away(index))
-    
-    def _select_goal_card(self, team_type, index, goal_list, cards_frame, team_name):
-        """通用选择进球卡片方法（确保同时只能有一个卡片被选中）"""
-        # 列表结构：(player_info, timestamp, score_home, score_away)
-        if len(goal_list[index]) >= 4:
-            player_info, timestamp, score_home, score_away = goal_list[index]
-        else:
-            # 兼容旧数据格式
-            player_info, timestamp = goal_list[index]
-            score_home, score_away = 0, 0
-        
-        # 更新预览标题显示队伍名称
-        if hasattr(self, 'goal_preview_title_var'):
-            self.goal_preview_title_var.set(team_name)
-        # 更新预览标题背景颜色和文字颜色为队伍颜色
-        if hasattr(self, 'goal_preview_header'):
-            team_color = self.team_home_color if team_type == 'home' else self.team_away_color
-            self.goal_preview_header.config(bg=team_color)
-            if hasattr(self, 'goal_preview_title_label'):
-                text_color = get_contrast_text_color(team_color)
-                self.goal_preview_title_label.config(bg=team_color, fg=text_color)
-        
-        # 更新预览
-        self.goal_display_label.config(text=f"{team_name}\n{player_info}")
-        
-        # 保存到CSV
-        parts = player_info.split(',')
-        if len(parts) == 2:
-            FileManager.write_csv('goal.csv', f"{team_name},{parts[0]},{parts[1]}\n")
-        
-        # 更新选中状态（增强高亮效果，保持文字清晰）
-        def update_card_style(card_widget, is_selected):
-            try:
-                if is_selected:
-                    # 使用浅蓝色背景高亮，但足够深以保持文字清晰
-                    highlight_bg = "#BBDEFB"  # 浅蓝色背景
-                    card_widget.config(bg=highlight_bg, relief=RAISED, bd=3,
-                                highlightthickness=4, highlightbackground="#2196F3")  # 深蓝色边框
-                    # 显示选中指示条
-                    if hasattr(card_widget, 'selected_indicator'):
-                        card_widget.selected_indicator.config(height=5, bg="#2196F3")  # 深蓝色指示条
-                    
-                    # 更新卡片内容容器的背景色
-                    for child in card_widget.winfo_children():
-                        if isinstance(child, Frame):
-                            try:
-                                child_bg = child.cget('bg')
-                                if child_bg == COLORS['bg_card']:
-                                    child.config(bg=highlight_bg)
-                                # 递归更新子组件背景色（但保留颜色指示条）
-                                def update_children_bg(widget):
-                                    for c in widget.winfo_children():
-                                        if isinstance(c, (Frame, Label)):
-                                            try:
-                                                c_bg = c.cget('bg')
-                                                # 不改变颜色指示条和按钮的背景色
-                                                if c_bg == COLORS['bg_card'] and c_bg not in ["#4CAF50", "#DC3545"]:
-                                                    c.config(bg=highlight_bg)
-                                                elif c_bg in ["#4CAF50"]:
-                                                    pass  # 保持原色
-                                                update_children_bg(c)
-                                            except (TclError, AttributeError, RuntimeError):
-                                                pass
-                                update_children_bg(child)
-                            except (TclError, AttributeError, RuntimeError):
-                                pass
-                else:
-                    card_widget.config(bg=COLORS['bg_card'], relief=FLAT, bd=1,
-                                highlightthickness=1, highlightbackground=COLORS['border'])
-                    # 隐藏选中指示条（高度设为0）
-                    if hasattr(card_widget, 'selected_indicator'):
-                        card_widget.selected_indicator.config(height=0)
-                    
-                    # 恢复所有背景色为默认
-                    def restore_bg(widget):
-                        for child in widget.winfo_children():
-                            if isinstance(child, (Frame, Label)):
-                                try:
-                                    child_bg = child.cget('bg')
-                                    if child_bg == "#BBDEFB":
-                                        child.config(bg=COLORS['bg_card'])
-                                    restore_bg(child)
-                                except (TclError, AttributeError, RuntimeError):
-                                    pass
-                    restore_bg(card_widget)
-            except Exception as e:
-                pass
-        
-        # 先清除另一个队伍的所有选中状态
-        if team_type == 'home':
-            # 清除客队的所有选中状态
-            if hasattr(self, 'goal_away_cards_frame'):
-                for card in self.goal_away_cards_frame.winfo_children():
-                    update_card_style(card, False)
-        else:
-            # 清除主队的所有选中状态
-            if hasattr(self, 'goal_home_cards_frame'):
-                for card in self.goal_home_cards_frame.winfo_children():
-                    update_card_style(card, False)
-        
-        # 更新当前队伍的选中状态
-        for card in cards_frame.winfo_children():
-            if hasattr(card, 'card_index') and card.card_index == index:
-                update_card_style(card, True)
-            else:
-                update_card_style(card, False)
+        self._add_goal('away', self.goal_away_entry)
     
     # 选择主队进球卡片
+    @timed
+    @vmix_transaction
     def select_goal_card_home(self, index):
-        self._select_goal_card('home', index, self.goal_home_list, self.goal_home_cards_frame, teamname_home)
+        self.engine.select('goal', 'home', index)
     
     # 选择客队进球卡片
+    @timed
+    @vmix_transaction
     def select_goal_card_away(self, index):
-        self._select_goal_card('away', index, self.goal_away_list, self.goal_away_cards_frame, teamname_away)
+        self.engine.select('goal', 'away', index)
     
     # 清空主队进球
+    @timed
     def goal_home_clear(self):
-        self.goal_display_label.config(text="--- 等待输入 ---")
-        self.goal_home_entry.delete(0, END)
-        self.goal_home_list = []
-        
-        # 清空所有卡片
-        for widget in self.goal_home_cards_frame.winfo_children():
-            widget.destroy()
-        
-        # 清空CSV
-        FileManager.clear_file('goal.csv')
+        self.engine.clear('goal', 'home')
     
     # 清空客队进球
+    @timed
     def goal_away_clear(self):
-        self.goal_display_label.config(text="--- 等待输入 ---")
-        self.goal_away_entry.delete(0, END)
-        self.goal_away_list = []
-        
-        # 清空所有卡片
-        for widget in self.goal_away_cards_frame.winfo_children():
-            widget.destroy()
-        
-        # 清空CSV
-        FileManager.clear_file('goal.csv')
-    
-    # 删除主队红黄牌卡片
-    def delete_card_red_home(self, index):
-        if index < len(self.red_home_list):
-            del self.red_home_list[index]
-            
-            # 重新创建所有卡片
-            for widget in self.red_home_cards_frame.winfo_children():
-                widget.destroy()
-            
-            for i, (player_info, card_type, timestamp) in enumerate(self.red_home_list):
-                self.create_card_red_home(i, player_info, card_type, timestamp)
-            
-            print(f"✓ 已删除主队第{index+1}个红黄牌记录")
-    
-    # 删除客队红黄牌卡片
-    def delete_card_red_away(self, index):
-        if index < len(self.red_away_list):
-            del self.red_away_list[index]
-            
-            # 重新创建所有卡片
-            for widget in self.red_away_cards_frame.winfo_children():
-                widget.destroy()
-            
-            for i, (player_info, card_type, timestamp) in enumerate(self.red_away_list):
-                self.create_card_red_away(i, player_info, card_type, timestamp)
-            
-            print(f"✓ 已删除客队第{index+1}个红黄牌记录")
+        self.engine.clear('goal', 'away')
     
     # 删除主队进球卡片
+    @timed
     def delete_goal_card_home(self, index):
-        if index < len(self.goal_home_list):
-            del self.goal_home_list[index]
-            
-            # 重新创建所有卡片
-            for widget in self.goal_home_cards_frame.winfo_children():
-                widget.destroy()
-            
-            for i, goal_data in enumerate(self.goal_home_list):
-                # 兼容新旧数据格式
-                if len(goal_data) >= 4:
-                    player_info, timestamp, score_home, score_away = goal_data
-                else:
-                    player_info, timestamp = goal_data
-                    score_home, score_away = 0, 0
-                self.create_goal_card_home(i, player_info, timestamp, score_home, score_away)
-            
-            print(f"✓ 已删除主队第{index+1}个进球记录")
+        self.engine.delete('goal', 'home', index)
     
     # 删除客队进球卡片
+    @timed
     def delete_goal_card_away(self, index):
-        if index < len(self.goal_away_list):
-            del self.goal_away_list[index]
-            
-            # 重新创建所有卡片
-            for widget in self.goal_away_cards_frame.winfo_children():
-                widget.destroy()
-            
-            for i, goal_data in enumerate(self.goal_away_list):
-                # 兼容新旧数据格式
-                if len(goal_data) >= 4:
-                    player_info, timestamp, score_home, score_away = goal_data
-                else:
-                    player_info, timestamp = goal_data
-                    score_home, score_away = 0, 0
-                self.create_goal_card_away(i, player_info, timestamp, score_home, score_away)
-            
-            print(f"✓ 已删除客队第{index+1}个进球记录")
+        self.engine.delete('goal', 'away', index)
 
 
 def gui_start():
+    startup = StartupTimer(_BOOT_STARTED)
+    startup.mark('imports', _BOOT_IMPORTED)
+    startup.mark('module', _BOOT_DEFINED)
+    setup_logging()
     # 初始化文件（在FileManager类定义之后）
     initialize_files()
+    startup.mark('files')
     
     init_window = Tk()    #实例化出一个父窗口
     AAA_PORTAL = MY_GUI(init_window)
+    startup.mark('window')
     # 设置根窗口默认属性
-    AAA_PORTAL.set_init_window()
+    AAA_PORTAL.set_init_window(startup)
+    if '--profile-startup' in sys.argv:
+        # 只测量启动：窗口可以操作（启动报告输出）后写出 startup_profile.json 并正常退出
+        init_window.after_idle(lambda: (startup.save_profile(), AAA_PORTAL.on_closing()))
     init_window.mainloop()   #父窗口进入事件循环，可以理解为保持窗口运行，否则界面不展示
 
+def headless_start(commands=None):
+    """无界面模式（渲染节点等没有显示器的机器）：只运行比赛引擎和各输出，从标准输入逐行读取命令
+    命令（team为home/away，序号从1开始）：
+      score <team> +1|-1|<比分>    reset                 session <场次>
+      sub <team> <换下> <换上>      card <team> <编号> 红牌|黄牌
+      goal <team> <编号>            select|delete <sub|card|goal> <team> <序号>
+      clear <sub|card|goal> <team>  state                 metrics
+      quit
+    """
+    setup_logging()
+    initialize_files()
+    vmix = VmixController()
+    for roster, squad in ((home_roster, vmix.home_squad), (away_roster, vmix.away_squad)):
+        if squad and not roster.set_squad(squad):
+            log.warning(f"✗ 名单中没有分组 [{squad}]，使用 [{roster.active_squad}]")
+    engine = MatchEngine({'home': home_roster, 'away': away_roster}, vmix.team_name_home, vmix.team_name_away,
+                         vmix.team_home_color, vmix.team_away_color)
+    outputs = MatchOutputs(engine, vmix)
+    outputs.recover()
+    if vmix.direct_title:
+        try:
+            if vmix.connect():
+                log.info("✓ 已连接到vMix")
+            else:
+                log.warning("✗ 无法连接到vMix，后台自动重试；连接前的命令暂存在离线队列")
+        except Exception as e:
+            log.error(f"✗ 无法连接到vMix: {e}")
+    
+    try:
+        for line in (commands if commands is not None else sys.stdin):
+            args = line.split()
+            if not args:
+                continue
+            if args[0] == 'quit':
+                break
+            try:
+                _run_headless_command(engine, args)
+            except (KeyError, IndexError, ValueError) as e:
+                log.warning(f"✗ 命令格式错误: {line.strip()} ({e})")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        outputs.close()
+        Metrics.shared().dump()
+        if vmix.direct_title:
+            for info in vmix.target_summary():
+                log.info(f"✓ vMix[{info['name']}] {info['address']} 发送 {info['sent']} 成功 {info['ok']} "
+                      f"拒绝 {info['rejected']} 失败 {info['failed']}")
+        vmix.disconnect()
+
+
+def _run_headless_command(engine, args):
+    """执行一条无界面模式命令"""
+    command = args[0]
+    if command == 'score':
+        team, value = args[1], args[2]
+        if value[0] in "+-":
+            engine.change_score(team, int(value))
+        else:
+            engine.set_score(team, int(value))
+    elif command == 'reset':
+        engine.reset_score()
+    elif command == 'session':
+        engine.set_session(args[1])
+    elif command in ('sub', 'card', 'goal'):
+        team = args[1]
+        numbers = args[2:4] if command == 'sub' else args[2:3]
+        players = [engine.find_player(team, number) for number in numbers]
+        if len(players) != (2 if command == 'sub' else 1) or None in players:
+            raise ValueError(f"名单中没有编号 {' '.join(numbers)}")
+        if command == 'sub':
+            engine.add_substitution(team, players[0], players[1])
+        elif command == 'card':
+            card = args[3] if len(args) > 3 else "黄牌"
+            if card not in ("红牌", "黄牌"):
+                raise ValueError(f"牌型应为红牌或黄牌: {card}")
+            engine.add_card(team, players[0], card)
+        else:
+            engine.add_goal(team, players[0])
+    elif command in ('select', 'delete'):
+        kind, team, index = args[1], args[2], int(args[3]) - 1
+        getattr(engine, command)(kind, team, index)
+    elif command == 'clear':
+        engine.clear(args[1], args[2])
+    elif command == 'state':
+        print(json.dumps(engine.scoreboard(), ensure_ascii=False))
+    elif command == 'metrics':
+        print(json.dumps(Metrics.shared().snapshot(), ensure_ascii=False, indent=2))
+    else:
+        raise ValueError(f"未知命令 {command}")
+
+
+_BOOT_DEFINED = time.perf_counter()
+
 if __name__ == "__main__":
-    gui_start()
\ No newline at end of file
+    if '--headless' in sys.argv:
+        headless_start()
+    else:
+        gui_start()
\ No newline at end of file
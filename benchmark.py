@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+"""控制链路延迟基准测试（从按下按钮到vMix收到命令）
+
+在本机启动vMix模拟器（vmix_simulator.py，记录每条FUNCTION命令的到达时间并立即应答），
+用合成的事件风暴驱动比赛逻辑：连续改比分、200次换人、连续红黄牌、连续上下字幕，
+统计以下各段延迟的 p50 / p99：
+
+    handler    按钮处理函数（比赛引擎调用，含所有观察者）耗时
+    callback   各观察者（日志、CSV、共享状态、直连标题、界面）的回调耗时
+    file       原子写入一个数据文件的耗时
+    file_lag   数据第一次变化到写入磁盘的延迟（含合并写入的等待时间）
+    send       命令提交到vMix模拟器收到的延迟
+    ack        命令提交到收到 FUNCTION OK 应答的延迟
+
+用法：
+    python benchmark.py                  # 无界面模式，直接驱动比赛引擎
+    python benchmark.py --gui            # 创建真实界面并调用按钮处理函数（需要显示器），额外统计界面回调耗时
+    python benchmark.py --scale 5 --json bench.json
+
+所有文件都写到临时目录，不会影响程序目录中的配置和数据文件。
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from vmix_simulator import VmixSimulator
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'a0.95.py')
+
+
+def load_app():
+    """加载主程序模块（文件名带点号，不能直接import）"""
+    spec = importlib.util.spec_from_file_location('vmix_app', APP_FILE)
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    return app
+
+
+def percentile(values, pct):
+    """最近秩百分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+# ============ 计时探针 ============
+class Probes:
+    """给传输层、数据文件写入和比赛引擎观察者挂上计时探针，按当前场景分别记录样本"""
+
+    def __init__(self, app, server):
+        self.app = app
+        self.server = server
+        self.samples = defaultdict(list)
+        self.submits = []  # 每条命令的提交时间（与服务器到达顺序一一对应）
+        self._pending_files = {}  # 文件名 -> 第一次变为待写的时间
+        self._lock = threading.Lock()
+
+    def add(self, metric, seconds):
+        with self._lock:
+            self.samples[metric].append(seconds)
+
+    def reset(self):
+        """开始新场景：清空样本，返回本场景开始时的命令序号"""
+        with self._lock:
+            self.samples = defaultdict(list)
+        return len(self.submits)
+
+    def hook_transport(self, transport):
+        original = transport.submit_batch
+
+        def submit_batch(items):
+            now = time.perf_counter()
+            for future, command in items:
+                self.submits.append(now)
+                future.add_done_callback(lambda f, t=now: self.add('ack', time.perf_counter() - t))
+            return original(items)
+
+        transport.submit_batch = submit_batch
+
+    def hook_files(self):
+        app = self.app
+        writer = app.FileManager.output_writer()
+        original_write = writer.write
+        original_atomic = app.FileManager.write_atomic
+
+        def write(filename, content):
+            with self._lock:
+                self._pending_files.setdefault(filename, time.perf_counter())
+            return original_write(filename, content)
+
+        def write_atomic(filename, content):
+            with self._lock:
+                first = self._pending_files.pop(filename, None)
+            start = time.perf_counter()
+            result = original_atomic(filename, content)
+            end = time.perf_counter()
+            self.add('file', end - start)
+            if first is not None:
+                self.add('file_lag', end - first)
+            return result
+
+        writer.write = write
+        app.FileManager.write_atomic = staticmethod(write_atomic)
+
+    def hook_observers(self, engine):
+        """把引擎的每个观察者包一层计时（界面观察者是MY_GUI的绑定方法）"""
+        def timed(observer):
+            owner = getattr(observer, '__self__', observer)
+            metric = f"callback:{type(owner).__name__}"
+
+            def wrapper(engine, event, data):
+                start = time.perf_counter()
+                try:
+                    observer(engine, event, data)
+                finally:
+                    self.add(metric, time.perf_counter() - start)
+            return wrapper
+
+        engine._observers[:] = [timed(observer) for observer in engine._observers]
+
+    def collect_send(self, start_index):
+        """按FIFO顺序把本场景的命令提交时间和服务器到达时间配对"""
+        arrivals = self.server.arrivals
+        for index in range(start_index, min(len(self.submits), len(arrivals))):
+            self.add('send', arrivals[index] - self.submits[index])
+
+
+# ============ 测试环境 ============
+def write_rosters(directory, players):
+    for filename, prefix in (('home.txt', "主队球员"), ('away.txt', "客队球员")):
+        with open(os.path.join(directory, filename), 'w', encoding='utf-8') as f:
+            for number in range(1, players + 1):
+                f.write(f"{number},{prefix}{number}\n")
+
+
+def write_config(directory, port):
+    """直连标题模式指向vMix模拟器，所有字幕自动下字幕延迟很短，推送服务关闭"""
+    config = {
+        'host': '127.0.0.1', 'port': port,
+        'direct_title': True, 'scoreboard_input': '1',
+        'red_card_delay': 0.05, 'yellow_card_delay': 0.05, 'sub_delay': 0.05, 'goal_delay': 0.05,
+        'push_server_port': 0,
+    }
+    with open(os.path.join(directory, 'config.json'), 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+
+
+class HeadlessDriver:
+    """无界面：直接调用比赛引擎（与按钮处理函数一样包在vMix事务中）"""
+
+    def __init__(self, app):
+        self.app = app
+        app.initialize_files()
+        self.vmix = app.VmixController()
+        self.engine = app.MatchEngine({'home': app.home_roster, 'away': app.away_roster},
+                                      self.vmix.team_name_home, self.vmix.team_name_away,
+                                      self.vmix.team_home_color, self.vmix.team_away_color)
+        self.outputs = app.MatchOutputs(self.engine, self.vmix)
+        self.outputs.recover()
+        if not self.vmix.connect():
+            raise RuntimeError("无法连接到vMix模拟器")
+
+    def pump(self):
+        pass
+
+    def _call(self, method, *args):
+        with self.vmix.transaction():
+            method(*args)
+
+    def change_score(self, team, delta):
+        self._call(self.engine.change_score, team, delta)
+
+    def add_substitution(self, team, out_number, in_number):
+        self._call(self.engine.add_substitution, team,
+                   self.engine.find_player(team, out_number), self.engine.find_player(team, in_number))
+
+    def add_card(self, team, number, card):
+        self._call(self.engine.add_card, team, self.engine.find_player(team, number), card)
+
+    def select(self, kind, team, index):
+        self._call(self.engine.select, kind, team, index)
+
+    def add_goal(self, team, number):
+        self._call(self.engine.add_goal, team, self.engine.find_player(team, number))
+
+    def close(self):
+        self.outputs.close()
+        self.vmix.disconnect()
+
+
+class GuiDriver(HeadlessDriver):
+    """真实界面：在输入框中填写编号后调用按钮处理函数，界面回调耗时计入 callback:MY_GUI"""
+
+    def __init__(self, app):
+        import tkinter
+        self.app = app
+        self.tk = tkinter
+        app.initialize_files()
+        self.root = tkinter.Tk()
+        self.gui = app.MY_GUI(self.root)
+        self.gui.set_init_window()
+        # 面板在第一次显示时才创建，先创建基准测试要操作的面板
+        for panel_name in ('sub', 'cards', 'goal'):
+            self.gui.build_panel(panel_name)
+        self.vmix = self.gui.vmix
+        self.engine = self.gui.engine
+        self.outputs = self.gui.outputs
+        # 等待界面的自动连接完成
+        deadline = time.time() + 5
+        while not self.vmix.connected and time.time() < deadline:
+            self.pump()
+            time.sleep(0.01)
+        if not self.vmix.connected:
+            raise RuntimeError("界面未能连接到vMix模拟器")
+
+    def pump(self):
+        self.root.update()
+
+    def _press(self, entry, text, handler):
+        entry.delete(0, self.tk.END)
+        entry.insert(0, text)
+        handler()
+        self.pump()
+
+    def change_score(self, team, delta):
+        suffix = 'scoreplus' if delta > 0 else 'scoreminus'
+        getattr(self.gui, f"scoreboard_{team}_{suffix}")()
+        self.pump()
+
+    def add_substitution(self, team, out_number, in_number):
+        self._press(getattr(self.gui, f"sub_{team}_entry"), f"{out_number} {in_number}",
+                    getattr(self.gui, f"sub_{team}_add"))
+
+    def add_card(self, team, number, card):
+        prefix = 'red' if card == "红牌" else 'yellow'
+        self._press(getattr(self.gui, f"red_{team}_entry"), str(number), getattr(self.gui, f"{prefix}_{team}_add"))
+
+    def select(self, kind, team, index):
+        handlers = {'sub': f"select_sub_card_{team}", 'card': f"select_card_red_{team}",
+                    'goal': f"select_goal_card_{team}"}
+        getattr(self.gui, handlers[kind])(index)
+        self.pump()
+
+    def add_goal(self, team, number):
+        self._press(getattr(self.gui, f"goal_{team}_entry"), str(number), getattr(self.gui, f"goal_{team}_add"))
+
+    def close(self):
+        self.gui.on_closing()
+
+
+# ============ 事件风暴 ============
+def storm_scores(driver, count, rng):
+    """连续改比分（偶尔减分，模拟误操作后更正）"""
+    for _ in range(count):
+        team = rng.choice(('home', 'away'))
+        driver.change_score(team, -1 if rng.random() < 0.2 else 1)
+        yield
+
+
+def storm_substitutions(driver, count, rng, players):
+    for _ in range(count):
+        team = rng.choice(('home', 'away'))
+        out_number, in_number = rng.sample(range(1, players + 1), 2)
+        driver.add_substitution(team, out_number, in_number)
+        yield
+
+
+def storm_cards(driver, count, rng, players):
+    """连续红黄牌，每三张选中一次之前的卡片"""
+    for i in range(count):
+        team = rng.choice(('home', 'away'))
+        driver.add_card(team, rng.randint(1, players), "红牌" if rng.random() < 0.3 else "黄牌")
+        if i % 3 == 2:
+            records = driver.engine.records[('card', team)]
+            driver.select('card', team, rng.randrange(len(records)))
+        yield
+
+
+def storm_goals(driver, count, rng, players):
+    for _ in range(count):
+        team = rng.choice(('home', 'away'))
+        driver.change_score(team, 1)
+        driver.add_goal(team, rng.randint(1, players))
+        yield
+
+
+def storm_subtitles(driver, count, rng):
+    """连续上字幕（自动下字幕任务被不断顺延或触发）"""
+    for _ in range(count):
+        driver.vmix.show_subtitle(rng.choice(('red_card', 'yellow_card', 'sub', 'goal')))
+        yield
+
+
+def run_scenario(name, driver, probes, events, interval):
+    start_index = probes.reset()
+    started = time.perf_counter()
+    count = 0
+    while True:
+        t0 = time.perf_counter()
+        try:
+            next(events)
+        except StopIteration:
+            break
+        probes.add('handler', time.perf_counter() - t0)
+        count += 1
+        if interval:
+            time.sleep(interval)
+    elapsed = time.perf_counter() - started
+
+    # 等待所有应答和合并写入完成
+    deadline = time.time() + 5
+    while len(probes.server.arrivals) < len(probes.submits) and time.time() < deadline:
+        driver.pump()
+        time.sleep(0.005)
+    time.sleep(0.05)
+    driver.app.FileManager.flush_outputs()
+    driver.pump()
+    probes.collect_send(start_index)
+    return {
+        'scenario': name,
+        'events': count,
+        'commands': len(probes.submits) - start_index,
+        'seconds': elapsed,
+        'metrics': {metric: {'count': len(values),
+                             'p50_ms': percentile(values, 50) * 1000,
+                             'p99_ms': percentile(values, 99) * 1000,
+                             'max_ms': max(values) * 1000}
+                    for metric, values in sorted(probes.samples.items()) if values},
+    }
+
+
+def print_report(results):
+    print()
+    print(f"{'场景':<14}{'指标':<26}{'样本':>7}{'p50(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}")
+    print("-" * 77)
+    for result in results:
+        title = f"{result['scenario']} ({result['events']}次, {result['commands']}条命令)"
+        print(title)
+        for metric, stats in result['metrics'].items():
+            print(f"{'':<14}{metric:<26}{stats['count']:>7}{stats['p50_ms']:>10.3f}"
+                  f"{stats['p99_ms']:>10.3f}{stats['max_ms']:>10.3f}")
+    print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="控制链路延迟基准测试")
+    parser.add_argument('--gui', action='store_true', help="创建真实界面并调用按钮处理函数（需要显示器）")
+    parser.add_argument('--scale', type=float, default=1.0, help="事件数量倍数")
+    parser.add_argument('--interval', type=float, default=1.0, help="两次事件之间的间隔（毫秒，0为不间断）")
+    parser.add_argument('--players', type=int, default=40, help="每队名单人数")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="把结果另存为JSON文件")
+    args = parser.parse_args(argv)
+
+    app = load_app()
+    server = VmixSimulator(port=0, record_arrivals=True).start()
+    workdir = tempfile.mkdtemp(prefix="vmix_bench_")
+    write_rosters(workdir, args.players)
+    write_config(workdir, server.port)
+    app.FileManager._base_dir = workdir
+    app.setup_logging(console=False)  # 日志照常入队写文件（计入按钮处理耗时），不刷屏
+    print(f"✓ vMix模拟器监听 {server.host}:{server.port}，数据目录 {workdir}")
+
+    driver = (GuiDriver if args.gui else HeadlessDriver)(app)
+    probes = Probes(app, server)
+    probes.hook_transport(driver.vmix.transport)
+    probes.hook_files()
+    probes.hook_observers(driver.engine)
+
+    rng = random.Random(args.seed)
+    interval = args.interval / 1000
+
+    def n(count):
+        return max(1, int(count * args.scale))
+
+    scenarios = [
+        ("比分连改", storm_scores(driver, n(500), rng)),
+        ("换人", storm_substitutions(driver, n(200), rng, args.players)),
+        ("红黄牌连发", storm_cards(driver, n(300), rng, args.players)),
+        ("进球", storm_goals(driver, n(100), rng, args.players)),
+        ("上字幕", storm_subtitles(driver, n(100), rng)),
+    ]
+    results = [run_scenario(name, driver, probes, events, interval) for name, events in scenarios]
+    driver.close()
+    server.stop()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'gui': args.gui, 'scale': args.scale, 'interval_ms': args.interval, 'results': results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"✓ 结果已保存到 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,13 @@ echo   简单编译脚本（一键编译）
 echo ===============================================
 echo.
 
+REM 打包模式：默认单文件（onefile）；build_exe_simple.bat onedir 生成目录版，
+REM 启动时不需要解压整个Python运行环境，适合比赛中需要快速重启的电脑
+set "BUILD_MODE=onefile"
+if /i "%~1"=="onedir" set "BUILD_MODE=onedir"
+echo 打包模式: %BUILD_MODE%
+echo.
+
 REM 检查PyInstaller是否安装
 python -c "import PyInstaller" 2>nul
 if errorlevel 1 (
@@ -48,6 +55,7 @@ echo.
 REM 清理
 if exist "build" rmdir /s /q build
 if exist "dist\%EXE_NAME%.exe" del /q "dist\%EXE_NAME%.exe"
+if exist "dist\%EXE_NAME%" rmdir /s /q "dist\%EXE_NAME%"
 
 REM 直接使用PyInstaller命令编译
 set "ADD_DATA_PARAMS=--add-data config.json;. --add-data away.txt;. --add-data home.txt;."
@@ -56,7 +64,7 @@ if exist "%ICON_FILE%" (
 )
 
 pyinstaller --name=%EXE_NAME% ^
-    --onefile ^
+    --%BUILD_MODE% ^
     --windowed ^
     --clean ^
     --noconfirm ^
@@ -76,7 +84,30 @@ if errorlevel 1 (
     exit /b 1
 )
 
+if /i "%BUILD_MODE%"=="onedir" (
+    set "EXE_DIR=dist\%EXE_NAME%"
+) else (
+    set "EXE_DIR=dist"
+)
+set "EXE_PATH=%EXE_DIR%\%EXE_NAME%.exe"
+
+echo.
+echo ✓ 编译成功！文件位置: %EXE_PATH%
 echo.
-echo ✓ 编译成功！文件位置: dist\%EXE_NAME%.exe
+
+REM 测量冷启动：exe以 --profile-startup 启动，窗口可以操作后写出 startup_profile.json 并退出
+REM （需要 config.json、home.txt、away.txt 与exe在同一目录，否则按默认配置启动）
+for %%F in (config.json home.txt away.txt) do (
+    if exist "%%F" if not exist "%EXE_DIR%\%%F" copy /y "%%F" "%EXE_DIR%\" >nul
+)
+if exist "%EXE_DIR%\startup_profile.json" del /q "%EXE_DIR%\startup_profile.json"
+echo 正在测量启动耗时...
+start "" /wait "%EXE_PATH%" --profile-startup
+python -c "import json,sys; p=json.load(open(sys.argv[1],encoding='utf-8')); print('冷启动 %%.0fms（exe引导 %%s ms，预算 %%.0fms）' %% (p['cold_start_ms'], p['bootloader_ms'], p['budget_ms'])); sys.exit(0 if p['within_budget'] else 1)" "%EXE_DIR%\startup_profile.json"
+if errorlevel 1 (
+    echo [警告] 启动耗时超出预算或没有生成启动报告，详见 %EXE_DIR%\startup_profile.json
+) else (
+    echo ✓ 启动耗时在预算内
+)
 pause
 
@@ -0,0 +1,540 @@
+# -*- coding: utf-8 -*-
+"""vMix TCP API 模拟器（负载测试和长时间稳定性测试用）
+
+在普通的Linux/macOS机器上模拟程序用到的vMix TCP API子集，不需要Windows上的真实vMix：
+    FUNCTION <函数> <参数>    OverlayInputN / OverlayInputNIn / OverlayInputNOut / OverlayInputNOff、
+                              SetText / SetColor、Cut / Fade / ActiveInput / PreviewInput，其它函数直接应答OK
+    XML / XMLTEXT <路径>      返回模拟的vMix状态XML（输入、标题字段、叠加层、主/预监）
+    TALLY                     返回Tally字符串（0=无 1=主监 2=预监）
+    SUBSCRIBE / UNSUBSCRIBE   TALLY、ACTS 订阅，状态变化时主动推送
+    QUIT
+
+可配置的故障：应答延迟和抖动、应答丢失、随机断开连接、定时断开连接、拒绝连接、慢速读取（模拟vMix处理不过来，
+让客户端的发送缓冲区积压）。
+
+用法：
+    python vmix_simulator.py --port 8099 --latency 5 --jitter 3 --loss 0.01 --drop-rate 0.0005
+    python vmix_simulator.py --soak 3600 --rate 200 --drop-after 120       # 同时运行VmixController长时间压测
+也可以在其它脚本中使用：
+    simulator = VmixSimulator(port=0, latency=0.002).start()   # 后台线程运行，simulator.port为实际端口
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import Counter
+from urllib.parse import parse_qsl
+from xml.sax.saxutils import escape, quoteattr
+
+VERSION = "27.0.0.49"
+
+
+# ============ 模拟的vMix状态 ============
+class SimulatedVmixState:
+    """模拟的vMix状态：输入（含GT标题字段）、叠加层通道、主监和预监"""
+
+    def __init__(self, inputs=8):
+        self.inputs = {}
+        for number in range(1, inputs + 1):
+            self.inputs[number] = {
+                'key': f"00000000-0000-0000-0000-{number:012d}",
+                'title': f"Title {number}",
+                'type': "GT",
+                'fields': {},
+            }
+        # 叠加层通道1-4；程序的默认配置使用0号层，这里一并接受
+        self.overlays = dict.fromkeys(range(0, 5))
+        self.active = 1
+        self.preview = 2 if inputs > 1 else 1
+
+    def _input(self, value):
+        """按编号、名称或Key查找输入，返回编号（找不到返回None）"""
+        if value is None:
+            return None
+        value = str(value)
+        if value.isdigit():
+            number = int(value)
+            return number if number in self.inputs else None
+        for number, data in self.inputs.items():
+            if value in (data['key'], data['title']):
+                return number
+        return None
+
+    def tally(self):
+        """Tally字符串：主监和打开的叠加层为1，预监为2"""
+        on_air = {self.active} | {number for number in self.overlays.values() if number}
+        return "".join("1" if number in on_air else "2" if number == self.preview else "0"
+                       for number in sorted(self.inputs))
+
+    def apply(self, function, params):
+        """执行一个FUNCTION，返回(是否成功, 应答信息, ACTS事件列表)"""
+        acts = []
+        name = function.lower()
+        input_number = self._input(params.get('Input'))
+
+        if name.startswith('overlayinput'):
+            rest = name[len('overlayinput'):]
+            channel = int(rest[0]) if rest[:1].isdigit() else 0
+            action = rest[1:]
+            if channel not in self.overlays:
+                return False, "Invalid overlay number", acts
+            current = self.overlays[channel]
+            if action in ('off', 'out'):
+                self.overlays[channel] = None
+            elif input_number is None:
+                return False, "Input not found", acts
+            elif action == 'in':
+                self.overlays[channel] = input_number
+            elif action == '':
+                # OverlayInputN 为切换：同一输入再次调用则关闭
+                self.overlays[channel] = None if current == input_number else input_number
+            else:
+                return True, "Completed", acts
+            if self.overlays[channel] != current:
+                if current:
+                    acts.append(f"Overlay{channel} {current} 0")
+                if self.overlays[channel]:
+                    acts.append(f"Overlay{channel} {self.overlays[channel]} 1")
+            return True, "Completed", acts
+
+        if name in ('settext', 'setcolor'):
+            if input_number is None:
+                return False, "Input not found", acts
+            field = params.get('SelectedName') or params.get('SelectedIndex', "0")
+            self.inputs[input_number]['fields'][field] = params.get('Value', "")
+            return True, "Completed", acts
+
+        if name in ('cut', 'fade', 'activeinput', 'cutdirect', 'merge', 'stinger1', 'stinger2'):
+            target = self.preview if input_number is None else input_number
+            if target != self.active:
+                acts.append(f"Input {self.active} 0")
+                self.active, self.preview = target, self.active
+                acts.append(f"Input {self.active} 1")
+            return True, "Completed", acts
+
+        if name == 'previewinput':
+            if input_number is None:
+                return False, "Input not found", acts
+            self.preview = input_number
+            return True, "Completed", acts
+
+        return True, "Completed", acts
+
+    def xml(self):
+        """与vMix格式一致的状态XML"""
+        parts = [f"<vmix><version>{VERSION}</version><edition>Simulator</edition><inputs>"]
+        for number, data in self.inputs.items():
+            parts.append(f"<input key={quoteattr(data['key'])} number=\"{number}\" type={quoteattr(data['type'])} "
+                         f"title={quoteattr(data['title'])} state=\"Paused\">{escape(data['title'])}")
+            for index, (field, value) in enumerate(data['fields'].items()):
+                parts.append(f"<text index=\"{index}\" name={quoteattr(field)}>{escape(str(value))}</text>")
+            parts.append("</input>")
+        parts.append("</inputs><overlays>")
+        for channel, number in self.overlays.items():
+            parts.append(f"<overlay number=\"{channel}\">{number or ''}</overlay>")
+        parts.append(f"</overlays><preview>{self.preview}</preview><active>{self.active}</active></vmix>")
+        return "".join(parts)
+
+    def xml_text(self, path):
+        """XMLTEXT：按XPath（ElementTree支持的子集）取文本或属性"""
+        root = ET.fromstring(self.xml())
+        path = path.strip()
+        if path.startswith('vmix/'):
+            path = path[5:]
+        elif path == 'vmix':
+            return root.text
+        attribute = None
+        if '/@' in path:
+            path, attribute = path.rsplit('/@', 1)
+        element = root.find(path)
+        if element is None:
+            return None
+        return element.get(attribute) if attribute else (element.text or "")
+
+
+# ============ 模拟器 ============
+class VmixSimulator:
+    """vMix TCP API 模拟服务器（asyncio）
+    latency/jitter: 应答延迟和随机抖动（秒），同一连接的应答保持顺序
+    loss: 每条命令不应答的概率；drop_rate: 每条命令后直接断开连接的概率
+    drop_after: 连接建立后多少秒断开（None不断开）；refuse: 拒绝新连接的概率
+    slow_reader: 每秒最多读取的字节数（None不限速）
+    record_arrivals: 记录每条FUNCTION命令的到达时间（perf_counter），供基准测试使用
+    """
+
+    def __init__(self, host='127.0.0.1', port=8099, latency=0.0, jitter=0.0, loss=0.0, drop_rate=0.0,
+                 drop_after=None, refuse=0.0, slow_reader=None, inputs=8, record_arrivals=False, seed=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.drop_rate = drop_rate
+        self.drop_after = drop_after
+        self.refuse = refuse
+        self.slow_reader = slow_reader
+        self.state = SimulatedVmixState(inputs)
+        self.arrivals = [] if record_arrivals else None
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._connections = set()
+        self._server = None
+        self._loop = None
+        self._thread = None
+
+    # ---------- 运行 ----------
+    async def serve(self):
+        """启动监听（在当前事件循环中）"""
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    def start(self):
+        """在后台线程中运行，返回self（监听就绪后才返回）"""
+        ready = threading.Event()
+        errors = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.serve())
+            except Exception as e:
+                errors.append(e)
+                ready.set()
+                return
+            ready.set()
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="vmix-simulator", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    def stop(self):
+        """关闭服务和所有连接（线程安全）"""
+        if self._loop is None:
+            return
+
+        def close():
+            self._server.close()
+            for connection in list(self._connections):
+                connection.close()
+
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(close)
+        else:
+            close()
+
+    def call(self, callback, *args):
+        """在模拟器的事件循环中执行（用于在测试中修改状态，如切换主监后推送Tally）"""
+        self._loop.call_soon_threadsafe(callback, *args)
+
+    def drop_all(self):
+        """立即断开所有连接（线程安全）"""
+        self.call(lambda: [connection.close() for connection in list(self._connections)])
+
+    # ---------- 连接处理 ----------
+    async def _handle(self, reader, writer):
+        if self._random.random() < self.refuse:
+            self.stats['refused'] += 1
+            writer.close()
+            return
+        connection = _Connection(self, reader, writer)
+        self._connections.add(connection)
+        self.stats['connections'] += 1
+        try:
+            await connection.run()
+        finally:
+            self._connections.discard(connection)
+            connection.close()
+
+    def _response_delay(self):
+        return self.latency + (self._random.random() * self.jitter if self.jitter else 0.0)
+
+    def _execute(self, connection, line):
+        """处理一行命令，返回应答（bytes），None表示不应答"""
+        verb, _, rest = line.partition(' ')
+        verb = verb.upper()
+        if verb == 'FUNCTION':
+            if self.arrivals is not None:
+                self.arrivals.append(time.perf_counter())
+            self.stats['functions'] += 1
+            function, _, query = rest.partition(' ')
+            params = dict(parse_qsl(query, keep_blank_values=True))
+            before = self.state.tally()
+            ok, message, acts = self.state.apply(function, params)
+            if not ok:
+                self.stats['errors'] += 1
+            tally = self.state.tally()
+            if tally != before:
+                self._broadcast('TALLY', f"TALLY OK {tally}\r\n")
+            for act in acts:
+                self._broadcast('ACTS', f"ACTS OK {act}\r\n")
+            return f"FUNCTION {'OK' if ok else 'ER'} {message}\r\n"
+        if verb == 'XML':
+            self.stats['xml'] += 1
+            payload = self.state.xml().encode('utf-8') + b"\r\n"
+            return f"XML {len(payload)}\r\n".encode('ascii') + payload
+        if verb == 'XMLTEXT':
+            self.stats['xml'] += 1
+            try:
+                value = self.state.xml_text(rest)
+            except (SyntaxError, ET.ParseError) as e:
+                return f"XMLTEXT ER {e}\r\n"
+            return "XMLTEXT ER Not found\r\n" if value is None else f"XMLTEXT OK {value}\r\n"
+        if verb == 'TALLY':
+            self.stats['tally'] += 1
+            return f"TALLY OK {self.state.tally()}\r\n"
+        if verb in ('SUBSCRIBE', 'UNSUBSCRIBE'):
+            topic = rest.strip().upper()
+            if topic not in ('TALLY', 'ACTS'):
+                return f"{verb} ER Unknown subscription\r\n"
+            if verb == 'SUBSCRIBE':
+                connection.subscriptions.add(topic)
+            else:
+                connection.subscriptions.discard(topic)
+            return f"{verb} OK {topic}\r\n"
+        if verb == 'QUIT':
+            connection.closing = True
+            return "QUIT OK Bye\r\n"
+        return f"{verb} ER Unknown command\r\n"
+
+    def _broadcast(self, topic, message):
+        for connection in list(self._connections):
+            if topic in connection.subscriptions:
+                connection.send(message.encode('utf-8'), 0.0)
+
+
+class _Connection:
+    """一个客户端连接：读协程解析命令，写协程按到期时间顺序发送应答"""
+
+    def __init__(self, simulator, reader, writer):
+        self.simulator = simulator
+        self.reader = reader
+        self.writer = writer
+        self.subscriptions = set()
+        self.closing = False
+        self._queue = asyncio.Queue()
+        self._last_due = 0.0
+        self._closed = False
+
+    def send(self, data, delay):
+        # 到期时间不早于前一条，保证应答顺序
+        due = max(time.perf_counter() + delay, self._last_due)
+        self._last_due = due
+        self._queue.put_nowait((due, data))
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            try:
+                self.writer.close()
+            except (OSError, RuntimeError):
+                pass
+
+    async def _write_loop(self):
+        while True:
+            due, data = await self._queue.get()
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if data is None:
+                self.close()
+                return
+            self.writer.write(data)
+            await self.writer.drain()
+
+    async def _read_lines(self):
+        """按行读取；慢速读取模式下限制每秒读取的字节数"""
+        rate = self.simulator.slow_reader
+        if not rate:
+            while True:
+                line = await self.reader.readuntil(b"\n")
+                yield line
+        buffer = b""
+        chunk = max(1, min(4096, int(rate / 20)))
+        while True:
+            data = await self.reader.read(chunk)
+            if not data:
+                return
+            await asyncio.sleep(len(data) / rate)
+            buffer += data
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                yield line + b"\n"
+
+    async def run(self):
+        simulator = self.simulator
+        rng = simulator._random
+        writer_task = asyncio.ensure_future(self._write_loop())
+        drop_task = None
+        if simulator.drop_after:
+            drop_task = asyncio.get_running_loop().call_later(simulator.drop_after, self._drop, 'drop_after')
+        self.send(f"VERSION OK {VERSION}\r\n".encode('ascii'), 0.0)
+        try:
+            async for raw in self._read_lines():
+                line = raw.decode('utf-8', 'replace').strip()
+                if not line:
+                    continue
+                simulator.stats['commands'] += 1
+                if rng.random() < simulator.drop_rate:
+                    self._drop('dropped')
+                    return
+                response = simulator._execute(self, line)
+                if response is None:
+                    continue
+                if rng.random() < simulator.loss:
+                    simulator.stats['lost'] += 1
+                    continue
+                if isinstance(response, str):
+                    response = response.encode('utf-8')
+                self.send(response, simulator._response_delay())
+                if self.closing:
+                    self._queue.put_nowait((self._last_due, None))
+                    await writer_task
+                    return
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, OSError):
+            pass
+        finally:
+            if drop_task is not None:
+                drop_task.cancel()
+            writer_task.cancel()
+
+    def _drop(self, reason):
+        self.simulator.stats[reason] += 1
+        self.close()
+
+
+# ============ 长时间压测 ============
+def load_app():
+    """加载主程序模块（文件名带点号，不能直接import）"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'a0.95.py')
+    spec = importlib.util.spec_from_file_location('vmix_app', path)
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    return app
+
+
+def soak(simulator, duration, rate, report_interval=10.0):
+    """用VmixController对模拟器持续发送命令：连接断开后由控制器自动重连，断开期间的命令进入离线队列，
+    定期上字幕触发自动下字幕任务，并像界面的check_vmix_connection一样读取心跳链路状态；定期打印统计
+    """
+    app = load_app()
+    app.FileManager._base_dir = tempfile.mkdtemp(prefix="vmix_soak_")
+    vmix = app.VmixController()
+    vmix.host, vmix.port = simulator.host, simulator.port
+    for subtitle_type in ('red_card', 'yellow_card', 'sub', 'goal'):
+        setattr(vmix, f"{subtitle_type}_delay", 1)
+
+    counts = Counter()
+    hide_subtitle = vmix.hide_subtitle
+
+    def counted_hide(subtitle_type, auto=False):
+        counts['auto_hide' if auto else 'hide'] += 1
+        return hide_subtitle(subtitle_type, auto)
+
+    vmix.hide_subtitle = counted_hide
+
+    def on_done(future):
+        if future.cancelled() or future.exception() is not None:
+            counts['failed'] += 1
+        elif future.result().ok:
+            counts['ok'] += 1
+        else:
+            counts['rejected'] += 1
+
+    started = time.time()
+    next_report = started + report_interval
+    interval = 1.0 / rate if rate else 0.0
+    sequence = 0
+    vmix.connect()
+    was_connected = vmix.connected
+    while time.time() - started < duration:
+        if vmix.connected and not was_connected:
+            counts['reconnects'] += 1
+        was_connected = vmix.connected
+        if not vmix.connected:
+            counts['offline'] += 1
+        elif vmix.link_state == 'degraded':
+            # 与界面的连接检查相同：只读取后台心跳的结果，不发送数据
+            counts['degraded'] += 1
+
+        sequence += 1
+        future = vmix.submit_command(f"SetText Input=1&SelectedName=Soak.Text&Value={sequence}")
+        if future is None:
+            counts['not_sent'] += 1
+        else:
+            counts['sent'] += 1
+            future.add_done_callback(on_done)
+        if sequence % max(1, int(rate)) == 0:
+            vmix.show_subtitle(random.choice(('red_card', 'yellow_card', 'sub', 'goal')))
+            counts['shown'] += 1
+
+        if time.time() >= next_report:
+            next_report += report_interval
+            latencies = sorted(vmix.transport.latencies) if vmix.transport else []
+            p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0
+            rtt = vmix.rtt_stats
+            heartbeat = f"心跳 {rtt['avg'] * 1000:.1f}ms/p95 {rtt['p95'] * 1000:.1f}ms" if rtt else "心跳 -"
+            print(f"[{time.time() - started:7.0f}s] 发送 {counts['sent']} 成功 {counts['ok']} "
+                  f"失败 {counts['failed']} 未发送 {counts['not_sent']} 重连 {counts['reconnects']} "
+                  f"离线队列 {vmix.offline_stats} "
+                  f"自动下字幕 {counts['auto_hide']} | 应答p99 {p99:.1f}ms {heartbeat} | 模拟器 {dict(simulator.stats)}")
+        if interval:
+            time.sleep(interval)
+
+    vmix.disconnect()
+    counts.update({f"offline_{key}": value for key, value in vmix.offline_stats.items()})
+    print(f"✓ 压测结束: {dict(counts)}")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="vMix TCP API 模拟器")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--inputs', type=int, default=8, help="模拟的输入数量")
+    parser.add_argument('--latency', type=float, default=0.0, help="应答延迟（毫秒）")
+    parser.add_argument('--jitter', type=float, default=0.0, help="应答延迟随机抖动（毫秒）")
+    parser.add_argument('--loss', type=float, default=0.0, help="命令不应答的概率")
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="每条命令后断开连接的概率")
+    parser.add_argument('--drop-after', type=float, default=None, help="连接建立后多少秒断开")
+    parser.add_argument('--refuse', type=float, default=0.0, help="拒绝新连接的概率")
+    parser.add_argument('--slow-reader', type=float, default=None, help="每秒最多读取的字节数")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--stats', type=float, default=10.0, help="打印统计的间隔（秒）")
+    parser.add_argument('--soak', type=float, default=None, help="同时运行VmixController压测的时长（秒）")
+    parser.add_argument('--rate', type=float, default=100.0, help="压测每秒发送的命令数")
+    args = parser.parse_args(argv)
+
+    simulator = VmixSimulator(args.host, args.port, latency=args.latency / 1000, jitter=args.jitter / 1000,
+                              loss=args.loss, drop_rate=args.drop_rate, drop_after=args.drop_after,
+                              refuse=args.refuse, slow_reader=args.slow_reader, inputs=args.inputs,
+                              seed=args.seed).start()
+    print(f"✓ vMix模拟器已启动 {simulator.host}:{simulator.port}")
+    try:
+        if args.soak:
+            soak(simulator, args.soak, args.rate, args.stats)
+        else:
+            while True:
+                time.sleep(args.stats)
+                print(f"✓ 模拟器统计: {dict(simulator.stats)} | Tally {simulator.state.tally()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()